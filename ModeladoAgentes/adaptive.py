@@ -0,0 +1,138 @@
+"""Win-rate estimation that stops as soon as the answer is known.
+
+Instead of a fixed number of games, configurations are played in rounds of
+`batch` games on the same seeds (through sweep.run_sweep, so rounds run in
+parallel and an interrupted run resumes from its results file):
+
+- sequential stopping: a configuration stops once the half-width of its 95%
+  Wilson interval is below the target;
+- adaptive allocation: a configuration whose interval lies entirely below the
+  leader's is dropped, so the games go to the close contenders.
+
+    python adaptive.py --grid agents=4,5,6 rescuers=1,2 --target 0.02 --output race.jsonl
+"""
+import argparse
+
+from sweep import expand_grid, load_results, parse_grid, run_sweep, wilson_interval
+
+
+class ConfigEstimate:
+    def __init__(self, config):
+        self.config = config
+        self.games = 0
+        self.victories = 0
+        self.status = 'running'  # running, precise (target reached), dropped (clearly worse) or budget
+
+    def add(self, result):
+        self.games += 1
+        self.victories += bool(result['victory'])
+
+    @property
+    def win_rate(self):
+        return self.victories / self.games if self.games else 0.0
+
+    @property
+    def interval(self):
+        return wilson_interval(self.victories, self.games)
+
+    @property
+    def half_width(self):
+        low, high = self.interval
+        return (high - low) / 2
+
+    def to_dict(self):
+        return {
+            'config_key': self.config.key(),
+            'config': self.config.changes(),
+            'games': self.games,
+            'win_rate': self.win_rate,
+            'ci95': list(self.interval),
+            'status': self.status
+        }
+
+
+def update_status(estimates, target, min_games, max_games):
+    running = [estimate for estimate in estimates if estimate.status == 'running']
+    if not running:
+        return
+
+    # The leader is the best lower bound among the configurations still considered
+    considered = [estimate for estimate in estimates if estimate.status != 'dropped']
+    leader = max(considered, key=lambda estimate: estimate.interval[0])
+
+    for estimate in running:
+        if estimate.games < min_games:
+            continue
+        if estimate is not leader and estimate.interval[1] < leader.interval[0]:
+            estimate.status = 'dropped'
+        elif estimate.half_width <= target:
+            estimate.status = 'precise'
+        elif estimate.games >= max_games:
+            estimate.status = 'budget'
+
+
+def race(configs, output, target=0.02, batch=50, min_games=100, max_games=5000, first_seed=0,
+         processes=None, max_turns=10000, verbose=True):
+    """Plays the configurations in rounds until each one is precise enough or clearly worse than the leader.
+
+    Every configuration plays seeds first_seed, first_seed + 1, ... in order, so
+    the configurations are always compared on the same fire sequences.
+    Returns the estimates sorted by win rate.
+    """
+    estimates = {config.key(): ConfigEstimate(config) for config in configs}
+    for result in load_results(output):
+        estimate = estimates.get(result['config_key'])
+        if estimate is not None and first_seed <= result['seed'] < first_seed + max_games:
+            estimate.add(result)
+
+    rounds = 0
+    while True:
+        update_status(list(estimates.values()), target, min_games, max_games)
+        running = [estimate for estimate in estimates.values() if estimate.status == 'running']
+        if not running:
+            break
+
+        # Every running configuration is brought to the same number of games, one batch beyond the leader
+        games = min(max_games, max(estimate.games for estimate in running) + batch)
+        games = max(games, min_games)
+        new_results = []
+        run_sweep([estimate.config for estimate in running], range(first_seed, first_seed + games), output,
+                  processes=processes, max_turns=max_turns, new_results=new_results)
+        for result in new_results:
+            estimates[result['config_key']].add(result)
+
+        rounds += 1
+        if verbose:
+            print(f"Round {rounds}: {len(running)} running, {games} games each")
+
+    return sorted(estimates.values(), key=lambda estimate: estimate.win_rate, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate win rates with sequential stopping and adaptive allocation.")
+    parser.add_argument('--grid', nargs='*', default=[], help="Settings to compare, e.g. agents=4,5,6")
+    parser.add_argument('--target', type=float, default=0.02, help="Half-width of the 95%% interval to reach")
+    parser.add_argument('--batch', type=int, default=50, help="Games added per round")
+    parser.add_argument('--min-games', type=int, default=100)
+    parser.add_argument('--max-games', type=int, default=5000, help="Most games for a single configuration")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--output', default="race.jsonl")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    args = parser.parse_args()
+
+    configs = expand_grid(parse_grid(args.grid))
+    estimates = race(configs, args.output, target=args.target, batch=args.batch, min_games=args.min_games,
+                     max_games=args.max_games, first_seed=args.first_seed, processes=args.processes,
+                     max_turns=args.max_turns)
+
+    total = sum(estimate.games for estimate in estimates)
+    print(f"{total} games in total ({len(estimates) * args.max_games} with a fixed count of {args.max_games})")
+    for estimate in estimates:
+        settings = ', '.join(f"{name}={value}" for name, value in estimate.config.changes().items()) or 'classic rules'
+        low, high = estimate.interval
+        print(f"{estimate.win_rate:.3f} [{low:.3f}, {high:.3f}] over {estimate.games} games ({estimate.status}): {settings}")
+
+
+if __name__ == '__main__':
+    main()
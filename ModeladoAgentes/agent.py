@@ -1,25 +1,31 @@
-from mesa import Agent
-import numpy as np
-import heapq
-import math
 from util import decimal_to_binary
+from policy import DefaultPolicy
+from core import CoreAgent
+from pathfinding import heuristic, search_path
 
-class FireRescueAgent(Agent):
-    def __init__(self, model, is_rescuer=False):
+class FireRescueAgent(CoreAgent):
+    def __init__(self, model, is_rescuer=False, policy=None):
         super().__init__(model)
         self.is_rescuer = is_rescuer
+        self.policy = policy if policy is not None else DefaultPolicy()
         self.target_fire = None
         self.target_smoke = None
         self.hasVictim = False
-        self.AP_PER_TURN = 4     # Action points gained per turn
-        self.MAX_AP = 8          # Maximum action points that can be stored
+        config = model.config
+        self.AP_PER_TURN = config.ap_per_turn      # Action points gained per turn
+        self.MAX_AP = config.max_ap                # Maximum action points that can be stored
+        self.MIN_AP_TO_ACT = config.min_ap_to_act  # Keep acting while at least this many AP are stored
         self.storedAP = 0  # Stored action points
-        self.COST_MOVE = 1
-        self.COST_MOVE_WITH_VICTIM = 2
-        self.COST_EXTINGUISH_SMOKE = 1
-        self.COST_EXTINGUISH_FIRE = 2
-        self.COST_DAMAGE_WALL = 2  # Cost to damage a wall
-        self.COST_OPEN_DOOR = 1    # Cost to open a door
+        self.COST_MOVE = config.cost_move
+        self.COST_MOVE_WITH_VICTIM = config.cost_move_with_victim
+        self.COST_EXTINGUISH_SMOKE = config.cost_extinguish_smoke
+        self.COST_EXTINGUISH_FIRE = config.cost_extinguish_fire
+        self.COST_DAMAGE_WALL = config.cost_damage_wall  # Cost to damage a wall
+        self.COST_OPEN_DOOR = config.cost_open_door      # Cost to open a door
+        if config.pathfinding not in ('doors', 'hazard'):
+            raise ValueError(f"Unknown pathfinding mode '{config.pathfinding}'.")
+        self.hazard_pathfinding = config.pathfinding == 'hazard'
+        self.HAZARD_WEIGHT = config.hazard_weight
 
     def step(self):
 
@@ -37,14 +43,15 @@ class FireRescueAgent(Agent):
 
 
         print(f"[Agent {self.unique_id}] Starting step with {self.storedAP} AP at position {self.pos}.")
+        self.policy.start_turn(self)
 
         if self.target_fire:
             print(f"[Agent {self.unique_id}] Targeting fire at {self.target_fire}.")
         else:
             print(f"[Agent {self.unique_id}] No current fire target.")
 
-        # Main loop: Perform actions until AP falls to the threshold (4 or less)
-        while self.storedAP >= 4:
+        # Main loop: Perform actions until AP falls below the threshold (MIN_AP_TO_ACT)
+        while self.storedAP >= self.MIN_AP_TO_ACT:
             action_performed = False
 
             # 1. Extinguish smoke at current position if present
@@ -77,13 +84,9 @@ class FireRescueAgent(Agent):
             if action_performed:
                 continue
 
-            # 3. Handle rescuing logic
-            if self.is_rescuer:
-                action_performed = self.perform_rescuer_actions()
-
-            # 4. Handle non-rescuer logic
-            else:
-                action_performed = self.perform_non_rescuer_actions()
+            # 3. Let the policy decide the rescuing or firefighting actions
+            actions = self.policy.decide(self, self.model.observe(self))
+            action_performed = self.apply_actions(actions)
 
             if not action_performed:
                 print(f"[Agent {self.unique_id}] No immediate actions available. Stopping turn with {self.storedAP} AP.")
@@ -91,100 +94,31 @@ class FireRescueAgent(Agent):
 
         print(f"[Agent {self.unique_id}] Ended turn with {self.storedAP} AP.")
 
-    def perform_rescuer_actions(self):
-        """Handles actions specific to rescuer agents when AP > threshold."""
-        if self.hasVictim:
-            # Check if at exit
-            if self.model.is_exit(self.pos):
-                self.drop_victim()
-                return True
-            else:
-                # Move towards nearest exit
-                target_pos = self.find_nearest_exit()
-                if target_pos:
-                    path, _ = self.a_star(self.pos, target_pos)
-                    if len(path) > 1:
-                        next_step = path[1]
-                        move_cost = self.get_movement_cost(self.pos, next_step)
-                        if self.storedAP >= move_cost:
-                            self.move_to(next_step, with_victim=True)
-                            # After moving, check if at exit
-                            if self.model.is_exit(self.pos):
-                                self.drop_victim()
-                            return True
-        else:
-            # Check for victim or POI at current cell
-            if self.model.is_victim_at(self.pos):
-                self.pick_up_victim()
-                return True
-            elif self.model.is_poi_at(self.pos):
-                self.reveal_poi()
-                return True
+    def apply_actions(self, actions):
+        """Applies the actions returned by the policy, returns whether any was performed.
+
+        An action that could not be done (e.g. a move without enough AP) does
+        not count, so a turn whose actions all fail ends instead of asking again.
+        """
+        performed = False
+        for action in actions:
+            name = action[0]
+            if name == 'move':
+                done = self.move_to(action[1], with_victim=self.hasVictim)
+            elif name == 'extinguish_fire':
+                done = self.extinguish_fire(action[1])
+            elif name == 'extinguish_smoke':
+                done = self.extinguish_smoke(action[1])
+            elif name == 'pick_up_victim':
+                done = self.pick_up_victim()
+            elif name == 'drop_victim':
+                done = self.drop_victim()
+            elif name == 'reveal_poi':
+                done = self.reveal_poi()
             else:
-                # Move towards nearest victim or POI
-                target_pos = self.find_nearest_poi()
-                if target_pos:
-                    path, _ = self.a_star(self.pos, target_pos)
-                    if len(path) > 1:
-                        next_step = path[1]
-                        move_cost = self.get_movement_cost(self.pos, next_step)
-                        if self.storedAP >= move_cost:
-                            self.move_to(next_step)
-                            return True
-                else:
-                    print(f"[Agent {self.unique_id}] No victims or POIs left to rescue.")
-        return False  # No actions performed
-
-    def perform_non_rescuer_actions(self):
-        """Handles actions specific to non-rescuer agents when AP > threshold."""
-        fireAssigned = False
-        if not self.target_fire:
-            fireAssigned = self.assign_fire_target()
-        
-        if not self.target_fire and not fireAssigned and not self.target_smoke:
-            self.assign_smoke_target()
-
-        if self.target_fire and self.storedAP >= self.COST_MOVE:
-            path, total_cost = self.a_star(self.pos, self.target_fire)
-            if len(path) > 1:
-                next_step = path[1]
-                move_cost = self.get_movement_cost(self.pos, next_step)
-                # Estimate total cost to reach and extinguish fire
-                total_action_cost = total_cost + self.COST_EXTINGUISH_FIRE
-                if self.storedAP >= total_action_cost:
-                    self.move_to(next_step)
-                    return True
-                else:
-                    # Decide whether to wait and accumulate AP or move closer
-                    remaining_AP_after_move = self.storedAP - move_cost
-                    if remaining_AP_after_move >= 4:
-                        # Move closer to avoid wasting AP
-                        self.move_to(next_step)
-                        return True
-                    else:
-                        print(f"[Agent {self.unique_id}] Not enough AP to reach fire. Waiting to accumulate AP.")
-                        return False  # Wait to accumulate more AP
-        elif self.target_smoke and self.storedAP >= self.COST_MOVE:
-            path, total_cost = self.a_star(self.pos, self.target_smoke)
-            if len(path) > 1:
-                next_step = path[1]
-                move_cost = self.get_movement_cost(self.pos, next_step)
-                # Estimate total cost to reach and extinguish smoke
-                total_action_cost = total_cost + self.COST_EXTINGUISH_SMOKE
-                if self.storedAP >= total_action_cost:
-                    self.move_to(next_step)
-                    return True
-                else:
-                    # Decide whether to wait and accumulate AP or move closer
-                    remaining_AP_after_move = self.storedAP - move_cost
-                    if remaining_AP_after_move >= 4:
-                        # Move closer to avoid wasting AP
-                        self.move_to(next_step)
-                        return True
-                    else:
-                        print(f"[Agent {self.unique_id}] Not enough AP to reach smoke. Waiting to accumulate AP.")
-                        return False  # Wait to accumulate more AP
-        return False  # No actions performed
+                raise ValueError(f"Unknown action '{name}'.")
+            performed = performed or done
+        return performed
 
     def pick_up_victim(self):
         if self.model.is_victim_at(self.pos) and not self.hasVictim:
@@ -203,10 +137,13 @@ class FireRescueAgent(Agent):
                 'action': 'pick_up_victim',
                 'position': list(self.pos)
             })
+            return True
+        return False
 
     def drop_victim(self):
         if self.hasVictim and self.model.is_exit(self.pos):
             self.hasVictim = False
+            self.model.events.points_of_interest_changed = True  # One carried victim less
             self.model.people_rescued += 1
             print(f"[Agent {self.unique_id}] Dropped off a victim at exit {self.pos}.")
 
@@ -216,6 +153,8 @@ class FireRescueAgent(Agent):
                 'action': 'drop_victim',
                 'position': list(self.pos)
             })
+            return True
+        return False
 
 
     def extinguish_fire(self, pos):
@@ -236,6 +175,8 @@ class FireRescueAgent(Agent):
                 if self.target_fire == pos:
                     print(f"[Agent {self.unique_id}] Resetting target as fire at {pos} was extinguished.")
                     self.target_fire = None
+                return True
+        return False
 
     def extinguish_smoke(self, pos):
         if self.storedAP >= self.COST_EXTINGUISH_SMOKE:
@@ -250,6 +191,8 @@ class FireRescueAgent(Agent):
                     'action': 'extinguish_smoke',
                     'position': list(pos)
                 })
+                return True
+        return False
 
     def check_and_extinguish(self, current_pos):
         # Check the current cell
@@ -274,11 +217,13 @@ class FireRescueAgent(Agent):
     def move_to(self, pos, with_victim=False):
         move_cost = self.COST_MOVE_WITH_VICTIM if with_victim else self.COST_MOVE
 
+        # Whether the fire in the way was put out, even if the move itself cannot be paid afterwards
+        extinguished = False
         fire_value = self.model.fires.data[pos]
         if fire_value == 1:  # Fire detected
             if self.storedAP >= self.COST_EXTINGUISH_FIRE:
                 print(f"[Agent {self.unique_id}] Fire detected at {pos}. Extinguishing it before moving.")
-                self.extinguish_fire(pos)
+                extinguished = self.extinguish_fire(pos)
                 # Action recorded in extinguish_fire
 
         total_cost = move_cost
@@ -299,7 +244,7 @@ class FireRescueAgent(Agent):
                 })
 
             prev_pos = self.pos
-            self.model.grid.move_agent(self, pos)
+            self.model.move_agent(self, pos)
             self.storedAP -= move_cost
             print(f"[Agent {self.unique_id}] Moved to {pos}. Remaining AP: {self.storedAP}.")
 
@@ -313,8 +258,9 @@ class FireRescueAgent(Agent):
 
             # Check current cell and adjacent cells for fire or smoke
             self.check_and_extinguish(pos)
-        else:
-            print(f"[Agent {self.unique_id}] Not enough AP to move to {pos}. Needed {total_cost}, had {self.storedAP}.")
+            return True
+        print(f"[Agent {self.unique_id}] Not enough AP to move to {pos}. Needed {total_cost}, had {self.storedAP}.")
+        return extinguished
 
     def check_actions_after_move(self, pos, remaining_ap):
         actions_available = False
@@ -376,7 +322,48 @@ class FireRescueAgent(Agent):
         # Check if this agent is targeting the given smoke
         return hasattr(self, "target_smoke") and self.target_smoke == smoke_pos
             
+    def path_version(self):
+        return self.model.path_version()
+
+    def decision_key(self, query, *extra):
+        # Cache key of a target query: the agent's cell, the paths and what the query looks for
+        return (query, self.pos, self.path_version()) + extra
+
+    def cached_decision(self, key, compute):
+        cache = self.model.decision_cache
+        hits = cache.hits
+        value = cache.get_or_compute(key, compute)
+        if self.model.profiler is not None:
+            self.model.profiler.count('decision_cache_hits' if cache.hits > hits else 'decision_cache_misses')
+        return value
+
     def find_nearest_exit(self):
+        # Exit costs only depend on walls and doors, the model keeps them per cell
+        if not self.hazard_pathfinding:
+            return self.model.exit_distances.nearest(self.pos)
+        return self.cached_decision(self.decision_key('nearest_exit'), self.search_nearest_exit)
+
+    def get_exits_sorted_by_distance(self):
+        if not self.hazard_pathfinding:
+            return list(self.model.exit_distances.sorted_by_cost(self.pos))
+        return list(self.cached_decision(self.decision_key('exits_by_distance'), self.search_exits_by_distance))
+
+    def find_nearest_poi(self):
+        key = self.decision_key('nearest_poi', self.model.zobrist.points_of_interest)
+        return self.cached_decision(key, self.search_nearest_poi)
+
+    def find_highest_priority_fire(self):
+        # Fires targeted by other agents are skipped, so they are part of the key
+        targets = tuple(sorted(agent.target_fire for agent in self.model.agent_list if agent.target_fire))
+        key = self.decision_key('fire', self.model.zobrist.fires, targets)
+        return self.cached_decision(key, self.search_highest_priority_fire)
+
+    def find_highest_priority_smoke(self):
+        targets = tuple(sorted(agent.target_smoke for agent in self.model.agent_list if agent.target_smoke))
+        key = self.decision_key('smoke', self.model.zobrist.fires, targets)
+        return self.cached_decision(key, self.search_highest_priority_smoke)
+
+    def search_nearest_exit(self):
         # Get positions of all exits
         exit_positions = list(self.model.entry_points)
         
@@ -395,7 +382,7 @@ class FireRescueAgent(Agent):
 
         return closest_exit
     
-    def get_exits_sorted_by_distance(self):
+    def search_exits_by_distance(self):
         # Get positions of all exits
         exit_positions = list(self.model.entry_points)
         
@@ -413,13 +400,13 @@ class FireRescueAgent(Agent):
         # Sort exits by total cost
         exit_costs.sort(key=lambda x: x[0])
 
-        # Return list of exit positions sorted by cost
+        # Exit positions sorted by cost, as a tuple since the cache shares it
         sorted_exits = [exit_pos for _, exit_pos in exit_costs]
 
-        return sorted_exits
+        return tuple(sorted_exits)
 
     
-    def find_nearest_poi(self):
+    def search_nearest_poi(self):
         # Get positions of all POIs
         poi_positions = self.model.get_poi_positions()
         
@@ -466,7 +453,7 @@ class FireRescueAgent(Agent):
             if acceptable_exit:
                 # Move instantly to the acceptable exit
                 prev_pos = self.pos
-                self.model.grid.move_agent(self, acceptable_exit)
+                self.model.move_agent(self, acceptable_exit)
                 print(f"[Agent {self.unique_id}] Escaped to entry point at {acceptable_exit}.")
 
                 # Record move action
@@ -515,8 +502,9 @@ class FireRescueAgent(Agent):
                 'action': 'reveal_poi_false_alarm',
                 'position': list(self.pos)
             })
+        return poi_type is not None
 
-    def find_highest_priority_fire(self):
+    def search_highest_priority_fire(self):
         fires = self.model.get_all_fires()
         if not fires:
             return None
@@ -533,7 +521,7 @@ class FireRescueAgent(Agent):
 
         return closest_fire
     
-    def find_highest_priority_smoke(self):
+    def search_highest_priority_smoke(self):
         smokes = self.model.get_all_smokes()
         if not smokes:
             return None
@@ -573,38 +561,19 @@ class FireRescueAgent(Agent):
             print(f"[Agent {self.unique_id}] No smoke left to target.")
     
     def a_star(self, start, goal):
-        open_set = []
-        heapq.heappush(open_set, (0, start))
-        
-        came_from = {}
-        g_score = {start: 0}
-        
-        while open_set:
-            current = heapq.heappop(open_set)[1]
-            
-            if current == goal:
-                # Reconstruct the path and return both path and cost
-                path = self.reconstruct_path(came_from, current)
-                return path, g_score[current]
-            
-            for neighbor in self.get_neighbors(current):
-                movement_cost = self.get_movement_cost(current, neighbor)
-                tentative_g_score = g_score[current] + movement_cost
-                if neighbor not in g_score or tentative_g_score < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g_score
-                    f_score = tentative_g_score + self.a_star_heuristic(neighbor, goal)
-                    heapq.heappush(open_set, (f_score, neighbor))
-        
-        return [], float('inf')  # No path found
-    
-    def reconstruct_path(self, came_from, current):
-        total_path = [current]
-        while current in came_from:
-            current = came_from[current]
-            total_path.insert(0, current)
-        return total_path
-    
+        # The same path is usually asked for twice per decision: by the target
+        # selection and by the policy moving towards the chosen target
+        key = ('path', start, goal, self.path_version())
+        return self.cached_decision(key, lambda: self.a_star_search(start, goal))
+
+    def a_star_search(self, start, goal):
+        path, cost, nodes_expanded = search_path(self.model.path_board, start, goal)
+        profiler = self.model.profiler
+        if profiler is not None:
+            profiler.count('a_star_calls')
+            profiler.count('a_star_nodes_expanded', nodes_expanded)
+        return path, cost
+
     def get_movement_cost(self, current, neighbor):
         door_state = self.model.check_door(current, neighbor)
         if door_state == 'closed':
@@ -612,25 +581,36 @@ class FireRescueAgent(Agent):
         else:
             return 1  
 
+    def get_move_ap_cost(self, current, neighbor):
+        # AP move_to needs for the step: carrying a victim costs more, a closed door adds its cost
+        cost = self.COST_MOVE_WITH_VICTIM if self.hasVictim else self.COST_MOVE
+        if self.model.check_door(current, neighbor) == 'closed':
+            cost += self.COST_OPEN_DOOR
+        return cost
+
+    def get_path_cost(self, current, neighbor, goal):
+        # Cost of a step when planning: the AP of the move and, in hazard mode,
+        # extinguishing what is in the way plus the risk of standing next to fire
+        return self.model.path_board.step_cost(current, neighbor, goal)
+
+    def get_path_ap_cost(self, path):
+        # AP spent walking the path: moves, doors and extinguishing on the way (not at the goal)
+        cost = 0
+        for current, neighbor in zip(path, path[1:]):
+            cost += self.get_movement_cost(current, neighbor)
+            if neighbor != path[-1]:
+                fire_value = self.model.fires.data[neighbor]
+                if fire_value == 1:
+                    cost += self.COST_EXTINGUISH_FIRE
+                elif fire_value == 0.5:
+                    cost += self.COST_EXTINGUISH_SMOKE
+        return cost
+
     def get_neighbors(self, pos):
-        neighbors = []
-        directions = [(0, -1), (-1, 0), (0, 1), (1, 0)]  # N, W, S, E
-        
-        for dx, dy in directions:
-            neighbor = (pos[0] + dx, pos[1] + dy)
-            
-            # Check grid bounds
-            if not (0 <= neighbor[0] < self.model.width and 0 <= neighbor[1] < self.model.height):
-                continue
-            
-            # Check for walls
-            if not self.has_wall_between_without_closed_door(pos, neighbor):
-                neighbors.append(neighbor)
-            
-        return neighbors
+        return self.model.path_board.neighbors(pos)
 
     def a_star_heuristic(self, a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        return heuristic(a, b)
     
     def validate_target_fire(self):
         # Check if the current target is still a fire
@@ -0,0 +1,280 @@
+"""Streaming statistics over many games, in constant memory.
+
+GameAnalytics is attached to games like a recorder (FireRescueGame(recorder=
+...)) and is fed at the end of every agent turn. It folds every turn into
+fixed-size counters instead of keeping traces, so its memory does not grow
+with the number of games:
+
+- outcomes (victory, too much damage, too many victims lost, unfinished) and a
+  histogram of the rounds it took to win;
+- the damage trajectory: sum and sum of squares of the damage points at the
+  end of every round, up to max_rounds;
+- what set the fire that burned each lost victim (new fire, explosion or
+  flashover, from model.victims_lost_by);
+- the AP utilisation of every agent (AP spent over AP available at the start
+  of its turns) and a histogram of the per-turn utilisation;
+- heatmaps of destroyed walls and doors.
+
+Analytics of different processes are added with merge() and saved to a small
+.npz file:
+
+    python analytics.py --games 100000 --processes 8 --output analytics.npz
+
+    analytics = GameAnalytics()
+    play_game(seed=1, recorder=analytics)
+    analytics.close()
+    analytics.summary()
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game import play_game
+
+OUTCOMES = ('victory', 'damage', 'victims_lost', 'unfinished')
+
+
+class GameAnalytics:
+    """Counters over every game fed to it.
+
+    max_rounds bounds the damage trajectory and the rounds-to-win histogram
+    (longer games go to its last bin), utilisation_bins is the resolution of
+    the AP utilisation histogram.
+    """
+
+    def __init__(self, max_rounds=200, utilisation_bins=10):
+        self.max_rounds = max_rounds
+        self.utilisation_bins = utilisation_bins
+        self.games = 0
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+        self.victims_lost_by = {}
+        self.rounds_to_win = np.zeros(max_rounds + 1, dtype=np.int64)
+        self.damage_sum = np.zeros(max_rounds, dtype=np.float64)
+        self.damage_squares = np.zeros(max_rounds, dtype=np.float64)
+        self.damage_games = np.zeros(max_rounds, dtype=np.int64)
+        self.utilisation = np.zeros(utilisation_bins + 1, dtype=np.int64)
+        # Per agent (in the order of model.agent_list), grown to the largest team seen
+        self.ap_available = np.zeros(0, dtype=np.int64)
+        self.ap_spent = np.zeros(0, dtype=np.int64)
+        # Per cell, created with the first game's board
+        self.walls_destroyed = None
+        self.doors_destroyed = None
+
+        self._model = None
+        self._turn = 0
+        self._previous_ap = []
+
+    def record(self, model):
+        if model is not self._model:
+            self.finish_game()
+            self.start_game(model)
+
+        # The turn that just ended is the one of the agent at currentAgentIndex
+        agent_count = len(model.agent_list)
+        index = model.currentAgentIndex
+        agent = model.agent_list[index]
+        available = min(self._previous_ap[index] + model.config.ap_per_turn, model.config.max_ap)
+        spent = min(max(available - agent.storedAP, 0), available)
+        self._previous_ap[index] = agent.storedAP
+        self.ap_available[index] += available
+        self.ap_spent[index] += spent
+        if available:
+            self.utilisation[int(round(self.utilisation_bins * spent / available))] += 1
+
+        for change in model.changes['walls']:
+            self.walls_destroyed[tuple(change['position'])] += 1
+        for change in model.changes['doors']:
+            if change['new_value'] == 'destroyed':
+                for cell in change['position']:
+                    self.doors_destroyed[tuple(cell)] += 1
+
+        self._turn += 1
+        if index == agent_count - 1:
+            round_index = self._turn // agent_count - 1
+            if round_index < self.max_rounds:
+                self.damage_sum[round_index] += model.damage_points
+                self.damage_squares[round_index] += model.damage_points ** 2
+                self.damage_games[round_index] += 1
+
+        outcome = game_outcome(model)
+        if outcome is not None:
+            self.finish_game(outcome)
+
+    def start_game(self, model):
+        self._model = model
+        self._turn = 0
+        # Games are fed from their first turn, when no agent has AP yet
+        self._previous_ap = [0] * len(model.agent_list)
+        agent_count = len(model.agent_list)
+        if agent_count > len(self.ap_available):
+            padding = agent_count - len(self.ap_available)
+            self.ap_available = np.pad(self.ap_available, (0, padding))
+            self.ap_spent = np.pad(self.ap_spent, (0, padding))
+        shape = (model.width, model.height)
+        if self.walls_destroyed is None:
+            self.walls_destroyed = np.zeros(shape, dtype=np.int64)
+            self.doors_destroyed = np.zeros(shape, dtype=np.int64)
+        elif self.walls_destroyed.shape != shape:
+            raise ValueError(f"Board of {shape} cells, the analytics hold {self.walls_destroyed.shape} heatmaps.")
+
+    def finish_game(self, outcome='unfinished'):
+        """Adds the current game (if any) with its outcome, called at the end of every game."""
+        model = self._model
+        if model is None:
+            return
+        self._model = None
+        self.games += 1
+        self.outcomes[outcome] += 1
+        for cause, count in model.victims_lost_by.items():
+            self.victims_lost_by[cause] = self.victims_lost_by.get(cause, 0) + count
+        if outcome == 'victory':
+            rounds = -(-self._turn // len(model.agent_list))
+            self.rounds_to_win[min(rounds, self.max_rounds)] += 1
+
+    def close(self):
+        self.finish_game()
+
+    def merge(self, other):
+        """Adds the games counted by another GameAnalytics (e.g. from another process)."""
+        other.close()
+        if (other.max_rounds, other.utilisation_bins) != (self.max_rounds, self.utilisation_bins):
+            raise ValueError("Analytics with different max_rounds or utilisation_bins cannot be merged.")
+        self.games += other.games
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+        for cause, count in other.victims_lost_by.items():
+            self.victims_lost_by[cause] = self.victims_lost_by.get(cause, 0) + count
+        for name in ('rounds_to_win', 'damage_sum', 'damage_squares', 'damage_games', 'utilisation'):
+            getattr(self, name)[:] += getattr(other, name)
+        agent_count = max(len(self.ap_available), len(other.ap_available))
+        for name in ('ap_available', 'ap_spent'):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            mine = np.pad(mine, (0, agent_count - len(mine)))
+            setattr(self, name, mine + np.pad(theirs, (0, agent_count - len(theirs))))
+        if other.walls_destroyed is not None:
+            if self.walls_destroyed is None:
+                self.walls_destroyed = other.walls_destroyed.copy()
+                self.doors_destroyed = other.doors_destroyed.copy()
+            elif self.walls_destroyed.shape != other.walls_destroyed.shape:
+                raise ValueError("Analytics of different boards cannot be merged.")
+            else:
+                self.walls_destroyed += other.walls_destroyed
+                self.doors_destroyed += other.doors_destroyed
+        return self
+
+    def summary(self):
+        games = max(self.games, 1)
+        rounds = np.arange(len(self.rounds_to_win))
+        wins = int(self.rounds_to_win.sum())
+        played = np.maximum(self.damage_games, 1)
+        damage_mean = self.damage_sum / played
+        damage_std = np.sqrt(np.maximum(self.damage_squares / played - damage_mean ** 2, 0))
+        last_round = int(np.max(np.nonzero(self.damage_games)[0], initial=-1)) + 1
+        return {
+            'games': self.games,
+            'outcomes': {outcome: count / games for outcome, count in self.outcomes.items()},
+            'mean_rounds_to_win': float((rounds * self.rounds_to_win).sum() / wins) if wins else None,
+            'victims_lost_by': dict(self.victims_lost_by),
+            'damage_mean_by_round': damage_mean[:last_round].round(3).tolist(),
+            'damage_std_by_round': damage_std[:last_round].round(3).tolist(),
+            'ap_utilisation_by_agent': (self.ap_spent / np.maximum(self.ap_available, 1)).round(3).tolist(),
+            'ap_utilisation_histogram': self.utilisation.tolist()
+        }
+
+    def save(self, path):
+        """Writes the counters to a compressed .npz file."""
+        counts = {
+            'games': self.games, 'outcomes': self.outcomes, 'victims_lost_by': self.victims_lost_by,
+            'max_rounds': self.max_rounds, 'utilisation_bins': self.utilisation_bins
+        }
+        arrays = {name: getattr(self, name) for name in
+                  ('rounds_to_win', 'damage_sum', 'damage_squares', 'damage_games', 'utilisation',
+                   'ap_available', 'ap_spent')}
+        if self.walls_destroyed is not None:
+            arrays['walls_destroyed'] = self.walls_destroyed
+            arrays['doors_destroyed'] = self.doors_destroyed
+        np.savez_compressed(path, counts=np.array(json.dumps(counts)), **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            counts = json.loads(str(data['counts']))
+            analytics = cls(counts['max_rounds'], counts['utilisation_bins'])
+            analytics.games = counts['games']
+            analytics.outcomes = counts['outcomes']
+            analytics.victims_lost_by = counts['victims_lost_by']
+            for name in data.files:
+                if name != 'counts':
+                    setattr(analytics, name, data[name])
+        return analytics
+
+
+def game_outcome(model):
+    # Same order as FireRescueGame.check_game_over, without printing
+    config = model.config
+    if model.damage_points >= config.damage_limit:
+        return 'damage'
+    if model.people_lost >= config.lost_limit:
+        return 'victims_lost'
+    if model.people_rescued >= config.rescued_to_win:
+        return 'victory'
+    return None
+
+
+def analyze_seeds(seeds, max_turns, max_rounds, model_kwargs):
+    # One GameAnalytics per task, silencing the model output
+    analytics = GameAnalytics(max_rounds)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for seed in seeds:
+            play_game(seed=seed, max_turns=max_turns, recorder=analytics, **model_kwargs)
+            analytics.finish_game()
+    return analytics
+
+
+def analyze_games(seeds, processes=None, max_turns=10000, max_rounds=200, seeds_per_task=100, **model_kwargs):
+    """Plays the seeds in worker processes and merges their analytics as they finish."""
+    seeds = list(seeds)
+    tasks = [seeds[start:start + seeds_per_task] for start in range(0, len(seeds), seeds_per_task)]
+    analytics = GameAnalytics(max_rounds)
+    if processes == 1:
+        for task in tasks:
+            analytics.merge(analyze_seeds(task, max_turns, max_rounds, model_kwargs))
+        return analytics
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for result in executor.map(analyze_seeds, tasks, itertools.repeat(max_turns), itertools.repeat(max_rounds),
+                                   itertools.repeat(model_kwargs)):
+            analytics.merge(result)
+    return analytics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate game outcomes over many games in constant memory.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--map', default="House1.txt")
+    parser.add_argument('--agents', type=int, default=6)
+    parser.add_argument('--rescuers', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    parser.add_argument('--max-rounds', type=int, default=200)
+    parser.add_argument('--output', help="Write the counters to this .npz file")
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    analytics = analyze_games(seeds, processes=args.processes, max_turns=args.max_turns, max_rounds=args.max_rounds,
+                              map_file=args.map, agents=args.agents, rescuers=args.rescuers)
+    summary = analytics.summary()
+    print(json.dumps({name: summary[name] for name in
+                      ('games', 'outcomes', 'mean_rounds_to_win', 'victims_lost_by', 'ap_utilisation_by_agent')}))
+    if args.output:
+        analytics.save(args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,659 @@
+"""Vectorized engine that plays many games on the same layout in lockstep.
+
+Every board is a slice of stacked NumPy arrays indexed [board, x, y] and each
+call to BatchEngine.step() plays one agent turn on all active boards: the
+agent actions, stun checks, new fire with explosions, flashover of smoke and
+replenishment of points of interest. BatchEngine.run_games() starts a new game
+on every board that finishes so the batch stays full.
+
+The rules follow FireRescueModel, with the settings of a GameConfig (costs,
+action points, end-of-game limits and the points of interest pool). Where the
+sequential model depends on the order it visits cells, the batch engine
+applies the rule until it is stable (a smoke cell next to new fire also
+ignites in the same flashover pass).
+Agents are driven by a batched policy working on BatchObservation arrays,
+the default GreedyBatchPolicy walks down a distance field towards the nearest
+target instead of reserving targets per agent.
+
+    python batch_engine.py --games 10000 --batch-size 2000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from config import GameConfig
+from policy import DIRECTIONS, WALL_BITS, NO_DOOR, DOOR_CLOSED, DOOR_OPEN, DOOR_DESTROYED, build_door_array
+from util import get_game_variables
+
+# Points of interest codes
+NO_POI = 0
+POI_VICTIM = 1
+POI_FALSE_ALARM = 2
+
+SMOKE = 0.5
+FIRE = 1.0
+
+# Settings of the sequential game's pathfinding, the batched policy does not use them
+UNSUPPORTED_SETTINGS = ('pathfinding', 'hazard_weight')
+
+OPPOSITE = [2, 3, 0, 1]
+
+# Distance of cells without a path, small enough that adding two of them fits in int16
+UNREACHABLE = 10000
+# First step marker of the agent's own cell
+AT_AGENT = 4
+
+
+def neighbor_values(array, side, fill):
+    """Value of the neighbour on the given side for every cell of [..., x, y] arrays."""
+    dx, dy = DIRECTIONS[side]
+    shifted = np.full_like(array, fill)
+    width, height = array.shape[-2:]
+    source_x = slice(max(dx, 0), width + min(dx, 0))
+    target_x = slice(max(-dx, 0), width + min(-dx, 0))
+    source_y = slice(max(dy, 0), height + min(dy, 0))
+    target_y = slice(max(-dy, 0), height + min(-dy, 0))
+    shifted[..., target_x, target_y] = array[..., source_x, source_y]
+    return shifted
+
+
+class BatchObservation:
+    """Arrays of a subset of boards, as seen by the agents that are deciding (one per board row)."""
+
+    def __init__(self, engine, agents, boards):
+        self.agents = agents
+        self.boards = boards
+        self.fires = engine.fires[boards]
+        self.points_of_interest = engine.points_of_interest[boards]
+        self.walls = engine.walls[boards]
+        self.doors = engine.doors[boards]
+        self.positions = engine.agent_pos[boards, agents]
+        self.stored_ap = engine.agent_ap[boards, agents]
+        self.has_victim = engine.has_victim[boards, agents]
+        self.is_rescuer = engine.is_rescuer[agents]
+        self.exit_mask = engine.exit_mask
+        self.in_bounds = engine.in_bounds
+
+        # Same rule as has_wall_between_without_closed_door: any door can be crossed
+        wall_bits = np.array(WALL_BITS, dtype=np.uint8)
+        walled = (self.walls[..., None] & wall_bits) != 0
+        self.passable = (~walled | (self.doors != NO_DOOR)) & self.in_bounds
+        self.move_cost = 1 + (self.doors == DOOR_CLOSED) * engine.config.cost_open_door
+
+    def distances_from_agent(self, targets=None):
+        """Cost from the agent to every cell and the first step of a cheapest path to it.
+
+        Returns (distances, first_steps) indexed [row, x, y]; first_steps holds
+        direction indexes and AT_AGENT for the agent's own cell. When targets is
+        given the search stops as soon as the nearest target of every board is
+        settled, so only the cells closer than that target are guaranteed final.
+        """
+        count = len(self.boards)
+        width, height = self.fires.shape[1:]
+        rows = np.arange(count)
+        x = self.positions[:, 0]
+        y = self.positions[:, 1]
+
+        # All boards are laid out in one flat buffer with an unreachable border around each
+        # of them, so the neighbour in any direction is a contiguous slice at a fixed offset
+        stride = height + 2
+        board_size = (width + 2) * stride
+        size = count * board_size
+        offsets = [dx * stride + dy for dx, dy in DIRECTIONS]
+
+        def flat_index(board_rows, cell_x, cell_y):
+            return board_rows * board_size + (cell_x + 1) * stride + (cell_y + 1)
+
+        distances = np.full(size, UNREACHABLE, dtype=np.int16)
+        first_steps = np.full(size, -1, dtype=np.int8)
+        origin = flat_index(rows, x, y)
+        distances[origin] = 0
+        first_steps[origin] = AT_AGENT
+
+        costs = np.full((count, width + 2, height + 2, 4), UNREACHABLE, dtype=np.int16)
+        costs[:, 1:-1, 1:-1] = np.where(self.passable, self.move_cost, UNREACHABLE)
+        costs = costs.reshape(size, 4)
+
+        # A direct move is always the cheapest way to a neighbour (any detour takes three moves),
+        # so the neighbours are settled here and later rounds only copy their first steps along
+        for side, offset in enumerate(offsets):
+            valid = self.passable[rows, x, y, side]
+            distances[origin[valid] + offset] = costs[origin[valid], side]
+            first_steps[origin[valid] + offset] = side
+
+        margin = stride + 1
+        span = slice(margin, size - margin)
+        incoming = []
+        for side, offset in enumerate(offsets):
+            # Cost of arriving at a cell by a move in this direction, from the cell behind it
+            arriving = np.ascontiguousarray(costs[margin - offset:size - margin - offset, side])
+            source = slice(margin - offset, size - margin - offset)
+            incoming.append((distances[source], first_steps[source], arriving))
+
+        current = distances[span]
+        current_steps = first_steps[span]
+        candidate = np.empty_like(current)
+        better = np.empty(current.shape, dtype=bool)
+        previous = np.empty_like(current)
+        flat_targets = None
+        if targets is not None:
+            flat_targets = np.zeros((count, width + 2, height + 2), dtype=bool)
+            flat_targets[:, 1:-1, 1:-1] = targets
+            flat_targets = flat_targets.reshape(count, board_size)
+
+        for round_number in range(1, width * height + 1):
+            previous[...] = current
+            for source_distances, source_steps, arriving in incoming:
+                np.add(source_distances, arriving, out=candidate)
+                np.less(candidate, current, out=better)
+                np.copyto(current, candidate, where=better)
+                np.copyto(current_steps, source_steps, where=better)
+
+            # After n rounds every cell at distance n or less is settled
+            if flat_targets is not None:
+                settled = distances.reshape(count, board_size) <= round_number
+                if (settled & flat_targets).any(axis=1).all():
+                    break
+            if np.array_equal(previous, current):
+                break
+
+        distances = distances.reshape(count, width + 2, height + 2)[:, 1:-1, 1:-1]
+        first_steps = first_steps.reshape(count, width + 2, height + 2)[:, 1:-1, 1:-1]
+        return distances, first_steps
+
+    def step_towards_nearest(self, targets):
+        """Direction index of the first step towards the nearest target, -1 to stay."""
+        distances, first_steps = self.distances_from_agent(targets)
+        count = len(self.boards)
+        flat_distances = np.where(targets, distances, UNREACHABLE).reshape(count, -1)
+        nearest = np.argmin(flat_distances, axis=1)
+
+        rows = np.arange(count)
+        directions = first_steps.reshape(count, -1)[rows, nearest].astype(np.int64)
+        directions[(flat_distances[rows, nearest] >= UNREACHABLE) | (directions == AT_AGENT)] = -1
+        return directions
+
+
+class GreedyBatchPolicy:
+    # Rescuers walk to the nearest point of interest (or exit when carrying), the rest to the nearest fire or smoke
+
+    def move_directions(self, observation):
+        rescuer_targets = np.where(
+            observation.has_victim[:, None, None],
+            observation.exit_mask[None],
+            observation.points_of_interest != NO_POI)
+
+        fire_targets = observation.fires == FIRE
+        no_fire = ~fire_targets.any(axis=(1, 2))
+        fire_targets[no_fire] = observation.fires[no_fire] == SMOKE
+
+        targets = np.where(observation.is_rescuer[:, None, None], rescuer_targets, fire_targets)
+        return observation.step_towards_nearest(targets)
+
+
+class BatchEngine:
+    def __init__(self, batch_size, map_file="House1.txt", agents=6, rescuers=1, seed=None, policy=None, config=None):
+        # Like FireRescueGame, a config sets every rule, including the team and the map
+        if config is None:
+            config = GameConfig(agents=agents, rescuers=rescuers, map_file=map_file)
+        unsupported = {name: value for name, value in config.changes().items() if name in UNSUPPORTED_SETTINGS}
+        if unsupported:
+            raise ValueError(f"The batch engine only walks distance fields, it cannot play with {unsupported}.")
+        self.config = config
+        agents = config.agents
+        rescuers = config.rescuers
+        walls, _, points_of_interest, fires, doors, entry_points, total_victims, total_false_alarms = \
+            get_game_variables(config.map_file)
+        width, height = walls.shape
+        self.batch_size = batch_size
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.policy = policy if policy is not None else GreedyBatchPolicy()
+
+        # Starting layout every board is reset to
+        self.initial_walls = walls.astype(np.uint8)
+        self.initial_doors = build_door_array(doors, width, height)
+        self.initial_fires = np.zeros((width, height), dtype=np.float32)
+        for fire in fires:
+            self.initial_fires[fire['x'], fire['y']] = FIRE
+        self.initial_points_of_interest = np.zeros((width, height), dtype=np.int8)
+        for poi in points_of_interest:
+            code = POI_VICTIM if poi['type'] == 'v' else POI_FALSE_ALARM
+            self.initial_points_of_interest[poi['x'], poi['y']] = code
+        self.initial_victims_left = config.max_victims - total_victims
+        self.initial_false_alarms_left = config.max_false_alarms - total_false_alarms
+
+        self.exits = np.array(entry_points)
+        self.exit_mask = np.zeros((width, height), dtype=bool)
+        self.exit_mask[self.exits[:, 0], self.exits[:, 1]] = True
+
+        self.in_bounds = np.ones((width, height, 4), dtype=bool)
+        self.in_bounds[:, 0, 0] = False
+        self.in_bounds[0, :, 1] = False
+        self.in_bounds[:, height - 1, 2] = False
+        self.in_bounds[width - 1, :, 3] = False
+
+        self.walls = np.empty((batch_size, width, height), dtype=np.uint8)
+        self.damage = np.empty((batch_size, width, height, 4), dtype=np.int8)
+        self.doors = np.empty((batch_size, width, height, 4), dtype=np.int8)
+        self.fires = np.empty((batch_size, width, height), dtype=np.float32)
+        self.points_of_interest = np.empty((batch_size, width, height), dtype=np.int8)
+
+        self.agent_pos = np.empty((batch_size, agents, 2), dtype=np.int64)
+        self.agent_ap = np.empty((batch_size, agents), dtype=np.int64)
+        self.has_victim = np.empty((batch_size, agents), dtype=bool)
+        self.is_rescuer = np.arange(agents) < rescuers
+        self.current_agent = np.empty(batch_size, dtype=np.int64)
+
+        self.damage_points = np.empty(batch_size, dtype=np.int64)
+        self.people_lost = np.empty(batch_size, dtype=np.int64)
+        self.people_rescued = np.empty(batch_size, dtype=np.int64)
+        self.victims_left = np.empty(batch_size, dtype=np.int64)
+        self.false_alarms_left = np.empty(batch_size, dtype=np.int64)
+        self.turns = np.empty(batch_size, dtype=np.int64)
+        self.active = np.zeros(batch_size, dtype=bool)
+
+        self.reset_boards(np.arange(batch_size))
+
+    def reset_boards(self, boards):
+        """Starts a new game on the given boards."""
+        self.walls[boards] = self.initial_walls
+        self.damage[boards] = 0
+        self.doors[boards] = self.initial_doors
+        self.fires[boards] = self.initial_fires
+        self.points_of_interest[boards] = self.initial_points_of_interest
+
+        placement = self.rng.integers(0, len(self.exits), size=(len(boards), self.agent_pos.shape[1]))
+        self.agent_pos[boards] = self.exits[placement]
+        self.agent_ap[boards] = 0
+        self.has_victim[boards] = False
+        self.current_agent[boards] = 0
+
+        self.damage_points[boards] = 0
+        self.people_lost[boards] = 0
+        self.people_rescued[boards] = 0
+        self.victims_left[boards] = self.initial_victims_left
+        self.false_alarms_left[boards] = self.initial_false_alarms_left
+        self.turns[boards] = 0
+        self.active[boards] = True
+
+    def observe(self, agents, boards):
+        return BatchObservation(self, agents, boards)
+
+    def game_over(self):
+        config = self.config
+        return ((self.damage_points >= config.damage_limit) | (self.people_lost >= config.lost_limit)
+                | (self.people_rescued >= config.rescued_to_win))
+
+    def step(self):
+        """Plays the turn of the current agent on every active board, returns how many boards played."""
+        boards = np.nonzero(self.active)[0]
+        if len(boards) == 0:
+            return 0
+
+        self.agent_turn(boards)
+        self.check_stun(boards)
+        self.assign_fire(boards)
+        self.check_smoke(boards)
+        self.replenish_points_of_interest(boards)
+
+        self.turns[boards] += 1
+        self.current_agent[boards] = (self.current_agent[boards] + 1) % self.agent_pos.shape[1]
+        return len(boards)
+
+    def run_games(self, games=None, max_turns=10000):
+        """Plays games on a fresh engine, starting a new game on every board that finishes.
+
+        Keeping the batch full means a few long games do not leave most of the
+        batch idle. Games still running after max_turns count as losses.
+        Returns arrays with one entry per game in the order they finished.
+        """
+        if games is None:
+            games = self.batch_size
+        started = min(games, self.batch_size)
+        self.active[started:] = False
+
+        results = {key: [] for key in ('victory', 'turns', 'people_rescued', 'people_lost', 'damage_points', 'timed_out')}
+        while True:
+            timed_out = self.turns >= max_turns
+            done = np.nonzero(self.active & (self.game_over() | timed_out))[0]
+            if len(done):
+                results['victory'].append(self.people_rescued[done] >= self.config.rescued_to_win)
+                results['turns'].append(self.turns[done].copy())
+                results['people_rescued'].append(self.people_rescued[done].copy())
+                results['people_lost'].append(self.people_lost[done].copy())
+                results['damage_points'].append(self.damage_points[done].copy())
+                results['timed_out'].append(timed_out[done] & ~self.game_over()[done])
+                self.active[done] = False
+
+                refill = done[:games - started]
+                if len(refill):
+                    self.reset_boards(refill)
+                    started += len(refill)
+
+            if self.step() == 0:
+                break
+
+        return {key: np.concatenate(values) if values else np.array([]) for key, values in results.items()}
+
+    # Board updates shared by the rules, boards/x/y are index arrays without repeated boards
+
+    def set_fire(self, boards, x, y):
+        # Fire kills victims and burns false alarms in the cell
+        poi = self.points_of_interest[boards, x, y]
+        self.people_lost[boards] += poi == POI_VICTIM
+        self.points_of_interest[boards, x, y] = NO_POI
+        self.fires[boards, x, y] = FIRE
+
+    def damage_wall(self, boards, x, y, side, apply_damage):
+        current = self.damage[boards, x, y, side]
+        damaged = current < 2
+        self.damage[boards, x, y, side] = current + damaged
+        if apply_damage:
+            self.damage_points[boards] += damaged
+
+        destroyed = self.damage[boards, x, y, side] == 2
+        bit = np.uint8(WALL_BITS[side])
+        self.walls[boards[destroyed], x[destroyed], y[destroyed]] &= ~bit
+
+    def set_door(self, boards, x, y, side, state):
+        dx, dy = DIRECTIONS[side]
+        self.doors[boards, x, y, side] = state
+        self.doors[boards, x + dx, y + dy, OPPOSITE[side]] = state
+
+    # Agents
+
+    def agent_turn(self, boards):
+        config = self.config
+        agents = self.current_agent[boards]
+        self.agent_ap[boards, agents] = np.minimum(self.agent_ap[boards, agents] + config.ap_per_turn, config.max_ap)
+
+        # Main loop: every board keeps acting until its agent falls below min_ap_to_act or has nothing to do
+        for _ in range(4 * config.max_ap):
+            acting = self.agent_ap[boards, agents] >= config.min_ap_to_act
+            boards = boards[acting]
+            agents = agents[acting]
+            if len(boards) == 0:
+                break
+
+            performed = self.extinguish_around(boards, agents)
+
+            rescuing = ~performed & self.is_rescuer[agents]
+            if rescuing.any():
+                performed[rescuing] = self.rescue(boards[rescuing], agents[rescuing])
+
+            deciding = ~performed
+            if deciding.any():
+                directions = self.policy.move_directions(self.observe(agents[deciding], boards[deciding]))
+                performed[deciding] = self.move(boards[deciding], agents[deciding], directions)
+
+            boards = boards[performed]
+            agents = agents[performed]
+
+    def extinguish_around(self, boards, agents, after_move=False):
+        """Extinguishes the agent's cell and its reachable neighbours, returns which boards acted.
+
+        At the start of an action smoke in the agent's own cell is the whole action,
+        like in FireRescueAgent.step. After a move every cell is checked with the
+        AP that is left, like FireRescueAgent.check_and_extinguish.
+        """
+        config = self.config
+        ap = self.agent_ap[boards, agents]
+        x = self.agent_pos[boards, agents, 0]
+        y = self.agent_pos[boards, agents, 1]
+
+        value = self.fires[boards, x, y]
+        own_smoke = value == SMOKE
+        own_fire = after_move & (value == FIRE) & (ap >= config.cost_extinguish_fire)
+        own = own_smoke | own_fire
+        self.fires[boards[own], x[own], y[own]] = 0
+        ap -= own_smoke * config.cost_extinguish_smoke + own_fire * config.cost_extinguish_fire
+
+        performed = own.copy()
+        checking = np.ones(len(boards), dtype=bool) if after_move else ~own_smoke
+
+        # Fire and smoke in reachable neighbours, a closed door blocks
+        for side, (dx, dy) in enumerate(DIRECTIONS):
+            inside = checking & self.in_bounds[x, y, side]
+            door = self.doors[boards, x, y, side]
+            walled = (self.walls[boards, x, y] & WALL_BITS[side]) != 0
+            reachable = inside & ((door == DOOR_OPEN) | (door == DOOR_DESTROYED) | ((door == NO_DOOR) & ~walled))
+
+            nx = np.clip(x + dx, 0, self.width - 1)
+            ny = np.clip(y + dy, 0, self.height - 1)
+            value = self.fires[boards, nx, ny]
+            fire = reachable & (value == FIRE) & (ap >= config.cost_extinguish_fire)
+            smoke = reachable & (value == SMOKE) & (ap >= config.cost_extinguish_smoke)
+            done = fire | smoke
+
+            self.fires[boards[done], nx[done], ny[done]] = 0
+            ap -= fire * config.cost_extinguish_fire + smoke * config.cost_extinguish_smoke
+            performed |= done
+
+        self.agent_ap[boards, agents] = ap
+        return performed
+
+    def rescue(self, boards, agents):
+        x = self.agent_pos[boards, agents, 0]
+        y = self.agent_pos[boards, agents, 1]
+        carrying = self.has_victim[boards, agents]
+        poi = self.points_of_interest[boards, x, y]
+
+        drop = carrying & self.exit_mask[x, y]
+        self.has_victim[boards[drop], agents[drop]] = False
+        self.people_rescued[boards[drop]] += 1
+
+        pick_up = ~carrying & (poi == POI_VICTIM)
+        self.has_victim[boards[pick_up], agents[pick_up]] = True
+
+        reveal = ~carrying & (poi != NO_POI)
+        self.points_of_interest[boards[reveal], x[reveal], y[reveal]] = NO_POI
+        return drop | reveal
+
+    def move(self, boards, agents, directions):
+        config = self.config
+        performed = np.zeros(len(boards), dtype=bool)
+        moving = directions >= 0
+        boards = boards[moving]
+        agents = agents[moving]
+        sides = directions[moving]
+        if len(boards) == 0:
+            return performed
+
+        ap = self.agent_ap[boards, agents]
+        x = self.agent_pos[boards, agents, 0]
+        y = self.agent_pos[boards, agents, 1]
+        offsets = np.array(DIRECTIONS)[sides]
+        nx = x + offsets[:, 0]
+        ny = y + offsets[:, 1]
+
+        # Fire in the next cell is extinguished before moving into it
+        burning = (self.fires[boards, nx, ny] == FIRE) & (ap >= config.cost_extinguish_fire)
+        self.fires[boards[burning], nx[burning], ny[burning]] = 0
+        ap -= burning * config.cost_extinguish_fire
+
+        closed = self.doors[boards, x, y, sides] == DOOR_CLOSED
+        move_cost = np.where(self.has_victim[boards, agents], config.cost_move_with_victim, config.cost_move)
+        total_cost = move_cost + closed * config.cost_open_door
+        can_move = ap >= total_cost
+
+        opening = can_move & closed
+        for side in range(4):
+            selected = opening & (sides == side)
+            self.set_door(boards[selected], x[selected], y[selected], side, DOOR_OPEN)
+
+        ap -= can_move * total_cost
+        self.agent_ap[boards, agents] = ap
+        self.agent_pos[boards[can_move], agents[can_move], 0] = nx[can_move]
+        self.agent_pos[boards[can_move], agents[can_move], 1] = ny[can_move]
+        self.extinguish_around(boards[can_move], agents[can_move], after_move=True)
+
+        # Extinguishing counts as an action even when there is no AP left to move
+        performed[moving] = can_move | burning
+        return performed
+
+    def check_stun(self, boards):
+        config = self.config
+        x = self.agent_pos[boards, :, 0]
+        y = self.agent_pos[boards, :, 1]
+        stunned = self.fires[boards[:, None], x, y] == FIRE
+        if not stunned.any():
+            return
+
+        rows, agents = np.nonzero(stunned)
+        boards = boards[rows]
+
+        # Cost from each stunned agent to every exit
+        distances, _ = self.observe(agents, boards).distances_from_agent()
+        exit_costs = distances[:, self.exits[:, 0], self.exits[:, 1]].astype(np.float64)
+        exit_costs[exit_costs >= UNREACHABLE] = np.inf
+
+        # An exit on fire is only acceptable when there is AP to extinguish it
+        exit_on_fire = self.fires[boards[:, None], self.exits[:, 0], self.exits[:, 1]] == FIRE
+        enough_ap = self.agent_ap[boards, agents] >= config.cost_extinguish_fire
+        exit_costs[exit_on_fire & ~enough_ap[:, None]] = np.inf
+
+        chosen = np.argmin(exit_costs, axis=1)
+        escapes = np.isfinite(exit_costs[np.arange(len(boards)), chosen])
+        boards = boards[escapes]
+        agents = agents[escapes]
+        chosen = chosen[escapes]
+
+        self.agent_pos[boards, agents] = self.exits[chosen]
+        on_fire = exit_on_fire[escapes, chosen]
+        self.fires[boards[on_fire], self.exits[chosen[on_fire], 0], self.exits[chosen[on_fire], 1]] = 0
+        self.agent_ap[boards[on_fire], agents[on_fire]] -= config.cost_extinguish_fire
+
+    # Fire
+
+    def assign_fire(self, boards):
+        x = self.rng.integers(1, self.width - 1, size=len(boards))
+        y = self.rng.integers(1, self.height - 1, size=len(boards))
+        value = self.fires[boards, x, y]
+
+        exploding = value == FIRE
+        to_fire = value == SMOKE
+        to_smoke = value == 0
+
+        self.set_fire(boards[to_fire], x[to_fire], y[to_fire])
+        self.fires[boards[to_smoke], x[to_smoke], y[to_smoke]] = SMOKE
+        self.explosion(boards[exploding], x[exploding], y[exploding])
+
+    def explosion(self, boards, x, y):
+        if len(boards) == 0:
+            return
+
+        for side, (dx, dy) in enumerate(DIRECTIONS):
+            current_boards = boards
+            cx = x
+            cy = y
+            # The shockwave travels through burning cells until it hits a wall, a door or a cell without fire
+            while len(current_boards):
+                inside = self.in_bounds[cx, cy, side]
+                current_boards, cx, cy = current_boards[inside], cx[inside], cy[inside]
+
+                nx = cx + dx
+                ny = cy + dy
+                walled = (self.walls[current_boards, cx, cy] & WALL_BITS[side]) != 0
+                door = self.doors[current_boards, cx, cy, side]
+
+                passes = ~walled | (door == DOOR_OPEN) | (door == DOOR_DESTROYED)
+                closed_door = walled & (door == DOOR_CLOSED)
+                wall = walled & (door == NO_DOOR)
+
+                self.set_door(current_boards[closed_door], cx[closed_door], cy[closed_door], side, DOOR_DESTROYED)
+
+                self.damage_wall(current_boards[wall], cx[wall], cy[wall], side, True)
+                self.damage_wall(current_boards[wall], nx[wall], ny[wall], OPPOSITE[side], False)
+
+                burning = passes & (self.fires[current_boards, nx, ny] == FIRE)
+                ignite = passes & ~burning
+                self.set_fire(current_boards[ignite], nx[ignite], ny[ignite])
+
+                current_boards, cx, cy = current_boards[burning], nx[burning], ny[burning]
+
+    def check_smoke(self, boards):
+        # Smoke next to fire without a wall or through an open door becomes fire, until nothing changes
+        fires = self.fires[boards]
+        wall_bits = np.array(WALL_BITS, dtype=np.uint8)
+        spreads = ((self.walls[boards][..., None] & wall_bits) == 0) | (self.doors[boards] == DOOR_OPEN)
+        spreads &= self.in_bounds
+
+        changed = False
+        while True:
+            burning = fires == FIRE
+            reached = np.zeros_like(burning)
+            for side in range(4):
+                reached |= spreads[..., side] & neighbor_values(burning, side, False)
+
+            igniting = reached & (fires == SMOKE)
+            if not igniting.any():
+                break
+            rows, x, y = np.nonzero(igniting)
+            fires[rows, x, y] = FIRE
+            # A board can have several igniting cells, count the victims per cell
+            np.add.at(self.people_lost, boards[rows], self.points_of_interest[boards[rows], x, y] == POI_VICTIM)
+            self.points_of_interest[boards[rows], x, y] = NO_POI
+            changed = True
+
+        if changed:
+            self.fires[boards] = fires
+
+    def replenish_points_of_interest(self, boards):
+        on_board = np.count_nonzero(self.points_of_interest[boards], axis=(1, 2)) + self.has_victim[boards].sum(axis=1)
+        victims = self.victims_left[boards] > 0
+        false_alarms = self.false_alarms_left[boards] > 0
+        needed = (on_board < self.config.min_points_of_interest) & (victims | false_alarms)
+        if not needed.any():
+            return
+
+        boards = boards[needed]
+        victims = victims[needed]
+        false_alarms = false_alarms[needed]
+        choice = self.rng.random(len(boards))
+        x = self.rng.integers(1, self.width - 1, size=len(boards))
+        y = self.rng.integers(1, self.height - 1, size=len(boards))
+
+        # Same as random.choice over the kinds that are left
+        is_victim = victims & (~false_alarms | (choice >= 0.5))
+        self.points_of_interest[boards, x, y] = np.where(is_victim, POI_VICTIM, POI_FALSE_ALARM)
+        self.victims_left[boards[is_victim]] -= 1
+        self.false_alarms_left[boards[~is_victim]] -= 1
+
+        burning = self.fires[boards, x, y] == FIRE
+        self.fires[boards[burning], x[burning], y[burning]] = 0
+
+
+def run_batches(games, batch_size=1000, map_file="House1.txt", seed=None, max_turns=10000, **engine_kwargs):
+    engine = BatchEngine(min(batch_size, games), map_file=map_file, seed=seed, **engine_kwargs)
+    results = engine.run_games(games, max_turns)
+    return {
+        'games': len(results['victory']),
+        'victories': int(results['victory'].sum()),
+        'win_rate': float(results['victory'].mean()),
+        'mean_turns': float(results['turns'].mean()),
+        'timed_out': int(results['timed_out'].sum())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play many games in lockstep with the vectorized engine.")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--map', default="House1.txt")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    totals = run_batches(args.games, args.batch_size, args.map, args.seed, args.max_turns)
+    elapsed = time.perf_counter() - start
+
+    print(f"Games: {totals['games']}, win rate {totals['win_rate']:.3f}, mean turns {totals['mean_turns']:.1f}")
+    print(f"{totals['games'] / elapsed:.0f} games/sec ({totals['games'] / elapsed * 60:.0f} games/min)")
+
+
+if __name__ == '__main__':
+    main()
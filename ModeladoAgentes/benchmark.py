@@ -0,0 +1,299 @@
+"""Reproducible benchmark suite for the Fire Rescue simulation.
+
+Runs full games on fixed seeds and fixed maps (including scaled-up copies of
+the classic house) and reports throughput plus latency percentiles of the main
+subsystems. Results are written as JSON so they can be compared across commits:
+
+    python benchmark.py --games 20 --output bench.json
+    python benchmark.py --games 20 --compare bench.json
+"""
+import argparse
+import contextlib
+import functools
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.client import HTTPConnection
+from http.server import HTTPServer
+
+import numpy as np
+
+from agent import FireRescueAgent
+from game import FireRescueGame, play_game
+from util import tile_layout
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fixed layouts, the scaled ones are generated from the classic house
+MAPS = {
+    'House1': 'House1.txt',
+    'BeachHouse': 'BeachHouse.txt',
+    'FuegoConcentrado': 'FuegoConcentrado.txt'
+}
+
+SCALED_MAPS = {
+    'House1_2x2': ('House1.txt', 2, 2),
+    'House1_3x3': ('House1.txt', 3, 3)
+}
+
+# Modules whose import time is measured in a fresh interpreter
+STARTUP_MODULES = ['game', 'model', 'server', 'evaluation', 'batch_engine']
+
+# Functions timed on every call during the latency pass
+TIMED_FUNCTIONS = {
+    'a_star': (FireRescueAgent, 'a_star'),
+    'a_star_search': (FireRescueAgent, 'a_star_search'),
+    'check_smoke': (FireRescueGame, 'check_smoke'),
+    'explosion': (FireRescueGame, 'explosion'),
+    'step_one_agent': (FireRescueGame, 'step_one_agent')
+}
+
+
+def _timed(function, samples):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            samples.append(time.perf_counter() - start)
+    return wrapper
+
+
+@contextlib.contextmanager
+def timed_methods(targets):
+    # Temporarily replaces the methods with timed versions, yields the samples per name
+    samples = {name: [] for name in targets}
+    originals = []
+    for name, (cls, attribute) in targets.items():
+        original = cls.__dict__[attribute]
+        originals.append((cls, attribute, original))
+        setattr(cls, attribute, _timed(original, samples[name]))
+    try:
+        yield samples
+    finally:
+        for cls, attribute, original in originals:
+            setattr(cls, attribute, original)
+
+
+def summarize_latencies(samples):
+    if not samples:
+        return {'calls': 0, 'mean_us': None, 'p50_us': None, 'p99_us': None}
+
+    values = np.array(samples) * 1e6
+    return {
+        'calls': len(samples),
+        'mean_us': float(values.mean()),
+        'p50_us': float(np.percentile(values, 50)),
+        'p99_us': float(np.percentile(values, 99))
+    }
+
+
+@contextlib.contextmanager
+def quiet():
+    # The model prints every action, keep the terminal out of the measurements
+    with open(os.devnull, 'w') as devnull:
+        with contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+            yield
+
+
+def resolve_maps(names, include_scaled, directory):
+    maps = {}
+    for name in names:
+        maps[name] = os.path.join(BASE_DIR, MAPS[name])
+
+    if include_scaled:
+        for name, (archivo, tiles_x, tiles_y) in SCALED_MAPS.items():
+            path = os.path.join(directory, f"{name}.txt")
+            with open(path, 'w') as file:
+                file.write(tile_layout(os.path.join(BASE_DIR, archivo), tiles_x, tiles_y))
+            maps[name] = path
+    return maps
+
+
+def benchmark_map(map_file, seeds, max_turns):
+    # Throughput pass without any instrumentation
+    results = []
+    start = time.perf_counter()
+    with quiet():
+        for seed in seeds:
+            results.append(play_game(seed=seed, max_turns=max_turns, map_file=map_file))
+    elapsed = time.perf_counter() - start
+
+    total_turns = sum(result['turns'] for result in results)
+
+    # Latency pass on the same games with the timed methods
+    with timed_methods(TIMED_FUNCTIONS) as samples, quiet():
+        for seed in seeds:
+            play_game(seed=seed, max_turns=max_turns, map_file=map_file)
+
+    return {
+        'games': len(results),
+        'elapsed_s': elapsed,
+        'games_per_sec': len(results) / elapsed,
+        'turns_per_sec': total_turns / elapsed,
+        'mean_turns': total_turns / len(results),
+        'victories': sum(1 for result in results if result['victory']),
+        'latency': {name: summarize_latencies(values) for name, values in samples.items()}
+    }
+
+
+def benchmark_server(seed, requests, map_file):
+    import server
+    server.set_model(FireRescueGame(seed=seed, map_file=map_file))
+    httpd = HTTPServer(('127.0.0.1', 0), server.Server)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+
+    round_trips = []
+    handler_targets = {'do_POST': (server.Server, 'do_POST')}
+    try:
+        with timed_methods(handler_targets) as samples, quiet():
+            connection = HTTPConnection('127.0.0.1', httpd.server_address[1])
+            for _ in range(requests):
+                start = time.perf_counter()
+                connection.request('POST', '/', body=b'{}')
+                response = connection.getresponse()
+                data = json.loads(response.read())
+                round_trips.append(time.perf_counter() - start)
+                if data.get('simulation_finished'):
+                    break
+            connection.close()
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    return {
+        'requests': len(round_trips),
+        'requests_per_sec': len(round_trips) / sum(round_trips),
+        'latency': {
+            'request_handler': summarize_latencies(samples['do_POST']),
+            'round_trip': summarize_latencies(round_trips)
+        }
+    }
+
+
+def benchmark_startup(runs):
+    # Best of several fresh interpreters, so only the imports of the module are measured
+    code = "import sys, time; start = time.perf_counter(); import {}; print(time.perf_counter() - start)"
+    results = {}
+    for module in STARTUP_MODULES:
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run(
+                [sys.executable, '-c', code.format(module)], cwd=BASE_DIR,
+                capture_output=True, text=True, check=True).stdout
+            samples.append(float(output.split()[-1]))
+        results[module] = {'import_ms': min(samples) * 1e3}
+    return results
+
+
+def get_metadata(seeds):
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=BASE_DIR,
+            capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    try:
+        import mesa
+        mesa_version = mesa.__version__
+    except ImportError:
+        mesa_version = None
+
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'mesa': mesa_version,
+        'platform': platform.platform(),
+        'seeds': list(seeds)
+    }
+
+
+def compare_reports(previous, current):
+    # Prints the speedup of every throughput metric and p50 latency against a previous run
+    print(f"Comparing against commit {previous['meta'].get('commit')}")
+    for name, result in current['maps'].items():
+        if name not in previous['maps']:
+            continue
+        old = previous['maps'][name]
+        print(f"[{name}] games/sec x{result['games_per_sec'] / old['games_per_sec']:.2f}, "
+              f"turns/sec x{result['turns_per_sec'] / old['turns_per_sec']:.2f}")
+        for function, latency in result['latency'].items():
+            old_latency = old['latency'].get(function)
+            if latency['p50_us'] and old_latency and old_latency['p50_us']:
+                print(f"    {function}: p50 x{old_latency['p50_us'] / latency['p50_us']:.2f} faster")
+
+    for module, startup in current.get('startup', {}).items():
+        old_startup = previous.get('startup', {}).get(module)
+        if old_startup:
+            print(f"[startup] import {module}: {old_startup['import_ms']:.0f} ms -> {startup['import_ms']:.0f} ms")
+
+    if 'server' in current and 'server' in previous:
+        ratio = current['server']['requests_per_sec'] / previous['server']['requests_per_sec']
+        print(f"[server] requests/sec x{ratio:.2f}")
+
+
+def run_benchmarks(games=10, first_seed=0, maps=None, include_scaled=True, max_turns=10000, server_requests=200,
+                   startup_runs=3):
+    seeds = range(first_seed, first_seed + games)
+    report = {'meta': get_metadata(seeds), 'maps': {}}
+
+    if startup_runs > 0:
+        report['startup'] = benchmark_startup(startup_runs)
+        for module, startup in report['startup'].items():
+            print(f"[startup] import {module}: {startup['import_ms']:.0f} ms", file=sys.stderr)
+
+    with tempfile.TemporaryDirectory() as directory:
+        map_files = resolve_maps(maps or list(MAPS), include_scaled, directory)
+        for name, map_file in map_files.items():
+            report['maps'][name] = benchmark_map(map_file, seeds, max_turns)
+            print(f"[{name}] {report['maps'][name]['games_per_sec']:.2f} games/sec, "
+                  f"{report['maps'][name]['turns_per_sec']:.1f} turns/sec", file=sys.stderr)
+
+    if server_requests > 0:
+        report['server'] = benchmark_server(first_seed, server_requests, os.path.join(BASE_DIR, MAPS['House1']))
+        print(f"[server] {report['server']['requests_per_sec']:.1f} requests/sec", file=sys.stderr)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Fire Rescue simulation.")
+    parser.add_argument('--games', type=int, default=10, help="Games per map (one fixed seed each)")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--maps', nargs='+', choices=list(MAPS), default=list(MAPS))
+    parser.add_argument('--no-scaled', action='store_true', help="Skip the scaled-up layouts")
+    parser.add_argument('--max-turns', type=int, default=10000)
+    parser.add_argument('--server-requests', type=int, default=200, help="0 skips the server benchmark")
+    parser.add_argument('--startup-runs', type=int, default=3, help="Fresh interpreters per module import, 0 skips")
+    parser.add_argument('--output', help="Write the JSON report to this file instead of stdout")
+    parser.add_argument('--compare', help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    report = run_benchmarks(
+        games=args.games, first_seed=args.first_seed, maps=args.maps,
+        include_scaled=not args.no_scaled, max_turns=args.max_turns,
+        server_requests=args.server_requests, startup_runs=args.startup_runs)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.compare:
+        with open(args.compare) as file:
+            compare_reports(json.load(file), report)
+
+
+if __name__ == '__main__':
+    main()
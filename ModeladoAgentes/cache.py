@@ -0,0 +1,64 @@
+"""Bounded cache of agent decisions.
+
+Target selection (nearest exit, nearest point of interest, closest untargeted
+fire or smoke) only depends on where the agent stands and on the board, yet it
+runs A* to every candidate on every pass of the action loop. The model keeps
+one DecisionCache shared by its agents, with keys made of the query, the
+agent's cell and the Zobrist hashes (zobrist.py) of the parts of the board the
+query reads: walls and doors for paths and exits, plus the points of interest
+or the fires for the other targets. A change to one of them changes the key,
+so stale entries are never read again and age out of the cache.
+
+    cache = DecisionCache(capacity=4096)
+    target = cache.get_or_compute(('nearest_poi', pos, topology, points_of_interest), search)
+"""
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class DecisionCache:
+    # Least recently used entries are evicted beyond capacity
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, MISSING)
+        if value is MISSING:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'capacity': self.capacity,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,96 @@
+"""Rules and team settings of a game.
+
+GameConfig holds the values that used to be hard-coded in the model and the
+agents (team size, action points, action costs, end-of-game thresholds and
+the points of interest pool). FireRescueGame(config=...) plays with them;
+without a config the classic rules are used.
+
+    config = GameConfig(agents=5, rescuers=2, max_ap=10)
+    play_game(seed=1, config=config)
+"""
+import hashlib
+import json
+
+DEFAULTS = {
+    'map_file': "House1.txt",
+    'agents': 6,
+    'rescuers': 1,
+    # Action points
+    'ap_per_turn': 4,            # Action points gained per turn
+    'max_ap': 8,                 # Maximum action points that can be stored
+    'min_ap_to_act': 4,          # An agent keeps acting while it has at least this many AP
+    # Action costs
+    'cost_move': 1,
+    'cost_move_with_victim': 2,
+    'cost_extinguish_smoke': 1,
+    'cost_extinguish_fire': 2,
+    'cost_damage_wall': 2,
+    'cost_open_door': 1,
+    # Pathfinding: 'doors' only adds the cost of opening closed doors, 'hazard' also
+    # adds the cost of extinguishing fire and smoke on the way and hazard_weight for
+    # every burning neighbour of a cell (see hazard.py)
+    'pathfinding': 'doors',
+    'hazard_weight': 0,
+    # End of the game
+    'damage_limit': 24,          # Structural damage that collapses the house
+    'lost_limit': 4,             # Victims lost before the game is lost
+    'rescued_to_win': 7,         # Victims rescued to win
+    # Points of interest
+    'max_victims': 10,
+    'max_false_alarms': 5,
+    'min_points_of_interest': 3  # New points of interest appear below this count
+}
+
+
+class GameConfig:
+    def __init__(self, **values):
+        unknown = set(values) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"Unknown game settings: {', '.join(sorted(unknown))}")
+
+        for name, default in DEFAULTS.items():
+            setattr(self, name, values.get(name, default))
+        self.validate()
+
+    def validate(self):
+        # Agents act while they have min_ap_to_act AP, so every action must be
+        # affordable at that point or a turn can keep asking for one it cannot pay
+        costs = [name for name in DEFAULTS if name.startswith('cost_')]
+        too_low = [name for name in costs if getattr(self, name) < 1]
+        if too_low:
+            raise ValueError(f"Action costs must be at least 1: {', '.join(too_low)}")
+        if self.min_ap_to_act < 1:
+            raise ValueError("min_ap_to_act must be at least 1")
+        largest = max(self.cost_move_with_victim + self.cost_open_door,
+                      self.cost_move + self.cost_open_door,
+                      self.cost_extinguish_fire, self.cost_extinguish_smoke, self.cost_damage_wall)
+        if self.min_ap_to_act < largest:
+            raise ValueError(f"min_ap_to_act ({self.min_ap_to_act}) is below the largest action cost ({largest})")
+
+    def replace(self, **changes):
+        values = self.to_dict()
+        values.update(changes)
+        return GameConfig(**values)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in DEFAULTS}
+
+    def changes(self):
+        # Only the settings that differ from the classic rules
+        return {name: value for name, value in self.to_dict().items() if value != DEFAULTS[name]}
+
+    def key(self):
+        # Stable identifier of the settings, the same in every process and run. Only the
+        # settings changed from DEFAULTS count, so adding a new setting keeps the old keys
+        text = json.dumps(self.changes(), sort_keys=True)
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        changes = ', '.join(f"{name}={value!r}" for name, value in self.changes().items())
+        return f"GameConfig({changes})"
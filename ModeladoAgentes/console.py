@@ -0,0 +1,72 @@
+"""Server console output rendered off the request path.
+
+The server used to print every turn's changes and the ASCII map before
+answering each request. A ConsoleRenderer does it from a background thread
+instead: the request only queues the turn, and the thread prints the queued
+changes and renders the map at most once every `interval` seconds (turns
+played in between are folded into the next frame). The model is only read
+while holding `lock`, which the server also holds while it plays a turn.
+
+    renderer = ConsoleRenderer(model_lock, interval=0.5)
+    renderer.submit(model)      # after every turn
+    renderer.close()
+
+    python server.py --render-interval=0.5
+"""
+import queue
+import sys
+import threading
+import time
+
+
+class ConsoleRenderer:
+    def __init__(self, lock, interval=0.5, output=None):
+        self.lock = lock
+        self.interval = interval
+        self.output = output if output is not None else sys.stdout
+        self.changes = queue.SimpleQueue()
+        self.model = None           # Model with turns not drawn yet
+        self.wake = threading.Event()
+        self.stopped = False
+        self.frames = 0
+        self.turns = 0
+        self.thread = threading.Thread(target=self.run, name='console-renderer', daemon=True)
+        self.thread.start()
+
+    def submit(self, model):
+        # The turn's changes dict is not modified after the turn, a new one is made for the next
+        self.changes.put(model.changes)
+        self.model = model
+        self.turns += 1
+        self.wake.set()
+
+    def render(self, model):
+        """The current ASCII map, read under the lock."""
+        with self.lock:
+            return model.render_map(model.walls.T, model.fires.data.T)
+
+    def run(self):
+        while not self.stopped:
+            self.wake.wait()
+            self.wake.clear()
+            self.draw()
+            # Throttle: turns submitted while sleeping are drawn together
+            time.sleep(self.interval)
+        self.draw()
+
+    def draw(self):
+        while True:
+            try:
+                changes = self.changes.get_nowait()
+            except queue.Empty:
+                break
+            print(changes, file=self.output)
+        model, self.model = self.model, None
+        if model is not None:
+            print(self.render(model), file=self.output, flush=True)
+            self.frames += 1
+
+    def close(self):
+        self.stopped = True
+        self.wake.set()
+        self.thread.join()
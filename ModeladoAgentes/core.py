@@ -0,0 +1,134 @@
+"""Lean replacements for the parts of Mesa the simulation uses in its hot loop.
+
+ArrayLayer and ArrayGrid keep the interface of mesa.space.PropertyLayer and
+MultiGrid that the game relies on (data, set_cell, select_cells,
+get_neighborhood, place_agent, move_agent, get_cell_list_contents) but skip
+their validation, and the grid answers neighbourhood queries from tables
+built once. CoreModel and CoreAgent give agents an id, a position and a
+seeded random generator without importing Mesa at all.
+"""
+import random
+
+import numpy as np
+
+# Directions in the same order as the wall bits (up, left, down, right)
+DIRECTIONS = [(0, -1), (-1, 0), (0, 1), (1, 0)]
+
+
+class ArrayLayer:
+    """A named NumPy array indexed [x, y], like mesa.space.PropertyLayer."""
+
+    def __init__(self, name, width, height, default_value, dtype):
+        self.name = name
+        self.width = width
+        self.height = height
+        self.data = np.full((width, height), default_value, dtype=dtype)
+
+    def set_cell(self, position, value):
+        self.data[position] = value
+
+    def select_cells(self, condition, return_list=True):
+        condition_array = condition(self.data)
+        if return_list:
+            return list(zip(*np.where(condition_array)))
+        return condition_array
+
+
+class ArrayGrid:
+    """Bounded grid holding several agents per cell, with precomputed neighbour tables.
+
+    neighborhoods[pos] lists the in-bounds cardinal neighbours in the order
+    MultiGrid.get_neighborhood returns them, and directional_neighbors[pos]
+    lists (side, neighbour) pairs in DIRECTIONS order, which pathfinding uses.
+    """
+
+    def __init__(self, width, height, property_layers=None):
+        self.width = width
+        self.height = height
+        self.properties = {layer.name: layer for layer in property_layers or []}
+        self.cells = {}
+
+        self.neighborhoods = {}
+        self.directional_neighbors = {}
+        for x in range(width):
+            for y in range(height):
+                # Same visiting order as MultiGrid: x first, then y
+                self.neighborhoods[(x, y)] = tuple(
+                    (x + dx, y + dy)
+                    for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                    if abs(dx) + abs(dy) == 1 and 0 <= x + dx < width and 0 <= y + dy < height)
+                self.directional_neighbors[(x, y)] = tuple(
+                    (side, (x + dx, y + dy))
+                    for side, (dx, dy) in enumerate(DIRECTIONS)
+                    if 0 <= x + dx < width and 0 <= y + dy < height)
+
+    def out_of_bounds(self, pos):
+        x, y = pos
+        return not (0 <= x < self.width and 0 <= y < self.height)
+
+    def get_neighborhood(self, pos, moore=False, include_center=False, radius=1):
+        if moore or include_center or radius != 1:
+            raise ValueError("ArrayGrid only supports the cardinal neighbourhood of radius 1.")
+        return self.neighborhoods[pos]
+
+    def place_agent(self, agent, pos):
+        self.cells.setdefault(pos, []).append(agent)
+        agent.pos = pos
+
+    def remove_agent(self, agent):
+        self.cells[agent.pos].remove(agent)
+        agent.pos = None
+
+    def move_agent(self, agent, pos):
+        self.cells[agent.pos].remove(agent)
+        self.cells.setdefault(pos, []).append(agent)
+        agent.pos = pos
+
+    def get_cell_list_contents(self, pos):
+        return list(self.cells.get(pos, ()))
+
+    def is_cell_empty(self, pos):
+        return not self.cells.get(pos)
+
+
+class CoreModel:
+    """Seeded random generator and agent registry, the part of mesa.Model the game needs."""
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+        self._seed = seed
+        self.steps = 0
+        self.running = True
+        self.agent_list = []
+        self._next_agent_id = 1
+
+    @property
+    def agents(self):
+        return self.agent_list
+
+    def next_agent_id(self):
+        # Ids start at 1, like Mesa agents
+        agent_id = self._next_agent_id
+        self._next_agent_id += 1
+        return agent_id
+
+    def register_agent(self, agent):
+        self.agent_list.append(agent)
+
+    def deregister_agent(self, agent):
+        self.agent_list.remove(agent)
+
+
+class CoreAgent:
+    def __init__(self, model):
+        self.model = model
+        self.unique_id = model.next_agent_id()
+        self.pos = None
+        model.register_agent(self)
+
+    def remove(self):
+        if self in self.model.agent_list:
+            self.model.deregister_agent(self)
+
+    def step(self):
+        pass
@@ -0,0 +1,416 @@
+"""Coordinator and workers that spread a parameter sweep over several machines.
+
+The coordinator splits the sweep into (config, seeds) jobs and serves them over
+TCP, one JSON message per line. Workers connect, ask for a job, play it and
+send back the results; while playing they send heartbeats. A job goes back to
+the queue when its worker disconnects or misses heartbeats for `timeout`
+seconds, up to `max_attempts` times. The first result of a job wins, so a slow
+worker finishing late does nothing. Results are appended to the same JSON-lines
+file as sweep.py (resumable, readable by `sweep.py --summary`) and aggregated
+per configuration as they arrive.
+
+On one machine, with local worker processes:
+
+    python distributed.py coordinator --grid agents=4,5,6 --seeds 200 --output sweep.jsonl --local-workers 4
+
+On a cluster, start the coordinator on one node and the workers on the others:
+
+    python distributed.py coordinator --grid agents=4,5,6 --seeds 200 --output sweep.jsonl --port 8686
+    python distributed.py worker --host coordinator-node --port 8686
+"""
+import argparse
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+from sweep import (expand_grid, load_results, parse_grid, pending_tasks, play_games, print_summary, wilson_interval,
+                   write_results)
+
+DEFAULT_PORT = 8686
+
+
+def send_message(stream, message, lock=None):
+    data = (json.dumps(message) + '\n').encode('utf-8')
+    if lock is None:
+        stream.write(data)
+        stream.flush()
+        return
+    with lock:
+        stream.write(data)
+        stream.flush()
+
+
+def read_message(stream):
+    line = stream.readline()
+    if not line:
+        return None
+    return json.loads(line)
+
+
+class OutcomeStats:
+    """Running totals of one configuration, updated as results arrive."""
+
+    def __init__(self, config):
+        self.config = config
+        self.games = 0
+        self.victories = 0
+        self.turns = 0
+        self.rescued = 0
+
+    def add(self, result):
+        self.games += 1
+        self.victories += bool(result['victory'])
+        self.turns += result['turns']
+        self.rescued += result['people_rescued']
+
+    def to_dict(self):
+        games = max(self.games, 1)
+        win_rate = self.victories / games
+        return {
+            'config_key': self.config.key(),
+            'config': self.config.changes(),
+            'games': self.games,
+            'win_rate': win_rate,
+            'ci95': list(wilson_interval(self.victories, self.games)),
+            'mean_turns': self.turns / games,
+            'mean_rescued': self.rescued / games
+        }
+
+
+class Job:
+    def __init__(self, job_id, config, seeds):
+        self.job_id = job_id
+        self.config = config
+        self.seeds = seeds
+        self.attempts = 0
+        self.status = 'pending'  # pending, running, done or failed
+        self.worker = None
+        self.last_heartbeat = 0.0
+
+
+class Coordinator:
+    """Hands out the jobs of a sweep and collects their results."""
+
+    def __init__(self, configs, seeds, output, max_turns=10000, seeds_per_task=10, timeout=30.0, max_attempts=3,
+                 verbose=True):
+        self.output = output
+        self.max_turns = max_turns
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.verbose = verbose
+
+        tasks = pending_tasks(configs, seeds, output, seeds_per_task)
+        self.jobs = {job_id: Job(job_id, config, task_seeds) for job_id, (config, task_seeds) in enumerate(tasks)}
+        self.queue = deque(self.jobs)
+        # The statistics include the games of earlier runs found in the output file
+        self.stats = {config.key(): OutcomeStats(config) for config in configs}
+        for result in load_results(output):
+            stats = self.stats.get(result['config_key'])
+            if stats is not None:
+                stats.add(result)
+        self.games_played = 0
+
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        if not self.jobs:
+            self.finished.set()
+        self.file = open(output, 'a')
+
+    # Job bookkeeping, always called with the lock held
+
+    def _next_job(self, worker):
+        while self.queue:
+            job = self.jobs[self.queue.popleft()]
+            if job.status != 'pending':
+                continue
+            job.status = 'running'
+            job.attempts += 1
+            job.worker = worker
+            job.last_heartbeat = time.monotonic()
+            return job
+        return None
+
+    def _requeue(self, job, reason):
+        if job.status != 'running':
+            return
+        if job.attempts >= self.max_attempts:
+            job.status = 'failed'
+            self._log(f"Job {job.job_id} failed after {job.attempts} attempts ({reason}).")
+            self._check_finished()
+            return
+        job.status = 'pending'
+        job.worker = None
+        self.queue.append(job.job_id)
+        self._log(f"Job {job.job_id} back in the queue ({reason}).")
+
+    def _check_finished(self):
+        if all(job.status in ('done', 'failed') for job in self.jobs.values()):
+            self.finished.set()
+
+    def _log(self, message):
+        if self.verbose:
+            print(f"[coordinator] {message}", flush=True)
+
+    # Messages from the workers
+
+    def request_job(self, worker):
+        with self.lock:
+            job = self._next_job(worker)
+            if job is not None:
+                return {'type': 'job', 'job_id': job.job_id, 'config': job.config.to_dict(),
+                        'seeds': job.seeds, 'max_turns': self.max_turns}
+            if self.finished.is_set():
+                return {'type': 'done'}
+            # Every job is running somewhere, ask again later in case one is requeued
+            return {'type': 'wait', 'seconds': 1.0}
+
+    def heartbeat(self, job_id, worker):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None and job.status == 'running' and job.worker == worker:
+                job.last_heartbeat = time.monotonic()
+
+    def add_results(self, job_id, results):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None or job.status == 'done':
+                return
+            job.status = 'done'
+            write_results(self.file, job.config, results)
+            stats = self.stats[job.config.key()]
+            for result in results:
+                stats.add(result)
+            self.games_played += len(results)
+            done = sum(1 for job in self.jobs.values() if job.status == 'done')
+            self._log(f"{done}/{len(self.jobs)} jobs done, {stats.games} games of {job.config!r}, "
+                      f"win rate {stats.victories / stats.games:.3f}")
+            self._check_finished()
+
+    def worker_lost(self, worker):
+        with self.lock:
+            for job in self.jobs.values():
+                if job.status == 'running' and job.worker == worker:
+                    self._requeue(job, f"worker {worker} disconnected")
+
+    def check_heartbeats(self):
+        now = time.monotonic()
+        with self.lock:
+            for job in self.jobs.values():
+                if job.status == 'running' and now - job.last_heartbeat > self.timeout:
+                    self._requeue(job, f"no heartbeat from worker {job.worker} for {self.timeout:.0f} s")
+
+    def summary(self):
+        with self.lock:
+            entries = [stats.to_dict() for stats in self.stats.values() if stats.games]
+        return sorted(entries, key=lambda entry: entry['win_rate'], reverse=True)
+
+    def close(self):
+        self.file.close()
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    # One connection per worker, the worker speaks first
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        worker = None
+        try:
+            while True:
+                message = read_message(self.rfile)
+                if message is None:
+                    break
+                kind = message['type']
+                if kind == 'hello':
+                    worker = message['worker']
+                elif kind == 'request':
+                    reply = coordinator.request_job(worker)
+                    send_message(self.wfile, reply)
+                    if reply['type'] == 'done':
+                        break
+                elif kind == 'heartbeat':
+                    coordinator.heartbeat(message['job_id'], worker)
+                elif kind == 'result':
+                    coordinator.add_results(message['job_id'], message['results'])
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            coordinator.worker_lost(worker)
+
+
+class CoordinatorServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, address, coordinator):
+        super().__init__(address, WorkerHandler)
+        self.coordinator = coordinator
+
+
+def serve(coordinator, host='', port=DEFAULT_PORT, on_poll=None, poll=1.0):
+    """Runs the coordinator until every job is done or failed, returns the bound port.
+
+    on_poll(port) is called once the server listens and then every poll seconds.
+    """
+    with CoordinatorServer((host, port), coordinator) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        port = server.server_address[1]
+        if on_poll is not None:
+            on_poll(port)
+        while not coordinator.finished.wait(poll):
+            coordinator.check_heartbeats()
+            if on_poll is not None:
+                on_poll(port)
+        server.shutdown()
+    return port
+
+
+def run_worker(host, port, worker=None, heartbeat_interval=5.0, retry_seconds=30.0):
+    """Plays jobs from the coordinator until it has none left."""
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    deadline = time.monotonic() + retry_seconds
+    while True:
+        try:
+            connection = socket.create_connection((host, port))
+            break
+        except OSError:
+            # The coordinator may still be starting
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+    played = 0
+    with connection, connection.makefile('rwb') as stream:
+        lock = threading.Lock()
+        send_message(stream, {'type': 'hello', 'worker': worker}, lock)
+        while True:
+            send_message(stream, {'type': 'request'}, lock)
+            reply = read_message(stream)
+            if reply is None or reply['type'] == 'done':
+                break
+            if reply['type'] == 'wait':
+                time.sleep(reply['seconds'])
+                continue
+
+            # Heartbeats go out from a thread while the games are played
+            stop = threading.Event()
+
+            def beat(job_id=reply['job_id']):
+                while not stop.wait(heartbeat_interval):
+                    try:
+                        send_message(stream, {'type': 'heartbeat', 'job_id': job_id}, lock)
+                    except OSError:
+                        return  # The coordinator is gone, the result send will fail too
+
+            beater = threading.Thread(target=beat, daemon=True)
+            beater.start()
+            try:
+                results = play_games(reply['config'], reply['seeds'], reply['max_turns'])
+            finally:
+                stop.set()
+                beater.join()
+            send_message(stream, {'type': 'result', 'job_id': reply['job_id'], 'results': results}, lock)
+            played += len(results)
+    return played
+
+
+class LocalWorkers:
+    """Worker processes on this machine, restarted when one dies while jobs remain."""
+
+    def __init__(self, count, max_restarts=None, heartbeat_interval=5.0):
+        self.count = count
+        self.max_restarts = count * 3 if max_restarts is None else max_restarts
+        self.heartbeat_interval = heartbeat_interval
+        self.processes = []
+        self.restarts = 0
+        self.port = None
+
+    def _start(self, index):
+        command = [sys.executable, os.path.abspath(__file__), 'worker', '--host', '127.0.0.1',
+                   '--port', str(self.port), '--name', f"local-{index}",
+                   '--heartbeat', str(self.heartbeat_interval)]
+        return subprocess.Popen(command)
+
+    def ensure_running(self, port):
+        # Called by serve() once the coordinator listens and then on every poll
+        self.port = port
+        if not self.processes:
+            self.processes = [self._start(index) for index in range(self.count)]
+            return
+        for index, process in enumerate(self.processes):
+            if process.poll() not in (None, 0) and self.restarts < self.max_restarts:
+                self.restarts += 1
+                print(f"[coordinator] Local worker {index} exited with {process.returncode}, restarting.", flush=True)
+                self.processes[index] = self._start(index)
+
+    def close(self, timeout=10.0):
+        for process in self.processes:
+            try:
+                process.wait(timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def run_distributed(configs, seeds, output, host='', port=DEFAULT_PORT, local_workers=0, max_turns=10000,
+                    seeds_per_task=10, timeout=30.0, max_attempts=3, heartbeat_interval=5.0, verbose=True):
+    """Serves the sweep to workers (and starts local_workers on this machine), returns the coordinator."""
+    coordinator = Coordinator(configs, seeds, output, max_turns=max_turns, seeds_per_task=seeds_per_task,
+                              timeout=timeout, max_attempts=max_attempts, verbose=verbose)
+    workers = LocalWorkers(local_workers, heartbeat_interval=heartbeat_interval) if local_workers else None
+    try:
+        serve(coordinator, host, port, on_poll=workers.ensure_running if workers else None)
+    finally:
+        coordinator.close()
+        if workers is not None:
+            workers.close()
+    return coordinator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Distributed parameter sweeps: a coordinator and its workers.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    coordinator = commands.add_parser('coordinator', help="Serve the jobs of a sweep")
+    coordinator.add_argument('--grid', nargs='*', default=[], help="Settings to sweep, e.g. agents=4,5,6")
+    coordinator.add_argument('--seeds', type=int, default=100, help="Seeds per configuration")
+    coordinator.add_argument('--first-seed', type=int, default=0)
+    coordinator.add_argument('--output', default="sweep.jsonl")
+    coordinator.add_argument('--host', default='')
+    coordinator.add_argument('--port', type=int, default=DEFAULT_PORT)
+    coordinator.add_argument('--local-workers', type=int, default=0, help="Worker processes to start on this machine")
+    coordinator.add_argument('--seeds-per-job', type=int, default=10)
+    coordinator.add_argument('--timeout', type=float, default=30.0, help="Seconds without heartbeat before a job is retried")
+    coordinator.add_argument('--max-attempts', type=int, default=3)
+    coordinator.add_argument('--max-turns', type=int, default=10000)
+
+    worker = commands.add_parser('worker', help="Play jobs from a coordinator")
+    worker.add_argument('--host', default='127.0.0.1')
+    worker.add_argument('--port', type=int, default=DEFAULT_PORT)
+    worker.add_argument('--name', default=None)
+    worker.add_argument('--heartbeat', type=float, default=5.0, help="Seconds between heartbeats")
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        played = run_worker(args.host, args.port, args.name, heartbeat_interval=args.heartbeat)
+        print(f"[worker {args.name or os.getpid()}] Played {played} games.")
+        return
+
+    configs = expand_grid(parse_grid(args.grid))
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    result = run_distributed(configs, seeds, args.output, host=args.host, port=args.port,
+                             local_workers=args.local_workers, max_turns=args.max_turns,
+                             seeds_per_task=args.seeds_per_job, timeout=args.timeout,
+                             max_attempts=args.max_attempts)
+    failed = sum(1 for job in result.jobs.values() if job.status == 'failed')
+    print(f"Played {result.games_played} games in {len(result.jobs)} jobs ({failed} failed), results in {args.output}")
+    print_summary(result.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""Paired Monte Carlo comparison of agent strategies.
+
+Every strategy plays the same seeds. The model draws fires, points of interest
+and agent placement from separate streams derived from its seed, so for a given
+seed all strategies face the same fire sequence (common random numbers) and the
+comparison only needs the variance of the per-seed differences:
+
+    python evaluation.py --games 200 --baseline default
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game import play_game
+
+# Strategies are keyword arguments for FireRescueGame
+STRATEGIES = {
+    'default': {},
+    'two_rescuers': {'rescuers': 2},
+    'five_agents': {'agents': 5}
+}
+
+
+def play_seed(seed, strategies, max_turns):
+    # Plays every strategy on the same seed, silencing the model output
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return {
+            name: play_game(seed=seed, max_turns=max_turns, **model_kwargs)
+            for name, model_kwargs in strategies.items()
+        }
+
+
+def evaluate_strategies(strategies, seeds, processes=None, max_turns=10000):
+    seeds = list(seeds)
+    if processes == 1:
+        return [play_seed(seed, strategies, max_turns) for seed in seeds]
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        chunksize = max(1, len(seeds) // ((processes or os.cpu_count() or 1) * 4))
+        return list(executor.map(
+            play_seed, seeds, itertools.repeat(strategies), itertools.repeat(max_turns),
+            chunksize=chunksize))
+
+
+def paired_difference(results, baseline, variant, metric='victory'):
+    baseline_values = np.array([float(result[baseline][metric]) for result in results])
+    variant_values = np.array([float(result[variant][metric]) for result in results])
+    differences = variant_values - baseline_values
+    games = len(differences)
+
+    mean = float(differences.mean())
+    ddof = 1 if games > 1 else 0
+    paired_se = float(np.sqrt(differences.var(ddof=ddof) / games))
+    # What the error would be if the strategies had been played on independent seeds
+    unpaired_se = float(np.sqrt((baseline_values.var(ddof=ddof) + variant_values.var(ddof=ddof)) / games))
+
+    return {
+        'baseline': baseline,
+        'variant': variant,
+        'metric': metric,
+        'games': games,
+        'mean_difference': mean,
+        'paired_se': paired_se,
+        'unpaired_se': unpaired_se,
+        'ci95': [mean - 1.96 * paired_se, mean + 1.96 * paired_se]
+    }
+
+
+def summarize(results, baseline):
+    names = list(results[0])
+    strategies = {}
+    for name in names:
+        games = [result[name] for result in results]
+        strategies[name] = {
+            'games': len(games),
+            'win_rate': sum(game['victory'] for game in games) / len(games),
+            'mean_turns': sum(game['turns'] for game in games) / len(games),
+            'mean_rescued': sum(game['people_rescued'] for game in games) / len(games)
+        }
+
+    comparisons = []
+    for name in names:
+        if name == baseline:
+            continue
+        comparisons.append(paired_difference(results, baseline, name, 'victory'))
+        comparisons.append(paired_difference(results, baseline, name, 'turns'))
+
+    return {'strategies': strategies, 'comparisons': comparisons}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare strategies on common random numbers.")
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--baseline', default='default', choices=list(STRATEGIES))
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    parser.add_argument('--output', help="Write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    names = list(dict.fromkeys([args.baseline] + args.strategies))
+    strategies = {name: STRATEGIES[name] for name in names}
+    seeds = range(args.first_seed, args.first_seed + args.games)
+
+    results = evaluate_strategies(strategies, seeds, processes=args.processes, max_turns=args.max_turns)
+    summary = summarize(results, args.baseline)
+
+    for name, stats in summary['strategies'].items():
+        print(f"{name}: win rate {stats['win_rate']:.3f}, mean turns {stats['mean_turns']:.1f}")
+    for comparison in summary['comparisons']:
+        print(f"{comparison['variant']} - {comparison['baseline']} ({comparison['metric']}): "
+              f"{comparison['mean_difference']:+.3f} +/- {1.96 * comparison['paired_se']:.3f} "
+              f"(independent seeds would give +/- {1.96 * comparison['unpaired_se']:.3f})")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
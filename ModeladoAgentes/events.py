@@ -0,0 +1,59 @@
+"""Changes since the end-of-turn checks last ran.
+
+After every agent turn the game checks whether agents are stunned, whether
+smoke next to fire turns into fire (flashover) and whether new points of
+interest are needed. Most of the board does not change between two checks, so
+the game records what did change and the checks only look there:
+
+- stun checks only run for agents that moved, agents on cells that caught fire
+  and agents left on fire by the last check;
+- flashover only looks at smoke on or next to a cell whose fire state, walls
+  or doors changed (fire started by a check is looked at again by the next);
+- the points of interest are only recounted when one appeared or disappeared
+  or a carried victim was dropped.
+
+The first check after the game starts looks at everything.
+"""
+
+
+class TurnEvents:
+    def __init__(self):
+        # Nothing is recorded before the game starts, so the first checks look everywhere
+        self.check_all_agents = True
+        self.check_all_cells = True
+        self.ignited_cells = set()              # Cells that caught fire
+        self.changed_cells = set()              # Cells whose fire state, walls or doors changed
+        self.moved_agents = set()
+        self.stranded_agents = set()            # Agents still on fire after the last stun check
+        self.points_of_interest_changed = True
+
+    def fire_changed(self, pos, old_value, new_value):
+        if old_value == new_value:
+            return
+        self.changed_cells.add(pos)
+        if new_value == 1:
+            self.ignited_cells.add(pos)
+
+    def take_stun_candidates(self, grid):
+        """Agents that may be standing on fire (None for all), the recorded moves and ignitions are cleared."""
+        candidates = self.moved_agents | self.stranded_agents
+        for cell in self.ignited_cells:
+            candidates.update(grid.cells.get(cell, ()))
+        self.moved_agents = set()
+        self.ignited_cells = set()
+        if self.check_all_agents:
+            self.check_all_agents = False
+            return None
+        return candidates
+
+    def take_flashover_cells(self, grid):
+        """Cells where smoke may turn into fire (None for all), the recorded changes are cleared."""
+        cells = set()
+        for cell in self.changed_cells:
+            cells.add(cell)
+            cells.update(grid.neighborhoods[cell])
+        self.changed_cells = set()
+        if self.check_all_cells:
+            self.check_all_cells = False
+            return None
+        return cells
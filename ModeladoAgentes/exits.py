@@ -0,0 +1,60 @@
+"""Distance from every cell to every exit.
+
+Carrying a victim out asks for the nearest exit after every step, and stunned
+agents ask for the exits sorted by cost. Instead of one A* per exit per
+query, ExitDistances keeps one distance field per exit (the same costs as A*:
+a move costs 1 plus the door cost for closed doors) and recomputes them only
+when walls or doors change, which the Zobrist topology hash tells.
+
+    exits = ExitDistances(model)
+    exits.nearest(pos)          # like FireRescueAgent.find_nearest_exit
+    exits.sorted_by_cost(pos)   # like get_exits_sorted_by_distance
+"""
+import numpy as np
+
+from policy import build_door_array, distance_field
+
+
+class ExitDistances:
+    def __init__(self, model):
+        self.model = model
+        self.exits = list(model.entry_points)
+        self.fields = None
+        self.version = None
+        self.recomputations = 0
+
+    def refresh(self):
+        # Walls and doors are all the costs depend on, so the topology hash is the version
+        version = self.model.zobrist.topology
+        if version == self.version:
+            return
+        model = self.model
+        doors = build_door_array(model.doors, model.width, model.height)
+        door_cost = model.config.cost_open_door
+        # Costs are symmetric, so the cost from any cell to an exit is the cost from the exit to the cell
+        self.fields = np.stack([distance_field(model.walls, doors, exit_pos, door_cost) for exit_pos in self.exits])
+        self.version = version
+        self.recomputations += 1
+
+    def costs(self, pos):
+        """Cost from pos to every exit, in entry point order."""
+        self.refresh()
+        return self.fields[(slice(None),) + tuple(pos)]
+
+    def nearest(self, pos):
+        # The first exit among the cheapest ones, as the loop over A* results picks
+        if not self.exits:
+            return None
+        costs = self.costs(pos)
+        index = int(np.argmin(costs))
+        if not np.isfinite(costs[index]):
+            return None
+        return self.exits[index]
+
+    def sorted_by_cost(self, pos):
+        # Reachable exits, cheapest first and in entry point order on ties
+        if not self.exits:
+            return ()
+        costs = self.costs(pos)
+        order = np.argsort(costs, kind='stable')
+        return tuple(self.exits[index] for index in order if np.isfinite(costs[index]))
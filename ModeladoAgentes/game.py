@@ -0,0 +1,832 @@
+"""Fire Rescue rules on the lean core (plain arrays, no Mesa).
+
+FireRescueGame holds the whole game state and the rules. model.FireRescueModel
+is a thin Mesa adapter over it; code that only plays games (benchmarks, batch
+evaluations, worker processes) can use this module and never import Mesa.
+"""
+import heapq
+import random
+from contextlib import nullcontext
+
+import numpy as np
+
+from cache import DecisionCache
+from config import GameConfig
+from core import DIRECTIONS, ArrayGrid, ArrayLayer, CoreModel
+from events import TurnEvents
+from exits import ExitDistances
+from hazard import HazardField
+from pathfinding import PathBoard
+from render import BoardRenderer
+from rooms import RoomGraph
+from util import get_game_variables, decimal_to_binary, binary_to_decimal, _serialize_door_position
+from zobrist import ZobristHasher
+
+# Import the FireRescueAgent class from the agent.py file
+from agent import FireRescueAgent
+from profiler import PhaseProfiler
+from policy import Observation
+
+# Shared context used for the phases of a turn when profiling is disabled
+NO_PROFILING = nullcontext()
+
+# Wall bit of every direction, the walls are stored as (up, left, down, right) bits
+WALL_BIT_BY_DIRECTION = {(0, -1): 8, (-1, 0): 4, (0, 1): 2, (1, 0): 1}
+
+class FireRescueGame(CoreModel):
+    DECISION_CACHE_SIZE = 4096
+    # The end-of-turn checks only look where something changed (events.py); False checks everything every turn
+    EVENT_DRIVEN = True
+    # Search algorithm of the agents' paths: 'astar', 'bidirectional', 'alt' or 'hierarchical' (pathfinding.py)
+    PATH_SEARCH = 'astar'
+
+    def __init__(self, width=10, height=8, agents=6, seed=None, map_file="House1.txt", profile=False,
+                 rescuers=1, agent_class=FireRescueAgent, policy=None, recorder=None, config=None, parallel=None,
+                 heatmaps=None):
+        super().__init__(seed=seed)
+        # A config sets every rule, including the team and the map; without one the classic rules are used
+        if config is None:
+            config = GameConfig(agents=agents, rescuers=rescuers, map_file=map_file)
+        self.config = config
+        self.profiler = PhaseProfiler() if profile else None
+        self.recorder = recorder  # Optional recorder.TurnRecorder called at the end of every turn
+        self.parallel = parallel  # Optional parallel.ParallelDecisions that plans every round ahead
+        self.heatmaps = heatmaps  # Optional heatmaps.HeatmapAccumulator counting fire and agents per cell
+
+        # Separate random streams derived from the model seed, so the fire sequence
+        # does not shift when a strategy reveals more or fewer points of interest
+        self.fire_random = random.Random(self.random.getrandbits(64))
+        self.poi_random = random.Random(self.random.getrandbits(64))
+        self.placement_random = random.Random(self.random.getrandbits(64))
+        game_variables = get_game_variables(config.map_file)
+
+        # The layout file defines the size of the board (house plus outside ring)
+        (width, height) = game_variables[0].shape
+        self.width = width
+        self.height = height
+        self.firstStep = True
+        self.simulationFinished = False
+        self.currentAgentIndex = 0
+
+        self.points_of_interest = ArrayLayer(
+            name="Points of Interest", width=width, height=height, default_value='', dtype=str)
+
+        self.fires = ArrayLayer(
+            name="Fires", width=width, height=height, default_value=0.0, dtype=float)
+
+        self.grid = ArrayGrid(width, height, property_layers=[self.points_of_interest, self.fires])
+
+        self.damage_points = 0
+        self.max_false_alarms = config.max_false_alarms
+        self.max_victims = config.max_victims
+
+        self.people_rescued = 0
+        self.people_lost = 0
+        # What set the fire that burned each lost victim: 'new_fire', 'explosion' or 'flashover'
+        self.victims_lost_by = {}
+        self.fire_cause = 'new_fire'
+
+        self.steps = 0
+
+        self.fire_targets = {}  # Maps agent IDs to fire positions
+        self.smoke_targets = {}  # Maps agent IDs to smoke positions
+
+        self.set_game_data(game_variables)
+        self.hazard = HazardField(self.grid, self.fires.data)
+        # Hash of the state, kept up to date by the methods that change the board and move agents
+        self.zobrist = ZobristHasher(width, height, self.doors)
+        self.rooms = RoomGraph()  # Rooms and doors, built on first use by the hierarchical search
+        self.path_board = PathBoard.from_game(self)
+        # Target selections shared by the agents, keyed on the cell and the board hash
+        self.decision_cache = DecisionCache(self.DECISION_CACHE_SIZE)
+        self.events = TurnEvents()
+        self.exit_distances = ExitDistances(self)  # Distance to every exit, recomputed when walls or doors change
+        self.map_renderer = BoardRenderer(self)  # ASCII map, its door arrays kept until walls or doors change
+
+        self.changes = {
+            'walls': [],
+            'damage': [],
+            'fires': [],
+            'points_of_interest': [],
+            'doors': [], 
+            'explosions': [],
+            'actions': []
+        }
+
+        if self.heatmaps is not None:
+            self.heatmaps.start_game(self)
+
+        for i in range(config.agents):
+            is_rescuer = i < config.rescuers
+            agent = agent_class(self, is_rescuer=is_rescuer, policy=policy)
+            entry_point = self.placement_random.choice(self.entry_points)
+            (x, y) = entry_point
+            self.grid.place_agent(agent, (x, y))
+            if self.heatmaps is not None:
+                self.heatmaps.agent_moved((x, y))
+
+        self.zobrist.reset(self)
+        self.collect()
+
+    def set_game_data(self, game_variables):
+        walls, damage, points_of_interest, fires, doors, entry_points, total_victims, total_false_alarms = game_variables
+        for poi in points_of_interest:
+            x = poi['x']
+            y = poi['y']
+            pos = (x, y)
+            self.points_of_interest.set_cell(pos, poi['type'])
+
+        for fire in fires:
+            x = fire['x']
+            y = fire['y']
+            pos = (x, y)
+            self.fires.set_cell(pos, 1)
+        
+        self.walls = walls
+        self.damage = damage
+        self.doors = doors
+        self.entry_points = entry_points
+        self.false_alarms = self.max_false_alarms - total_false_alarms
+        self.victims = self.max_victims - total_victims
+    
+    def enable_profiling(self, track_allocations=True):
+        if self.profiler is None:
+            self.profiler = PhaseProfiler(track_allocations=track_allocations)
+        return self.profiler
+
+    def disable_profiling(self):
+        self.profiler = None
+
+    def profile_phase(self, name):
+        if self.profiler is None:
+            return NO_PROFILING
+        return self.profiler.phase(name)
+
+    def check_walls(self, pos, complete=False):
+        (x, y) = pos
+        wall_value = int(self.walls[x, y])
+
+        binary_wall = decimal_to_binary(wall_value)
+
+        up = binary_wall[0]
+        left = binary_wall[1]
+        down = binary_wall[2]
+        right = binary_wall[3]
+
+        possible_positions = []
+        complete_positions = []
+
+        if complete:
+            if y - 1 >= 0:
+                complete_positions.append((x, y - 1))
+            if x - 1 >= 0:
+                complete_positions.append((x - 1, y))
+            if y + 1 < self.height:
+                complete_positions.append((x, y + 1))
+            if x + 1 < self.width:
+                complete_positions.append((x + 1, y))
+
+        # If no wall is found then it is a possible position
+        if up == '0' and y - 1 >= 0:
+            possible_positions.append((x, y - 1))
+        if left == '0' and x - 1 >= 0:
+            possible_positions.append((x - 1, y))
+        if down == '0' and y + 1 < self.height:
+            possible_positions.append((x, y + 1))
+        if right == '0' and x + 1 < self.width:
+            possible_positions.append((x + 1, y))
+
+        if complete:
+            return possible_positions, complete_positions
+        else:
+            return possible_positions
+        
+    def has_wall_between(self, pos1, pos2):
+        # No door exists; check walls normally
+        (x1, y1) = pos1
+        (x2, y2) = pos2
+
+        bit = WALL_BIT_BY_DIRECTION.get((x2 - x1, y2 - y1))
+        if bit is None:
+            return False
+        return bool(int(self.walls[pos1]) & bit)
+    
+    def has_wall_between_without_closed_door(self, pos1, pos2):
+        # In this function walls are considered passable if there is a closed door between them
+        door_state = self.check_door(pos1, pos2)
+        if door_state in ['open', 'destroyed']:
+            return False
+        elif door_state == 'closed':
+            return False
+        else: 
+            return self.has_wall_between(pos1, pos2)
+    
+    def has_wall_between_with_closed_door(self, pos1, pos2):
+        door_state = self.check_door(pos1, pos2)
+        if door_state in ['open', 'destroyed']:
+            return False  # No wall blocking because door is open or destroyed
+        elif door_state == 'closed':
+            return True  # Wall is present because door is closed
+        else:
+            return self.has_wall_between(pos1, pos2)
+
+    @property
+    def state_hash(self):
+        # Zobrist hash of the board and the agent positions
+        return self.zobrist.state
+
+    def path_version(self):
+        # Paths only depend on walls and doors, and on fire and smoke in hazard mode
+        if self.path_board.hazard:
+            return self.zobrist.topology ^ self.zobrist.fires
+        return self.zobrist.topology
+
+    def plan_round(self):
+        # Parallel decision phase at the start of a round, the turns are then played in order
+        if self.parallel is not None:
+            with self.profile_phase('parallel_planning'):
+                self.parallel.plan_round(self)
+
+    def move_agent(self, agent, pos):
+        self.zobrist.move_agent(agent, agent.pos, pos)
+        self.events.moved_agents.add(agent)
+        if self.heatmaps is not None:
+            self.heatmaps.agent_moved(pos)
+        self.grid.move_agent(agent, pos)
+
+    def set_point_of_interest(self, pos, value):
+        self.zobrist.set_point_of_interest(pos, self.points_of_interest.data[pos], value)
+        self.events.points_of_interest_changed = True
+        self.points_of_interest.set_cell(pos, value)
+
+    def check_door(self, cell1, cell2):
+        door_key = frozenset([cell1, cell2])
+        if door_key in self.doors:
+            return self.doors[door_key]
+        return None
+    
+    def open_door(self, cell1, cell2):
+        door_key = frozenset([cell1, cell2])
+        if door_key in self.doors:
+            if self.doors[door_key] != 'destroyed':
+                self.zobrist.set_door(door_key, self.doors[door_key], 'open')
+                self.events.changed_cells.update(door_key)
+                self.doors[door_key] = 'open'
+                self.rooms.door_changed(self.path_board, cell1, cell2)
+                self.set_doors_changes_cell(door_key, 'open')
+    
+    def destroy_door(self, cell1, cell2):
+        door_key = frozenset([cell1, cell2])
+        if door_key in self.doors:
+            self.zobrist.set_door(door_key, self.doors[door_key], 'destroyed')
+            self.events.changed_cells.update(door_key)
+            self.doors[door_key] = 'destroyed'
+            self.rooms.door_changed(self.path_board, cell1, cell2)
+            self.set_doors_changes_cell(door_key, 'destroyed')
+    
+    def close_door(self, cell1, cell2):
+        door_key = frozenset([cell1, cell2])
+        if door_key in self.doors:
+            if self.doors[door_key] != 'destroyed':
+                self.zobrist.set_door(door_key, self.doors[door_key], 'closed')
+                self.events.changed_cells.update(door_key)
+                self.doors[door_key] = 'closed'
+                self.rooms.door_changed(self.path_board, cell1, cell2)
+                self.set_doors_changes_cell(door_key, 'closed')
+    
+    def select_random_internal_cell(self, rng=None):
+        if rng is None:
+            rng = self.fire_random
+
+        MIN_X, MAX_X = 1, self.width - 2
+        MIN_Y, MAX_Y = 1, self.height - 2
+
+        x = rng.randint(MIN_X, MAX_X)
+        y = rng.randint(MIN_Y, MAX_Y)
+
+        return (x, y)
+    
+    def is_fire_targeted(self, fire_pos):
+        # Check if any agent is targeting the fire at fire_pos
+        for agent in self.agent_list:
+            if isinstance(agent, FireRescueAgent) and agent.is_targeting_fire(fire_pos):
+                return True
+        return False
+    
+    def is_smoke_targeted(self, fire_pos):
+        # Check if any agent is targeting the smoke at fire_pos
+        for agent in self.agent_list:
+            if isinstance(agent, FireRescueAgent) and agent.is_targeting_smoke(fire_pos):
+                return True
+        return False
+    
+    def assign_new_points_of_interest(self):
+
+        possible_poi = []
+        if self.false_alarms > 0:
+            possible_poi.append('f')
+        if self.victims > 0:
+            possible_poi.append('v')
+
+        if len(possible_poi) == 0:
+            return
+        
+        chosen_poi = self.poi_random.choice(possible_poi)
+
+        (x, y) = self.select_random_internal_cell(self.poi_random)
+
+        self.set_point_of_interest((x, y), chosen_poi)
+    
+        if chosen_poi == 'f':
+            self.false_alarms -= 1
+        elif chosen_poi == 'v':
+            self.victims -= 1
+        
+        if self.fires.data[x, y] == 1:
+            self.set_fire_changes_cell((x, y), 0)
+        
+        self.changes['points_of_interest'].append({
+            'position': list((x, y)),
+            'new_value': chosen_poi
+        })
+    
+    def check_missing_points_of_interest(self):
+        # Nothing to do unless a point of interest or a carried victim changed since the last check
+        if self.EVENT_DRIVEN and not self.events.points_of_interest_changed:
+            return
+        self.events.points_of_interest_changed = False
+
+        countVictims = 0
+        for agent in self.agent_list:
+            if agent.hasVictim == True:
+                countVictims += 1
+                print (f"Numero de victimas agarradas: {countVictims}")
+        
+        non_empty_count = np.count_nonzero(self.points_of_interest.data != '')
+        if non_empty_count + countVictims < self.config.min_points_of_interest:
+            self.assign_new_points_of_interest()
+    
+    def destroy_wall(self, pos, wall_index_to_destroy):
+        current_wall_value = decimal_to_binary(int(self.walls[pos]))
+        current_wall_list = list(current_wall_value)
+
+        current_wall_list[wall_index_to_destroy] = '0'
+
+        new_wall_value = ''.join(current_wall_list)
+
+        new_walls = binary_to_decimal(new_wall_value)
+        self.zobrist.set_walls(pos, self.walls[pos], new_walls)
+        self.walls[pos] = new_walls
+
+        # Smoke on either side of the wall may now be reached by fire
+        (dx, dy) = DIRECTIONS[wall_index_to_destroy]
+        neighbor = (pos[0] + dx, pos[1] + dy)
+        self.events.changed_cells.add(pos)
+        if not self.grid.out_of_bounds(neighbor):
+            self.events.changed_cells.add(neighbor)
+            self.rooms.wall_destroyed(self.path_board, pos, neighbor)
+
+        self.changes['walls'].append({
+            'position': list(pos),
+            'new_value': int(self.walls[pos])
+        })
+
+    def damage_wall(self, pos, wall_index_to_damage, apply_damage = True):
+        current_wall_damage = self.damage[pos]
+
+        wall_damage_list = list(current_wall_damage)
+        wall_damage_list[wall_index_to_damage] += 1
+        self.zobrist.set_damage(pos, current_wall_damage, wall_damage_list)
+        self.damage[pos] = tuple(wall_damage_list)
+
+        self.changes['damage'].append({
+            'position': list(pos),
+            'new_value': list(self.damage[pos])
+        })
+
+        if apply_damage:
+            self.damage_points += 1
+    
+    def explosion_wall(self, pos, wall_index_to_explode, apply_damage=True):
+        current_wall_damage = self.damage[pos]
+
+        if current_wall_damage[wall_index_to_explode] < 2:
+            self.damage_wall(pos, wall_index_to_explode, apply_damage)
+
+        new_wall_damage = self.damage[pos]
+
+        if new_wall_damage[wall_index_to_explode] == 2:
+            self.destroy_wall(pos, wall_index_to_explode)
+    
+    def set_wall_explosions(self, walls, direction, current_pos, new_pos):
+        if direction == (0, -1):
+            if walls[0] == '1':
+                self.explosion_wall(current_pos, 0)
+                self.explosion_wall(new_pos, 2, False)
+        elif direction == (-1, 0):
+            if walls[1] == '1':
+                self.explosion_wall(current_pos, 1)
+                self.explosion_wall(new_pos, 3, False)
+        elif direction == (0, 1):
+            if walls[2] == '1':
+                self.explosion_wall(current_pos, 2)
+                self.explosion_wall(new_pos, 0, False)
+        elif direction == (1, 0):
+            if walls[3] == '1':
+                self.explosion_wall(current_pos, 3)
+                self.explosion_wall(new_pos, 1, False)
+    
+    def continue_explosion(self, explosion_base_pos, current_pos):
+
+        self.changes['explosions'].append({
+            'position': list(current_pos)
+        })
+
+        (x, y) = current_pos
+        (x_base, y_base) = explosion_base_pos
+
+        difference_x = x - x_base
+        difference_y = y - y_base
+
+        direction = (difference_x, difference_y)
+        new_pos = (x + direction[0], y + direction[1])
+
+        if not (0 <= new_pos[0] < self.width and 0 <= new_pos[1] < self.height):
+            return
+        
+        adjacent_with_no_walls = self.check_walls(current_pos)
+
+        if new_pos in adjacent_with_no_walls:
+            if self.fires.data[new_pos] == 0:
+                self.set_fire_changes_cell(new_pos, 1)
+            elif self.fires.data[new_pos] == 0.5:
+                self.set_fire_changes_cell(new_pos, 1)
+            elif self.fires.data[new_pos] == 1:
+                self.continue_explosion(current_pos, new_pos)
+        elif self.check_door(current_pos, new_pos) is not None:
+            door_state = self.check_door(current_pos, new_pos)
+            if door_state == 'closed':
+                self.destroy_door(current_pos, new_pos)
+            elif door_state == 'open' or door_state == 'destroyed':
+                if self.fires.data[new_pos] == 0:
+                    self.set_fire_changes_cell(new_pos, 1)
+                elif self.fires.data[new_pos] == 0.5:
+                    self.set_fire_changes_cell(new_pos, 1)
+                elif self.fires.data[new_pos] == 1:
+                    self.continue_explosion(current_pos, new_pos)
+        else:
+            # Has a wall or door so different rules apply
+            walls = decimal_to_binary(int(self.walls[current_pos]))
+
+            self.set_wall_explosions(walls, direction, current_pos, new_pos)
+
+    def explosion(self, pos):
+        if self.profiler is not None:
+            self.profiler.count('explosions')
+        if self.heatmaps is not None:
+            self.heatmaps.explosion(pos)
+
+        adjacent_with_no_walls, all_adjacent_cells = self.check_walls(pos, True)
+
+        self.changes['explosions'].append({
+            'position': list(pos)
+        })
+
+        for adjacent in adjacent_with_no_walls:
+            if self.fires.data[adjacent] == 0:
+                self.set_fire_changes_cell(adjacent, 1)
+            elif self.fires.data[adjacent] == 0.5:
+                self.set_fire_changes_cell(adjacent, 1)
+            elif self.fires.data[adjacent] == 1:
+                self.continue_explosion(pos, adjacent)
+
+        cells_with_walls = []
+        for cell in all_adjacent_cells:
+            if cell not in adjacent_with_no_walls:
+                cells_with_walls.append(cell)
+
+        for cell in cells_with_walls:
+            if self.check_door(pos, cell) is not None:
+                door_state = self.check_door(pos, cell)
+                if door_state == 'closed':
+                    self.destroy_door(pos, cell)
+                elif door_state == 'open' or door_state == 'destroyed':
+                    if self.fires.data[cell] == 0:
+                        self.set_fire_changes_cell(cell, 1)
+                    elif self.fires.data[cell] == 0.5:
+                        self.set_fire_changes_cell(cell, 1)
+                    elif self.fires.data[cell] == 1:
+                        self.continue_explosion(pos, cell)
+            else: 
+                walls = decimal_to_binary(int(self.walls[pos]))
+
+                difference_x = cell[0] - pos[0]
+                difference_y = cell[1] - pos[1]
+
+                direction = (difference_x, difference_y)
+
+                self.set_wall_explosions(walls, direction, pos, cell)
+
+    def check_victim_in_fire(self, pos):
+        poi = self.points_of_interest.data[pos]
+        if poi == 'v':  # Victim
+            self.people_lost += 1
+            self.victims_lost_by[self.fire_cause] = self.victims_lost_by.get(self.fire_cause, 0) + 1
+            print(f"[ALERT] Victim lost at {pos} due to fire.")
+            self.set_point_of_interest(pos, '')  # Remove victim POI
+            x, y = map(int, pos)
+            self.changes['points_of_interest'].append({
+                'position': list((x, y)),
+                'new_value': 'death'
+            })
+        elif poi == 'f':  # False Alarm
+            print(f"[INFO] False alarm at {pos} removed by fire.")
+            self.set_point_of_interest(pos, '')  # Remove false alarm POI
+            x, y = map(int, pos)
+            self.changes['points_of_interest'].append({
+                'position': list((x, y)),
+                'new_value': 'false'
+            })
+
+    def assign_fire(self):
+        (x, y) = self.select_random_internal_cell(self.fire_random)
+
+        pos = (x, y)
+
+        self.fire_cause = 'explosion' if self.fires.data[x, y] == 1 else 'new_fire'
+        if self.fires.data[x, y] == 1:
+            self.explosion(pos)
+        elif self.fires.data[x, y] == 0.5:
+            self.set_fire_changes_cell(pos, 1)
+        elif self.fires.data[x, y] == 0:
+            self.set_fire_changes_cell(pos, 0.5)
+    
+    def convert_smoke_to_fire(self, pos):
+        possible_positions, all_adjacent_cells = self.check_walls(pos, True)
+
+        for position in range(len(possible_positions)):
+            current_position = possible_positions[position]
+            fire_position = self.fires.data[current_position]
+            if fire_position == 1:
+                self.set_fire_changes_cell(pos, 1)
+                break
+        
+        cells_with_walls = []
+        for cell in all_adjacent_cells:
+            if cell not in possible_positions:
+                cells_with_walls.append(cell)
+        
+        for cell in cells_with_walls:
+            if self.check_door(pos, cell) is not None:
+                door_state = self.check_door(pos, cell)
+                fire_position = self.fires.data[cell]
+                if door_state == 'open':
+                    if fire_position == 1:
+                        self.set_fire_changes_cell(pos, 1)
+                        break
+
+    def check_smoke(self):
+        self.fire_cause = 'flashover'
+        cells = self.events.take_flashover_cells(self.grid)
+        if cells is None or not self.EVENT_DRIVEN:
+            cells_with_smoke = self.fires.select_cells(lambda x: x == 0.5)
+        else:
+            cells_with_smoke = [cell for cell in cells if self.fires.data[cell] == 0.5]
+
+        # Smoke is checked in board order, like a scan of the whole board
+        queue = list(cells_with_smoke)
+        heapq.heapify(queue)
+        queued = set(queue)
+        checked = 0
+        while queue:
+            cell = heapq.heappop(queue)
+            checked += 1
+            self.convert_smoke_to_fire(cell)
+            if self.fires.data[cell] == 1:
+                # Smoke next to the new fire that comes later in the scan catches fire this turn too
+                for neighbor in self.grid.neighborhoods[cell]:
+                    if neighbor > cell and neighbor not in queued and self.fires.data[neighbor] == 0.5:
+                        heapq.heappush(queue, neighbor)
+                        queued.add(neighbor)
+
+        if self.profiler is not None:
+            self.profiler.count('smoke_cells_checked', checked)
+
+    def check_stuns(self):
+        # Only agents that moved, stand where fire started or were left on fire can be stunned
+        candidates = self.events.take_stun_candidates(self.grid)
+        stranded = set()
+        checked = 0
+        for agent in self.agent_list:
+            if candidates is None or agent in candidates or not self.EVENT_DRIVEN:
+                checked += 1
+                agent.check_stun()
+                if self.fires.data[agent.pos] == 1:
+                    stranded.add(agent)
+        self.events.stranded_agents = stranded
+
+        if self.profiler is not None:
+            self.profiler.count('agents_checked_for_stun', checked)
+
+    def get_all_fires(self):
+        # Identify all cells with fire (value 1 in the "fires" layer)
+        fire_cells = self.fires.select_cells(lambda x: x == 1)
+        return fire_cells
+    
+    def get_all_smokes(self):
+        # Identify all cells with smoke (value 0.5 in the "fires" layer)
+        smoke_cells = self.fires.select_cells(lambda x: x == 0.5)
+        return smoke_cells
+
+    def is_victim_at(self, pos):
+        poi = self.points_of_interest.data[pos]
+        return poi == 'v'
+    
+    def is_poi_at(self, pos):
+        poi = self.points_of_interest.data[pos]
+        return poi in ['v', 'f']
+    
+    def get_poi_positions(self):
+        positions = np.where(np.isin(self.points_of_interest.data, ['v', 'f']))
+        return list(zip(*positions))
+
+    def reveal_poi_at(self, pos):
+        poi_type = self.points_of_interest.data[pos]
+        if poi_type in ['v', 'f']:
+            self.set_point_of_interest(pos, '')  # Remove the POI
+            (x, y) = pos
+            self.changes['points_of_interest'].append({
+                'position': list((x, y)),
+                'new_value': 'reveal'
+            })
+            return poi_type
+        return None
+
+    def remove_victim(self, pos):
+        if self.is_victim_at(pos):
+            self.set_point_of_interest(pos, '')
+
+    def is_exit(self, pos):
+        return pos in self.entry_points
+
+    def observe(self, agent):
+        # Read-only snapshot of the board that policies decide on
+        return Observation(self, agent)
+
+    def print_map(self, walls_array, fires_array):
+        print(self.render_map(walls_array, fires_array))
+
+    def render_map(self, walls_array, fires_array):
+        """The ASCII map printed by print_map, as one string."""
+        return self.map_renderer.render(walls_array, fires_array)
+    
+    def check_game_over(self):
+        if self.damage_points >= self.config.damage_limit:
+            print("Game Over: Too much structural damage!")
+            return True
+        
+        if self.people_lost >= self.config.lost_limit:
+            print("Game Over: Too many victims lost!")
+            return True
+        
+        if self.people_rescued >= self.config.rescued_to_win:
+            print("Victory: Enough victims have been rescued!")
+            return True
+        return False
+    
+    def set_fire_changes_cell(self, pos, value):
+        # Check to see if a cell with smoke is being set to fire
+        if value == 1.0:
+            self.remove_smoke_change(pos)
+            self.check_victim_in_fire(pos)
+        self.hazard.update(pos, self.fires.data[pos], value)
+        self.events.fire_changed(pos, self.fires.data[pos], value)
+        self.zobrist.set_fire(pos, self.fires.data[pos], value)
+        if self.heatmaps is not None and value != self.fires.data[pos]:
+            self.heatmaps.fire_changed(pos, value)
+        self.fires.set_cell(pos, value)
+        self.changes['fires'].append({
+            'position': [int(pos[0]), int(pos[1])],
+            'new_value': float(value)
+        })
+    
+    def remove_smoke_change(self, pos):
+        pos_list = [int(pos[0]), int(pos[1])]
+        self.changes['fires'] = [
+            change for change in self.changes['fires']
+            if not (change['position'] == pos_list and change['new_value'] == 0.5)
+        ]
+    
+    def set_doors_changes_cell(self, door_key, value):
+        serialized_position = _serialize_door_position(door_key)
+        self.changes['doors'].append({
+            'position': serialized_position,
+            'new_value': value
+        })
+    
+    def collect(self):
+        # Called at the start and at the end of every turn, the Mesa adapter also records agent positions here
+        if self.recorder is not None:
+            self.recorder.record(self)
+        if self.heatmaps is not None:
+            self.heatmaps.end_turn(self)
+
+    def get_all_agent_positions(self):
+        agents = []
+        for agent in self.agent_list:
+            agents.append({
+                "agentID": int(agent.unique_id),
+                "position": [int(agent.pos[0]), int(agent.pos[1])]
+            })
+
+        return agents
+    
+    def step_one_agent(self):
+        if self.check_game_over():
+            self.simulationFinished = True
+            return
+
+        if self.currentAgentIndex < len(self.agent_list):
+            if self.currentAgentIndex == 0:
+                self.plan_round()
+            agent = self.agent_list[self.currentAgentIndex]
+
+            self.changes = {
+                'walls': [], 'fires': [], 'damage': [],
+                'points_of_interest': [], 'doors': [], 'explosions': [], 'actions': []
+            }
+
+            with self.profile_phase('agent_decision'):
+                agent.step()
+
+            # After the agent's turn, check stun for the agents that may be on fire
+            with self.profile_phase('check_stun'):
+                self.check_stuns()
+
+            with self.profile_phase('assign_fire'):
+                self.assign_fire()
+            with self.profile_phase('check_smoke'):
+                self.check_smoke()
+            with self.profile_phase('check_missing_points_of_interest'):
+                self.check_missing_points_of_interest()
+            with self.profile_phase('collect'):
+                self.collect()
+
+            if self.profiler is not None:
+                self.profiler.end_turn()
+
+            # Move to the next agent for the next call
+            self.currentAgentIndex += 1
+
+            if self.currentAgentIndex >= len(self.agent_list):
+                self.currentAgentIndex = 0  # Reset to the first agent
+
+
+    def step(self):
+        if self.check_game_over():
+            self.simulationFinished = True
+            return
+
+        self.changes = { 'walls': [], 'fires': [], 'damage': [], 'points_of_interest': [], 'doors': [], 'explosions': [] }
+        
+        self.collect()
+
+        agents = list(self.agent_list)
+        self.plan_round()
+
+        for agent in agents:
+            self.changes = { 'walls': [], 'fires': [], 'damage': [], 'points_of_interest': [], 'doors': [], 'explosions': [] }
+
+            agent.step()
+            print(f"[Agent {agent.unique_id}] Step Ends with remaining AP: {agent.storedAP}")
+            print(f"{self.false_alarms} False Alarms Remaining")
+            print(f"{self.victims} Victims Remaining")
+
+            self.check_stuns()
+
+            self.assign_fire()
+            self.check_smoke()
+            self.check_missing_points_of_interest()
+
+        self.print_map(self.walls.T, self.fires.data.T)
+        self.collect()
+
+
+def play_game(seed=None, max_turns=10000, game_class=FireRescueGame, **model_kwargs):
+    # Plays a full game one agent turn at a time, like the server does
+    model = game_class(seed=seed, **model_kwargs)
+
+    turns = 0
+    while not model.simulationFinished and turns < max_turns:
+        model.step_one_agent()
+        if not model.simulationFinished:
+            turns += 1
+
+    return {
+        'seed': seed,
+        'victory': model.people_rescued >= model.config.rescued_to_win,
+        'turns': turns,
+        'people_rescued': model.people_rescued,
+        'people_lost': model.people_lost,
+        'damage_points': model.damage_points
+    }
@@ -0,0 +1,30 @@
+"""Hazard field used by the fire-aware pathfinding mode.
+
+The field counts, for every cell, how many of its cardinal neighbours are on
+fire. A cell next to fire is where explosions and flashover strike next, so an
+agent standing there risks being stunned. The model keeps the field up to date
+from set_fire_changes_cell, which only touches the changed cell's neighbours.
+"""
+import numpy as np
+
+
+class HazardField:
+    def __init__(self, grid, fires):
+        self.grid = grid
+        self.fire_neighbors = np.zeros((grid.width, grid.height), dtype=np.int8)
+        for x, y in zip(*np.nonzero(fires == 1)):
+            self.update((int(x), int(y)), 0, 1)
+
+    def update(self, pos, old_value, new_value):
+        # Only a cell starting or stopping to burn changes its neighbours' hazard
+        was_burning = old_value == 1
+        burning = new_value == 1
+        if was_burning == burning:
+            return
+
+        delta = 1 if burning else -1
+        for neighbor in self.grid.neighborhoods[pos]:
+            self.fire_neighbors[neighbor] += delta
+
+    def risk(self, pos):
+        return int(self.fire_neighbors[pos])
@@ -0,0 +1,154 @@
+"""Per-cell counts of fire, explosions and agents over many games.
+
+A HeatmapAccumulator given to the games (FireRescueGame(heatmaps=...)) is
+called by the model when a cell's fire changes, when fire explodes and when
+an agent moves, and at the end of every turn. It adds one to a NumPy counter
+per event:
+
+- ignitions: a cell caught fire; smoke: a cell filled with smoke;
+- explosions: fire was placed on a cell already on fire;
+- visits: an agent was placed on or moved into the cell;
+- occupancy: an agent stood on the cell at the end of a turn.
+
+Accumulators of different processes are added with merge() (reduce_heatmaps
+for many), and exported as arrays, optionally divided by the number of games:
+
+    heatmaps = accumulate_heatmaps(range(1000), processes=4, map_file="House1.txt")
+    heatmaps.to_arrays(per_game=True)['ignitions']
+    heatmaps.save('heatmaps.npz')
+"""
+import argparse
+import contextlib
+import functools
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from game import play_game
+
+COUNTERS = ('ignitions', 'smoke', 'explosions', 'visits', 'occupancy')
+
+
+class HeatmapAccumulator:
+    def __init__(self, width=None, height=None):
+        self.games = 0
+        self.shape = None
+        if width is not None and height is not None:
+            self.allocate((width, height))
+
+    def allocate(self, shape):
+        self.shape = tuple(shape)
+        for name in COUNTERS:
+            setattr(self, name, np.zeros(self.shape, dtype=np.int64))
+
+    def start_game(self, model):
+        # Called by the model when it is created, the board sets the size of the counters
+        shape = (model.width, model.height)
+        if self.shape is None:
+            self.allocate(shape)
+        elif self.shape != shape:
+            raise ValueError(f"Board of {shape} cells, the heatmaps are {self.shape}.")
+        self.games += 1
+
+    def fire_changed(self, pos, value):
+        if value == 1:
+            self.ignitions[pos] += 1
+        elif value == 0.5:
+            self.smoke[pos] += 1
+
+    def explosion(self, pos):
+        self.explosions[pos] += 1
+
+    def agent_moved(self, pos):
+        self.visits[pos] += 1
+
+    def end_turn(self, model):
+        occupancy = self.occupancy
+        for agent in model.agent_list:
+            occupancy[agent.pos] += 1
+
+    def merge(self, other):
+        """Adds the counts of another accumulator (e.g. from another process)."""
+        if other.shape is None:
+            return self
+        if self.shape is None:
+            self.allocate(other.shape)
+        elif self.shape != other.shape:
+            raise ValueError(f"Heatmaps of {other.shape} cells cannot be added to {self.shape}.")
+        for name in COUNTERS:
+            getattr(self, name)[:] += getattr(other, name)
+        self.games += other.games
+        return self
+
+    def to_arrays(self, per_game=False):
+        """The counters as {name: array indexed [x, y]}, divided by the number of games with per_game."""
+        if self.shape is None:
+            return {}
+        if per_game:
+            return {name: getattr(self, name) / max(self.games, 1) for name in COUNTERS}
+        return {name: getattr(self, name).copy() for name in COUNTERS}
+
+    def save(self, path):
+        np.savez_compressed(path, games=self.games, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        heatmaps = cls()
+        with np.load(path) as data:
+            heatmaps.allocate(data['ignitions'].shape)
+            for name in COUNTERS:
+                getattr(heatmaps, name)[:] = data[name]
+            heatmaps.games = int(data['games'])
+        return heatmaps
+
+
+def reduce_heatmaps(accumulators):
+    return functools.reduce(HeatmapAccumulator.merge, accumulators, HeatmapAccumulator())
+
+
+def heatmaps_for_seeds(seeds, max_turns, model_kwargs):
+    # One accumulator per task, silencing the model output
+    heatmaps = HeatmapAccumulator()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        for seed in seeds:
+            play_game(seed=seed, max_turns=max_turns, heatmaps=heatmaps, **model_kwargs)
+    return heatmaps
+
+
+def accumulate_heatmaps(seeds, processes=None, max_turns=10000, seeds_per_task=100, **model_kwargs):
+    """Plays the seeds in worker processes and adds up their heatmaps."""
+    seeds = list(seeds)
+    tasks = [seeds[start:start + seeds_per_task] for start in range(0, len(seeds), seeds_per_task)]
+    if processes == 1:
+        return reduce_heatmaps(heatmaps_for_seeds(task, max_turns, model_kwargs) for task in tasks)
+
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return reduce_heatmaps(executor.map(
+            heatmaps_for_seeds, tasks, itertools.repeat(max_turns), itertools.repeat(model_kwargs)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count fire, explosions and agents per cell over many games.")
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--map', default="House1.txt")
+    parser.add_argument('--agents', type=int, default=6)
+    parser.add_argument('--rescuers', type=int, default=1)
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    parser.add_argument('--output', default='heatmaps.npz')
+    args = parser.parse_args()
+
+    seeds = range(args.first_seed, args.first_seed + args.games)
+    heatmaps = accumulate_heatmaps(seeds, processes=args.processes, max_turns=args.max_turns,
+                                   map_file=args.map, agents=args.agents, rescuers=args.rescuers)
+    heatmaps.save(args.output)
+    for name, values in heatmaps.to_arrays(per_game=True).items():
+        (x, y) = np.unravel_index(np.argmax(values), values.shape)
+        print(f"{name}: {values.sum():.1f} per game, most at ({x}, {y}) with {values[x, y]:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Parallel decision phase for large teams.
+
+At the start of every round the agents' intended plans are computed at the
+same time in worker processes (or threads), against a frozen snapshot of the
+board (pathfinding.PathBoard.snapshot). For every agent a worker finds the
+paths to the targets its next decision looks at (points of interest or exits
+for rescuers, untargeted fires or smoke for firefighters), follows the best one
+for a few cells and finds the paths from those cells too. The paths go into
+the model's decision cache under the same keys the agents use (cache.py).
+
+The turns are then played in order exactly as before. That is the conflict
+resolution: an agent whose plan is still valid finds its paths in the cache,
+and an agent whose plan went stale re-plans in turn order. A plan goes stale
+when a door opened or a wall fell, or when an earlier agent claimed its fire
+(the fire target key includes the claimed targets). So the games are the same
+as with sequential decisions, only the searches ran earlier and in parallel.
+
+    with ParallelDecisions(workers=8) as parallel:
+        play_game(seed=1, map_file='big.txt', agents=40, parallel=parallel)
+
+With few agents on the classic maps the cost of sending the board to the
+workers is higher than the searches it saves; it pays off when decisions
+dominate a round (many agents, big maps) on a machine with several cores.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from pathfinding import search_path
+
+
+def plan_agents(board, jobs, lookahead):
+    """Worker: for every (start, goals) job, the paths from start and from the next cells of the best path.
+
+    Returns one list of (position, goal, path, cost) per job.
+    """
+    results = []
+    for start, goals in jobs:
+        planned = []
+        position = start
+        for _ in range(lookahead + 1):
+            best_path, best_cost = (), float('inf')
+            for goal in goals:
+                path, cost, _ = search_path(board, position, goal)
+                planned.append((position, goal, path, cost))
+                if path and cost < best_cost:
+                    best_path, best_cost = path, cost
+            # The agent is expected to take the first step of its best path
+            if len(best_path) < 2:
+                break
+            position = best_path[1]
+        results.append(planned)
+    return results
+
+
+def intended_goals(model, agent):
+    # The targets the agent's next decision compares, as seen on the current board
+    if agent.is_rescuer:
+        if agent.hasVictim:
+            return list(model.entry_points)
+        return [(int(x), int(y)) for x, y in model.get_poi_positions()]
+
+    if agent.target_fire and model.fires.data[agent.target_fire] == 1:
+        return [agent.target_fire]
+    claimed = {other.target_fire for other in model.agent_list if other is not agent and other.target_fire}
+    fires = [(int(x), int(y)) for x, y in model.get_all_fires() if (x, y) not in claimed]
+    if fires:
+        return fires
+    return [(int(x), int(y)) for x, y in model.get_all_smokes()]
+
+
+class ParallelDecisions:
+    """Plans every agent's next moves in parallel at the start of each round.
+
+    kind is 'process' (default) or 'thread'; lookahead is the number of cells
+    along each agent's best path that are also planned from.
+    """
+
+    def __init__(self, workers=None, kind='process', lookahead=4):
+        if kind not in ('process', 'thread'):
+            raise ValueError(f"Unknown executor kind '{kind}'.")
+        self.workers = workers or os.cpu_count() or 1
+        self.kind = kind
+        self.lookahead = lookahead
+        executor_class = ProcessPoolExecutor if kind == 'process' else ThreadPoolExecutor
+        self.executor = executor_class(max_workers=self.workers)
+        self.rounds = 0
+        self.paths_planned = 0
+
+    def plan_round(self, model):
+        board = model.path_board.snapshot()
+        version = model.path_version()
+        jobs = [(agent.pos, intended_goals(model, agent)) for agent in model.agent_list]
+        jobs = [job for job in jobs if job[1]]
+        if not jobs:
+            return
+
+        # One task per worker, so the snapshot is sent once per worker
+        chunk_size = -(-len(jobs) // self.workers)
+        chunks = [jobs[start:start + chunk_size] for start in range(0, len(jobs), chunk_size)]
+        futures = [self.executor.submit(plan_agents, board, chunk, self.lookahead) for chunk in chunks]
+
+        cache = model.decision_cache
+        planned = 0
+        for future in futures:
+            for agent_plan in future.result():
+                for position, goal, path, cost in agent_plan:
+                    cache.put(('path', position, goal, version), (path, cost))
+                    planned += 1
+
+        # Keep room for a whole round of plans plus the agents' own queries
+        if cache.capacity < 2 * planned:
+            cache.capacity = 2 * planned
+
+        self.rounds += 1
+        self.paths_planned += planned
+        if model.profiler is not None:
+            model.profiler.count('paths_planned_in_parallel', planned)
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,384 @@
+"""A* over the board, shared by the agents and the parallel decision workers.
+
+A PathBoard holds what the search reads: walls, doors, fires, the hazard field
+and the costs of the game's config. The model keeps one on its live arrays,
+and PathBoard.snapshot() copies them so the search can run in another thread
+or process against a frozen board (see parallel.py). Both run the same code,
+so they find the same paths.
+
+The scores of a search live in flat per-cell buffers reused by every search
+of a thread, instead of new dicts per call. board.search picks the algorithm:
+
+- 'astar' (default): A* with the Manhattan heuristic.
+- 'bidirectional': A* from both ends at once, stopping when no shorter path
+  can be left (Pohl's criterion).
+- 'hierarchical': rooms and doors first, then the cells of every room on
+  the way (rooms.py). Hazard costs change with every fire, so in hazard mode
+  it searches like 'astar'.
+- 'alt': A* with landmark distances (A*, landmarks and the triangle
+  inequality). A few landmark cells far apart get a distance field with the
+  door costs, recomputed when walls or doors change. |d(L, goal) - d(L, cell)|
+  is then a lower bound on the cost to the goal that sees walls and doors.
+
+All of them find a cheapest path. When several paths cost the same the other
+modes may pick a different one than 'astar', so games played with them differ.
+
+    board.search = 'alt'
+    path, cost, nodes_expanded = search_path(board, start, goal)
+"""
+import heapq
+import threading
+
+# Wall bit of every side, in DIRECTIONS order (up, left, down, right)
+WALL_BITS = (8, 4, 2, 1)
+SEARCH_MODES = ('astar', 'bidirectional', 'alt', 'hierarchical')
+LANDMARK_COUNT = 4
+INF = float('inf')
+
+
+class PathBoard:
+    def __init__(self, walls, doors, fires, fire_neighbors, directional_neighbors, config, search='astar',
+                 topology=None, rooms=None):
+        if search not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode '{search}'.")
+        self.walls = walls
+        self.height = walls.shape[1]
+        self.doors = doors
+        self.fires = fires
+        self.fire_neighbors = fire_neighbors
+        self.directional_neighbors = directional_neighbors
+        self.door_cost = config.cost_open_door
+        # Hazard mode also charges extinguishing on the way and the burning neighbours of a cell
+        self.hazard = config.pathfinding == 'hazard'
+        self.cost_extinguish_fire = config.cost_extinguish_fire
+        self.cost_extinguish_smoke = config.cost_extinguish_smoke
+        self.hazard_weight = config.hazard_weight
+        self.config = config
+        self.search = search
+        # Object whose topology attribute changes with walls and doors (the model's Zobrist hasher)
+        self.topology = topology
+        self.landmarks = Landmarks()
+        self.rooms = rooms  # rooms.RoomGraph kept up to date by the model, for the 'hierarchical' search
+
+    @classmethod
+    def from_game(cls, model):
+        # Reads the model's arrays and door dict directly, so it always sees the current board
+        return cls(model.walls, model.doors, model.fires.data, model.hazard.fire_neighbors,
+                   model.grid.directional_neighbors, model.config, model.PATH_SEARCH, model.zobrist, model.rooms)
+
+    def snapshot(self):
+        """A frozen copy that can be sent to another process."""
+        board = PathBoard(self.walls.copy(), dict(self.doors), self.fires.copy(), self.fire_neighbors.copy(),
+                          self.directional_neighbors, self.config, self.search)
+        if self.search == 'alt':
+            # The walls and doors of the copy never change, so it keeps the current landmarks
+            self.refresh_landmarks()
+            board.landmarks = self.landmarks
+        if self.search == 'hierarchical':
+            board.rooms = self.rooms.copy()
+        return board
+
+    def index(self, pos):
+        return pos[0] * self.height + pos[1]
+
+    def refresh_landmarks(self):
+        if self.topology is not None:
+            self.landmarks.refresh(self, self.topology.topology)
+        elif self.landmarks.fields is None:
+            self.landmarks.refresh(self, None)
+
+    def neighbors(self, pos):
+        # Cells reachable in one move: no wall, or a door in any state
+        wall_value = int(self.walls[pos])
+        neighbors = []
+        for side, neighbor in self.directional_neighbors[pos]:
+            if wall_value & WALL_BITS[side] and frozenset((pos, neighbor)) not in self.doors:
+                continue
+            neighbors.append(neighbor)
+        return neighbors
+
+    def movement_cost(self, current, neighbor):
+        if self.doors.get(frozenset((current, neighbor))) == 'closed':
+            return 1 + self.door_cost
+        return 1
+
+    def step_cost(self, current, neighbor, goal):
+        cost = self.movement_cost(current, neighbor)
+        if self.hazard and neighbor != goal:
+            fire_value = self.fires[neighbor]
+            if fire_value == 1:
+                cost += self.cost_extinguish_fire
+            elif fire_value == 0.5:
+                cost += self.cost_extinguish_smoke
+            cost += self.hazard_weight * int(self.fire_neighbors[neighbor])
+        return cost
+
+
+def heuristic(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def reconstruct_path(came_from, current):
+    total_path = [current]
+    while current in came_from:
+        current = came_from[current]
+        total_path.append(current)
+    total_path.reverse()
+    return total_path
+
+
+class SearchBuffers:
+    """Per-cell scores of a search, reused from one search to the next.
+
+    A cell's entries are only valid when its stamp is the current generation,
+    so starting a new search does not have to clear the buffers.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.g_score = [0] * size
+        self.came_from = [None] * size
+        self.stamp = [0] * size
+        self.closed = [0] * size
+        self.generation = 0
+
+    def start(self):
+        self.generation += 1
+        return self.generation
+
+    def path_to(self, board, current):
+        # Follows came_from back to the start; the start's entry is None
+        path = []
+        while current is not None:
+            path.append(current)
+            current = self.came_from[board.index(current)]
+        path.reverse()
+        return path
+
+
+_thread_buffers = threading.local()
+
+
+def search_buffers(size):
+    """The (forward, backward) buffers of the calling thread for boards of size cells."""
+    buffers = getattr(_thread_buffers, 'buffers', None)
+    if buffers is None or buffers[0].size != size:
+        buffers = (SearchBuffers(size), SearchBuffers(size))
+        _thread_buffers.buffers = buffers
+    return buffers
+
+
+def cell_distances(board, source):
+    """Cheapest move cost (doors included, no hazards) from source to every cell, by cell index."""
+    distances = [INF] * (board.walls.shape[0] * board.height)
+    distances[board.index(source)] = 0
+    open_set = [(0, source)]
+    while open_set:
+        distance, current = heapq.heappop(open_set)
+        if distance > distances[board.index(current)]:
+            continue
+        for neighbor in board.neighbors(current):
+            new_distance = distance + board.movement_cost(current, neighbor)
+            neighbor_index = board.index(neighbor)
+            if new_distance < distances[neighbor_index]:
+                distances[neighbor_index] = new_distance
+                heapq.heappush(open_set, (new_distance, neighbor))
+    return distances
+
+
+def largest_component(board):
+    """Cells of the biggest set of cells connected by moves, in discovery order."""
+    width = board.walls.shape[0]
+    seen = set()
+    largest = []
+    for x in range(width):
+        for y in range(board.height):
+            if (x, y) in seen:
+                continue
+            component = [(x, y)]
+            seen.add((x, y))
+            for cell in component:
+                for neighbor in board.neighbors(cell):
+                    if neighbor not in seen:
+                        seen.add(neighbor)
+                        component.append(neighbor)
+            if len(component) > len(largest):
+                largest = component
+    return largest
+
+
+class Landmarks:
+    """Distance fields from a few cells far apart, for the 'alt' heuristic."""
+
+    def __init__(self, count=LANDMARK_COUNT):
+        self.count = count
+        self.cells = []
+        self.fields = None
+        self.version = None
+        self.recomputations = 0
+
+    def refresh(self, board, version):
+        if self.fields is not None and version == self.version:
+            return
+        # Farthest point selection inside the biggest connected part of the board (the outside
+        # ring may not connect to the house): every landmark is the cell farthest from the ones
+        # already chosen
+        closest = cell_distances(board, largest_component(board)[0])
+        self.cells = []
+        self.fields = []
+        for _ in range(self.count):
+            index = max(range(len(closest)), key=lambda index: -1 if closest[index] == INF else closest[index])
+            landmark = (index // board.height, index % board.height)
+            field = cell_distances(board, landmark)
+            self.cells.append(landmark)
+            self.fields.append(field)
+            closest = [min(a, b) for a, b in zip(closest, field)] if len(self.fields) > 1 else field
+        self.version = version
+        self.recomputations += 1
+
+    def disconnected(self, board, start, goal):
+        # A landmark reaches exactly one of them: no path (moves go both ways)
+        if not self.fields:
+            return False
+        field = self.fields[0]
+        return (field[board.index(start)] == INF) != (field[board.index(goal)] == INF)
+
+    def heuristic(self, board, goal):
+        """h(cell) for searches towards goal: the largest landmark bound, at least the Manhattan distance."""
+        goal_index = board.index(goal)
+        bounds = [(field, field[goal_index]) for field in self.fields if field[goal_index] != INF]
+        height = board.height
+        (goal_x, goal_y) = goal
+
+        def estimate(cell):
+            best = abs(cell[0] - goal_x) + abs(cell[1] - goal_y)
+            cell_index = cell[0] * height + cell[1]
+            for field, goal_distance in bounds:
+                bound = abs(goal_distance - field[cell_index])
+                if bound > best:
+                    best = bound
+            return best
+
+        return estimate
+
+
+def search_path(board, start, goal):
+    """Cheapest path from start to goal as (path, cost, nodes expanded); ((), inf, n) when unreachable."""
+    if board.search == 'bidirectional':
+        return bidirectional_search(board, start, goal)
+    if board.search == 'hierarchical' and not board.hazard:
+        return board.rooms.search(board, start, goal)
+    estimate = None
+    if board.search == 'alt':
+        board.refresh_landmarks()
+        if board.landmarks.disconnected(board, start, goal):
+            return (), INF, 0
+        estimate = board.landmarks.heuristic(board, goal)
+
+    buffers = search_buffers(board.walls.shape[0] * board.height)[0]
+    generation = buffers.start()
+    g_score = buffers.g_score
+    came_from = buffers.came_from
+    stamp = buffers.stamp
+    closed = buffers.closed
+    height = board.height
+
+    start_index = start[0] * height + start[1]
+    g_score[start_index] = 0
+    came_from[start_index] = None
+    stamp[start_index] = generation
+
+    open_set = []
+    heapq.heappush(open_set, (0, start))
+    nodes_expanded = 0
+
+    while open_set:
+        current = heapq.heappop(open_set)[1]
+        current_index = current[0] * height + current[1]
+        # The heuristics are consistent, so a cell expanded once is never improved
+        if closed[current_index] == generation:
+            continue
+        closed[current_index] = generation
+        nodes_expanded += 1
+        current_g = g_score[current_index]
+
+        if current == goal:
+            return tuple(buffers.path_to(board, current)), current_g, nodes_expanded
+
+        for neighbor in board.neighbors(current):
+            tentative_g_score = current_g + board.step_cost(current, neighbor, goal)
+            neighbor_index = neighbor[0] * height + neighbor[1]
+            if stamp[neighbor_index] != generation or tentative_g_score < g_score[neighbor_index]:
+                stamp[neighbor_index] = generation
+                came_from[neighbor_index] = current
+                g_score[neighbor_index] = tentative_g_score
+                if estimate is None:
+                    f_score = tentative_g_score + heuristic(neighbor, goal)
+                else:
+                    f_score = tentative_g_score + estimate(neighbor)
+                heapq.heappush(open_set, (f_score, neighbor))
+
+    return (), INF, nodes_expanded
+
+
+def bidirectional_search(board, start, goal):
+    """search_path searching from start and from goal at once, with the Manhattan heuristic on both sides."""
+    forward, backward = search_buffers(board.walls.shape[0] * board.height)
+    # The path ends on the goal as a cell of the board (plain ints), as with A*
+    goal = (int(goal[0]), int(goal[1]))
+    height = board.height
+    sides = []
+    for buffers, origin, target, reverse in ((forward, start, goal, False), (backward, goal, start, True)):
+        generation = buffers.start()
+        origin_index = origin[0] * height + origin[1]
+        buffers.g_score[origin_index] = 0
+        buffers.came_from[origin_index] = None
+        buffers.stamp[origin_index] = generation
+        sides.append((buffers, generation, target, reverse, [(heuristic(origin, target), 0, origin)]))
+
+    best_cost = INF
+    meeting = None
+    nodes_expanded = 0
+    if start == goal:
+        best_cost, meeting = 0, start
+
+    while sides[0][4] and sides[1][4]:
+        # A path cheaper than best_cost has to be cheaper than the lowest f on both sides
+        if best_cost <= max(sides[0][4][0][0], sides[1][4][0][0]):
+            break
+        # Expand the side with the smaller frontier
+        side = sides[0] if len(sides[0][4]) <= len(sides[1][4]) else sides[1]
+        other = sides[1] if side is sides[0] else sides[0]
+        (buffers, generation, target, reverse, open_set) = side
+        (other_buffers, other_generation) = other[:2]
+
+        _, current_g, current = heapq.heappop(open_set)
+        current_index = current[0] * height + current[1]
+        if current_g > buffers.g_score[current_index]:
+            continue  # Stale entry
+        nodes_expanded += 1
+
+        for neighbor in board.neighbors(current):
+            # Walking backward, the step enters current from neighbor
+            if reverse:
+                step = board.step_cost(neighbor, current, goal)
+            else:
+                step = board.step_cost(current, neighbor, goal)
+            tentative_g_score = current_g + step
+            neighbor_index = neighbor[0] * height + neighbor[1]
+            if buffers.stamp[neighbor_index] == generation and tentative_g_score >= buffers.g_score[neighbor_index]:
+                continue
+            buffers.stamp[neighbor_index] = generation
+            buffers.came_from[neighbor_index] = current
+            buffers.g_score[neighbor_index] = tentative_g_score
+            heapq.heappush(open_set, (tentative_g_score + heuristic(neighbor, target), tentative_g_score, neighbor))
+            if other_buffers.stamp[neighbor_index] == other_generation:
+                total = tentative_g_score + other_buffers.g_score[neighbor_index]
+                if total < best_cost:
+                    best_cost, meeting = total, neighbor
+
+    if meeting is None:
+        return (), INF, nodes_expanded
+    path = forward.path_to(board, meeting)
+    path.extend(reversed(backward.path_to(board, meeting)[:-1]))
+    return tuple(path), best_cost, nodes_expanded
@@ -0,0 +1,208 @@
+"""Lookahead planning for the rescuer.
+
+The default rescuer walks to the nearest point of interest or exit and decides
+again after every step. PlannerPolicy looks several trips ahead instead: it
+searches over sequences of trips (reach a point of interest, carry a victim to
+an exit) on a compact copy of the board and picks the first trip of the best
+sequence. Later rewards are discounted by the AP spent to get there.
+
+Points of interest on the board are unrevealed (revealing one removes it, and
+a revealed victim is picked up at once), so the planner does not look at what
+they hide. Every one of them is a victim with the same probability, the
+number of victims still hidden on the board (known from the game's counters)
+over the points of interest left, and a trip to one is valued over both
+outcomes.
+
+- A PlanState copies only what the rescuer's trips depend on (its position,
+  whether it carries a victim, the points of interest and hidden victims
+  left), so trying a trip
+  costs a tuple, not a model copy. Trip costs come from distance fields that
+  include doors and extinguishing fire and smoke on the way.
+- A transposition table keyed on the board's Zobrist hash (zobrist.py) keeps
+  the distance fields and the decisions of positions already seen, so the steps of a trip
+  and the following turns on an unchanged board are not searched again.
+- The search deepens one trip at a time and stops at a per-turn time budget,
+  keeping the best plan of the deepest finished search.
+
+    model = FireRescueGame(policy=PlannerPolicy(time_budget=0.05))
+
+The firefighters keep the default behaviour.
+"""
+import math
+import time
+import numpy as np
+
+from cache import DecisionCache
+from policy import DefaultPolicy, distance_field
+
+
+class PlanningTimeout(Exception):
+    pass
+
+
+class PlanState:
+    """What a trip changes: the rescuer's cell, whether it carries a victim, the points of interest left
+    and how many of them are victims."""
+
+    __slots__ = ('position', 'has_victim', 'remaining', 'victims')
+
+    def __init__(self, position, has_victim, remaining, victims):
+        self.position = position
+        self.has_victim = has_victim
+        self.remaining = remaining
+        self.victims = victims
+
+    def key(self):
+        return self.position, self.has_victim, self.remaining, self.victims
+
+    def trips(self, exits, false_alarm_value):
+        # (target, [(probability, reward, next state)]) for every trip the rescuer can make from here
+        if self.has_victim:
+            return [(exit_pos, [(1.0, 1.0, PlanState(exit_pos, False, self.remaining, self.victims))])
+                    for exit_pos in exits]
+        trips = []
+        victim_probability = min(self.victims / len(self.remaining), 1.0) if self.remaining else 0.0
+        for poi in self.remaining:
+            # Reaching a victim only pays off at the exit, a false alarm pays a little right away
+            left = self.remaining - {poi}
+            outcomes = []
+            if victim_probability > 0:
+                outcomes.append((victim_probability, 0.0, PlanState(poi, True, left, self.victims - 1)))
+            if victim_probability < 1:
+                outcomes.append((1.0 - victim_probability, false_alarm_value,
+                                 PlanState(poi, False, left, self.victims)))
+            trips.append((poi, outcomes))
+        return trips
+
+
+class PlannerPolicy(DefaultPolicy):
+    """Rescuer policy that searches max_depth trips ahead within time_budget seconds per turn.
+
+    discount is applied per AP spent, false_alarm_value is the reward for
+    revealing a false alarm (it makes room for a new point of interest) relative
+    to a rescued victim, and table_size bounds the transposition table.
+    """
+
+    def __init__(self, time_budget=0.05, max_depth=6, discount=0.95, false_alarm_value=0.25, table_size=5000):
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.discount = discount
+        self.false_alarm_value = false_alarm_value
+        self.transpositions = DecisionCache(table_size)
+        self.deadline = None
+        self.searches = 0
+        self.timeouts = 0
+
+    def start_turn(self, agent):
+        if agent.is_rescuer:
+            self.deadline = time.perf_counter() + self.time_budget
+
+    def rescuer_actions(self, agent, observation):
+        pos = observation.position
+        if observation.has_victim:
+            if observation.is_exit(pos):
+                return [('drop_victim',)]
+        elif observation.is_victim_at(pos):
+            return [('pick_up_victim',)]
+        elif observation.is_poi_at(pos):
+            return [('reveal_poi',)]
+
+        target = self.plan(agent, observation)
+        if target is None:
+            print(f"[Agent {agent.unique_id}] No plan found, falling back to the nearest target.")
+            return super().rescuer_actions(agent, observation)
+
+        path, _ = agent.a_star(pos, target)
+        if len(path) > 1:
+            next_step = path[1]
+            if observation.stored_ap >= agent.get_move_ap_cost(pos, next_step):
+                if observation.has_victim and observation.is_exit(next_step):
+                    return [('move', next_step), ('drop_victim',)]
+                return [('move', next_step)]
+        return []
+
+    @property
+    def table_hits(self):
+        return self.transpositions.hits
+
+    def trip_costs(self, agent, observation, board, source, with_victim):
+        """AP to reach every cell from source, shared by every decision on the same board."""
+        def compute():
+            enter_costs = np.where(observation.fires == 1, agent.COST_EXTINGUISH_FIRE,
+                                   np.where(observation.fires == 0.5, agent.COST_EXTINGUISH_SMOKE, 0))
+            step_cost = agent.COST_MOVE_WITH_VICTIM if with_victim else agent.COST_MOVE
+            return distance_field(observation.walls, observation.doors, source, agent.COST_OPEN_DOOR,
+                                  step_cost, enter_costs)
+
+        return self.transpositions.get_or_compute(('costs', board, source, with_victim), compute)
+
+    # Search
+
+    def plan(self, agent, observation):
+        """First target (a point of interest or an exit) of the best sequence of trips."""
+        board = observation.board_hash
+        pois = frozenset((int(x), int(y)) for x, y in zip(*np.nonzero(observation.points_of_interest != '')))
+        root = PlanState(observation.position, observation.has_victim, pois, observation.hidden_victims)
+
+        key = ('plan', board, root.position, root.has_victim, root.victims)
+        cached = self.transpositions.get(key)
+        if cached is not None:
+            return cached[0]
+
+        self.searches += 1
+        exits = observation.exits
+
+        def trip_cost(state, target):
+            costs = self.trip_costs(agent, observation, board, state.position, state.has_victim)
+            return costs[target]
+
+        def leaf_value(state):
+            # A victim being carried is almost rescued: the trip to the nearest exit is all that is left
+            if not state.has_victim:
+                return 0.0
+            cost = min(trip_cost(state, exit_pos) for exit_pos in exits)
+            return self.discount ** cost if math.isfinite(cost) else 0.0
+
+        deadline = self.deadline if self.deadline is not None else time.perf_counter() + self.time_budget
+
+        def search(state, depth, memo):
+            if depth == 0:
+                return leaf_value(state), None
+            memo_key = (state.key(), depth)
+            if memo_key in memo:
+                return memo[memo_key]
+            if time.perf_counter() > deadline:
+                raise PlanningTimeout()
+
+            best_value, best_target = leaf_value(state), None
+            for target, outcomes in state.trips(exits, self.false_alarm_value):
+                cost = trip_cost(state, target)
+                if not math.isfinite(cost):
+                    continue
+                expected = 0.0
+                for probability, reward, next_state in outcomes:
+                    future, _ = search(next_state, depth - 1, memo)
+                    expected += probability * (reward + future)
+                value = self.discount ** cost * expected
+                if value > best_value:
+                    best_value, best_target = value, target
+
+            memo[memo_key] = best_value, best_target
+            return best_value, best_target
+
+        # Iterative deepening: the first level always finishes, deeper ones only within the time budget
+        best_target = None
+        for depth in range(1, self.max_depth + 1):
+            try:
+                _, target = search(root, depth, {})
+            except PlanningTimeout:
+                if depth == 1:
+                    deadline = math.inf
+                    _, best_target = search(root, 1, {})
+                self.timeouts += 1
+                break
+            best_target = target
+
+        if best_target is not None:
+            self.transpositions.put(key, (best_target,))
+        return best_target
@@ -0,0 +1,220 @@
+import heapq
+
+import numpy as np
+
+# Door states in the observation arrays
+NO_DOOR = 0
+DOOR_CLOSED = 1
+DOOR_OPEN = 2
+DOOR_DESTROYED = 3
+
+DOOR_CODES = {'closed': DOOR_CLOSED, 'open': DOOR_OPEN, 'destroyed': DOOR_DESTROYED}
+
+# Directions in the same order as the wall bits (up, left, down, right)
+DIRECTIONS = [(0, -1), (-1, 0), (0, 1), (1, 0)]
+WALL_BITS = [8, 4, 2, 1]
+
+
+def read_only(array):
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+def build_door_array(doors, width, height):
+    # Door state of every side of every cell, indexed like the wall bits
+    door_array = np.zeros((width, height, 4), dtype=np.int8)
+    for door_key, state in doors.items():
+        (x1, y1), (x2, y2) = sorted(door_key)
+        direction = (x2 - x1, y2 - y1)
+        if direction not in DIRECTIONS:
+            continue
+        side = DIRECTIONS.index(direction)
+        door_array[x1, y1, side] = DOOR_CODES[state]
+        door_array[x2, y2, (side + 2) % 4] = DOOR_CODES[state]
+    return door_array
+
+
+def distance_field(walls, door_array, start, door_cost=1, step_cost=1, enter_costs=None):
+    """Cost of reaching every cell from start with the same rules as FireRescueAgent.a_star.
+
+    Walls block movement unless there is a door on that side, and closed doors
+    cost door_cost extra. Every move costs step_cost, plus enter_costs[cell] of
+    the cell entered when given. Unreachable cells are left as infinity.
+    """
+    width, height = walls.shape
+    distances = np.full((width, height), np.inf)
+    distances[start] = 0
+
+    open_set = [(0, start)]
+    while open_set:
+        cost, (x, y) = heapq.heappop(open_set)
+        if cost > distances[x, y]:
+            continue
+
+        wall_value = int(walls[x, y])
+        for side in range(4):
+            dx, dy = DIRECTIONS[side]
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+
+            door_state = door_array[x, y, side]
+            if door_state == NO_DOOR and wall_value & WALL_BITS[side]:
+                continue
+
+            new_cost = cost + step_cost + (door_cost if door_state == DOOR_CLOSED else 0)
+            if enter_costs is not None:
+                new_cost += enter_costs[nx, ny]
+            if new_cost < distances[nx, ny]:
+                distances[nx, ny] = new_cost
+                heapq.heappush(open_set, (new_cost, (nx, ny)))
+
+    return distances
+
+
+class Observation:
+    """Read-only, array-backed view of the board for one agent decision.
+
+    fires, points_of_interest and walls are views on the model arrays indexed
+    [x, y]; doors holds the door state of every side of every cell. The
+    distance field from the agent is only computed when it is first used.
+    """
+
+    def __init__(self, model, agent):
+        self.position = agent.pos
+        self.stored_ap = agent.storedAP
+        self.has_victim = agent.hasVictim
+        self.is_rescuer = agent.is_rescuer
+        self.fires = read_only(model.fires.data)
+        self.points_of_interest = read_only(model.points_of_interest.data)
+        self.walls = read_only(model.walls)
+        self.doors = read_only(build_door_array(model.doors, model.width, model.height))
+        self.exits = tuple(model.entry_points)
+        # Victims among the unrevealed points of interest, from counters every player knows. A new
+        # point of interest can land on a hidden one and replace it, so this is an upper bound
+        carried = sum(1 for other in model.agent_list if other.hasVictim)
+        self.hidden_victims = max(model.max_victims - model.victims - model.people_rescued - model.people_lost
+                                  - carried, 0)
+        self.board_hash = model.zobrist.board  # Zobrist hash of walls, damage, doors, fires and points of interest
+        self._door_cost = agent.COST_OPEN_DOOR
+        self._distances = None
+
+    @property
+    def distances(self):
+        if self._distances is None:
+            self._distances = read_only(distance_field(self.walls, self.doors, self.position, self._door_cost))
+        return self._distances
+
+    def is_exit(self, pos):
+        return pos in self.exits
+
+    def is_victim_at(self, pos):
+        return self.points_of_interest[pos] == 'v'
+
+    def is_poi_at(self, pos):
+        return self.points_of_interest[pos] in ('v', 'f')
+
+
+class Policy:
+    """Decides what an agent does next.
+
+    decide() receives the agent and an Observation and returns a list of actions
+    that the agent applies in order; an empty list ends the agent's turn.
+    Actions are tuples:
+
+        ('move', pos), ('extinguish_fire', pos), ('extinguish_smoke', pos),
+        ('pick_up_victim',), ('drop_victim',), ('reveal_poi',)
+    """
+
+    def start_turn(self, agent):
+        # Called when the agent starts its turn, before its first decision
+        pass
+
+    def decide(self, agent, observation):
+        raise NotImplementedError
+
+
+class DefaultPolicy(Policy):
+    # The original behavior: the rescuer goes for victims and exits, the rest fight fires
+
+    def decide(self, agent, observation):
+        if observation.is_rescuer:
+            return self.rescuer_actions(agent, observation)
+        return self.non_rescuer_actions(agent, observation)
+
+    def rescuer_actions(self, agent, observation):
+        pos = observation.position
+        if observation.has_victim:
+            # Check if at exit
+            if observation.is_exit(pos):
+                return [('drop_victim',)]
+
+            # Move towards nearest exit
+            target_pos = agent.find_nearest_exit()
+            if target_pos:
+                path, _ = agent.a_star(pos, target_pos)
+                if len(path) > 1:
+                    next_step = path[1]
+                    move_cost = agent.get_move_ap_cost(pos, next_step)
+                    if observation.stored_ap >= move_cost:
+                        # After moving, drop the victim if the step reached an exit
+                        if observation.is_exit(next_step):
+                            return [('move', next_step), ('drop_victim',)]
+                        return [('move', next_step)]
+        else:
+            # Check for victim or POI at current cell
+            if observation.is_victim_at(pos):
+                return [('pick_up_victim',)]
+            elif observation.is_poi_at(pos):
+                return [('reveal_poi',)]
+
+            # Move towards nearest victim or POI
+            target_pos = agent.find_nearest_poi()
+            if target_pos:
+                path, _ = agent.a_star(pos, target_pos)
+                if len(path) > 1:
+                    next_step = path[1]
+                    move_cost = agent.get_move_ap_cost(pos, next_step)
+                    if observation.stored_ap >= move_cost:
+                        return [('move', next_step)]
+            else:
+                print(f"[Agent {agent.unique_id}] No victims or POIs left to rescue.")
+        return []
+
+    def non_rescuer_actions(self, agent, observation):
+        fireAssigned = False
+        if not agent.target_fire:
+            fireAssigned = agent.assign_fire_target()
+
+        if not agent.target_fire and not fireAssigned and not agent.target_smoke:
+            agent.assign_smoke_target()
+
+        if agent.target_fire and observation.stored_ap >= agent.COST_MOVE:
+            return self.approach_target(agent, observation, agent.target_fire, agent.COST_EXTINGUISH_FIRE, 'fire')
+        elif agent.target_smoke and observation.stored_ap >= agent.COST_MOVE:
+            return self.approach_target(agent, observation, agent.target_smoke, agent.COST_EXTINGUISH_SMOKE, 'smoke')
+        return []
+
+    def approach_target(self, agent, observation, target, extinguish_cost, label):
+        pos = observation.position
+        path, total_cost = agent.a_star(pos, target)
+        if len(path) > 1:
+            next_step = path[1]
+            move_cost = agent.get_move_ap_cost(pos, next_step)
+            if agent.hazard_pathfinding:
+                # The path cost includes hazard risk, the AP check needs the AP actually spent
+                total_cost = agent.get_path_ap_cost(path)
+            # Estimate total cost to reach and extinguish the target
+            total_action_cost = total_cost + extinguish_cost
+            if observation.stored_ap >= total_action_cost:
+                return [('move', next_step)]
+
+            # Decide whether to wait and accumulate AP or move closer
+            remaining_AP_after_move = observation.stored_ap - move_cost
+            if remaining_AP_after_move >= agent.MIN_AP_TO_ACT:
+                # Move closer to avoid wasting AP
+                return [('move', next_step)]
+
+            print(f"[Agent {agent.unique_id}] Not enough AP to reach {label}. Waiting to accumulate AP.")
+        return []
@@ -0,0 +1,102 @@
+import sys
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PhaseStats:
+    def __init__(self, max_samples):
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.allocated_blocks = 0
+        self.samples = deque(maxlen=max_samples)  # Most recent per-call timings
+
+    def add(self, elapsed, allocated_blocks):
+        self.calls += 1
+        self.total_time += elapsed
+        self.allocated_blocks += allocated_blocks
+        if elapsed > self.max_time:
+            self.max_time = elapsed
+        self.samples.append(elapsed)
+
+    def to_dict(self):
+        samples = sorted(self.samples)
+        return {
+            'calls': self.calls,
+            'total_ms': self.total_time * 1e3,
+            'mean_us': self.total_time / self.calls * 1e6 if self.calls else None,
+            'p50_us': samples[len(samples) // 2] * 1e6 if samples else None,
+            'max_us': self.max_time * 1e6,
+            'allocated_blocks': self.allocated_blocks,
+            'recent_us': [sample * 1e6 for sample in self.samples]
+        }
+
+
+class PhaseProfiler:
+    """Collects timings, call counters and allocations for the phases of a turn.
+
+    Allocations are the net number of memory blocks allocated by the interpreter
+    while the phase ran (sys.getallocatedblocks), which is cheap enough to keep on.
+    """
+
+    def __init__(self, track_allocations=True, max_samples=1000, max_turns=1000):
+        self.track_allocations = track_allocations
+        self.max_samples = max_samples
+        self.phases = {}
+        self.counters = {}
+        self.turn_counters = {}
+        self.turns = deque(maxlen=max_turns)  # Counters of the most recent turns
+
+    @contextmanager
+    def phase(self, name):
+        blocks_before = sys.getallocatedblocks() if self.track_allocations else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks_before if self.track_allocations else 0
+
+            stats = self.phases.get(name)
+            if stats is None:
+                stats = PhaseStats(self.max_samples)
+                self.phases[name] = stats
+            stats.add(elapsed, blocks)
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+        self.turn_counters[name] = self.turn_counters.get(name, 0) + amount
+
+    def end_turn(self):
+        self.turns.append(self.turn_counters)
+        self.turn_counters = {}
+
+    def reset(self):
+        self.phases = {}
+        self.counters = {}
+        self.turn_counters = {}
+        self.turns.clear()
+
+    def report(self, include_samples=False):
+        phases = {}
+        for name, stats in self.phases.items():
+            phases[name] = stats.to_dict()
+            if not include_samples:
+                del phases[name]['recent_us']
+
+        # Average of every counter over the recorded turns
+        per_turn = {}
+        for counters in self.turns:
+            for name, value in counters.items():
+                per_turn[name] = per_turn.get(name, 0) + value
+        if self.turns:
+            per_turn = {name: value / len(self.turns) for name, value in per_turn.items()}
+
+        return {
+            'phases': phases,
+            'counters': dict(self.counters),
+            'turns_recorded': len(self.turns),
+            'per_turn_mean': per_turn,
+            'recent_turns': list(self.turns)[-10:]
+        }
@@ -0,0 +1,198 @@
+"""Bounded, sampled recording of game metrics.
+
+A TurnRecorder is attached to a game (FireRescueGame(recorder=...)) and is
+called at the end of every turn. It keeps every `every`-th turn, holds at most
+`capacity` recent rows in memory (a ring buffer) and, when an output path is
+given, streams the rows to disk in columnar chunks: NumPy .npz files in a
+directory, or a Parquet file when the path ends in .parquet (needs pyarrow).
+
+    recorder = TurnRecorder(['fires', 'damage_points', 'people_rescued'], every=10, output='runs/')
+    play_game(seed=1, recorder=recorder)
+    recorder.close()
+    data = load_npz_chunks('runs/')
+"""
+import glob
+import os
+from collections import deque
+
+import numpy as np
+
+# Model-level metrics that can be selected by name
+REPORTERS = {
+    'seed': lambda model: -1 if model._seed is None else model._seed,
+    'fires': lambda model: int(np.count_nonzero(model.fires.data == 1)),
+    'smoke': lambda model: int(np.count_nonzero(model.fires.data == 0.5)),
+    'points_of_interest': lambda model: int(np.count_nonzero(model.points_of_interest.data != '')),
+    'damage_points': lambda model: model.damage_points,
+    'people_rescued': lambda model: model.people_rescued,
+    'people_lost': lambda model: model.people_lost,
+    'agent_positions': lambda model: np.array([agent.pos for agent in model.agent_list], dtype=np.int16),
+    'state_hash': lambda model: model.state_hash
+}
+
+DEFAULT_REPORTERS = ['seed', 'fires', 'smoke', 'damage_points', 'people_rescued', 'people_lost']
+
+
+def chunk_number(path):
+    return int(os.path.basename(path)[len('chunk_'):-len('.npz')])
+
+
+def chunk_paths(directory):
+    # Chunk files in the order they were written
+    return sorted(glob.glob(os.path.join(directory, 'chunk_*.npz')), key=chunk_number)
+
+
+class NpzChunkWriter:
+    # Every flush becomes one chunk_NNNNN.npz file in the directory. A directory that
+    # already has chunks is appended to: numbering goes on after the last one
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        existing = chunk_paths(directory)
+        self.chunks = chunk_number(existing[-1]) + 1 if existing else 0
+
+    def write(self, columns):
+        path = os.path.join(self.directory, f"chunk_{self.chunks:05d}.npz")
+        np.savez(path, **columns)
+        self.chunks += 1
+
+    def close(self):
+        pass
+
+
+class ParquetChunkWriter:
+    # Every flush becomes one row group of the same Parquet file
+    def __init__(self, path):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Writing Parquet files needs pyarrow, use a directory for .npz chunks instead.")
+        self.pyarrow = pyarrow
+        self.path = path
+        self.writer = None
+
+    def write(self, columns):
+        arrays = {}
+        for name, values in columns.items():
+            if values.ndim > 1:
+                # Array-valued columns (agent positions) become list columns
+                values = values.reshape(len(values), -1).tolist()
+            arrays[name] = self.pyarrow.array(values)
+        table = self.pyarrow.table(arrays)
+
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def open_writer(output):
+    if output.endswith('.parquet'):
+        return ParquetChunkWriter(output)
+    return NpzChunkWriter(output)
+
+
+def load_npz_chunks(directory):
+    """Concatenates the chunks written by NpzChunkWriter into one array per column."""
+    columns = {}
+    for path in chunk_paths(directory):
+        with np.load(path) as chunk:
+            for name in chunk.files:
+                columns.setdefault(name, []).append(chunk[name])
+    return {name: np.concatenate(values) for name, values in columns.items()}
+
+
+class TurnRecorder:
+    """Records the selected reporters every `every` turns.
+
+    reporters is a list of names from REPORTERS or a dict of name -> function(model).
+    Rows always have a 'turn' column (turns since the game started). Memory use
+    is bounded by capacity (the most recent rows kept for inspection) plus
+    chunk_size (rows waiting to be written when there is an output).
+
+    With dedupe, a turn whose state (model.state_hash) is the same as one of
+    the last `capacity` recorded turns is skipped, e.g. when the same seeds are
+    replayed into one recorder.
+    """
+
+    def __init__(self, reporters=None, every=1, capacity=10000, output=None, chunk_size=1000, dedupe=False):
+        if reporters is None:
+            reporters = DEFAULT_REPORTERS
+        if not isinstance(reporters, dict):
+            reporters = {name: REPORTERS[name] for name in reporters}
+
+        self.reporters = reporters
+        self.every = max(1, every)
+        self.chunk_size = chunk_size
+        self.columns = ['turn'] + list(reporters)
+        self.recent = {name: deque(maxlen=capacity) for name in self.columns}
+        self.pending = {name: [] for name in self.columns}
+        self.writer = open_writer(output) if output else None
+        self.dedupe = dedupe
+        self.recent_hashes = deque(maxlen=capacity)
+        self.seen_hashes = set()
+
+        self.rows_recorded = 0
+        self.duplicates_skipped = 0
+        self._model = None
+        self._turn = 0
+
+    def record(self, model):
+        # Turns are counted per game, a new model starts again at 0
+        if model is not self._model:
+            self._model = model
+            self._turn = 0
+        turn = self._turn
+        self._turn += 1
+        if turn % self.every:
+            return
+
+        if self.dedupe:
+            state_hash = model.state_hash
+            if state_hash in self.seen_hashes:
+                self.duplicates_skipped += 1
+                return
+            if len(self.recent_hashes) == self.recent_hashes.maxlen:
+                self.seen_hashes.discard(self.recent_hashes[0])
+            self.recent_hashes.append(state_hash)
+            self.seen_hashes.add(state_hash)
+
+        row = {'turn': turn}
+        for name, reporter in self.reporters.items():
+            row[name] = reporter(model)
+
+        for name, value in row.items():
+            self.recent[name].append(value)
+        self.rows_recorded += 1
+
+        if self.writer is not None:
+            for name, value in row.items():
+                self.pending[name].append(value)
+            if len(self.pending['turn']) >= self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        if self.writer is None or not self.pending['turn']:
+            return
+        self.writer.write({name: np.array(values) for name, values in self.pending.items()})
+        self.pending = {name: [] for name in self.columns}
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+    def to_arrays(self):
+        """The rows kept in memory as one NumPy array per column."""
+        return {name: np.array(values) for name, values in self.recent.items()}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
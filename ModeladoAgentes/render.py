@@ -0,0 +1,183 @@
+"""Fast ASCII rendering of the board.
+
+The map printed by FireRescueGame.print_map is built here from whole arrays
+instead of cell by cell: the wall bits, a door array filled from the doors
+dict, the fires, the points of interest and a mask of agent cells are turned
+into codes with NumPy and looked up in small tables of characters, writing
+every row of the frame at once. A board of 100x100 cells renders in about a
+millisecond.
+
+For watching a game in a terminal, update() returns only the rows that
+changed since the previous frame, with ANSI escapes to rewrite them in place:
+
+    renderer = BoardRenderer(model)
+    text = renderer.render(model.walls.T, model.fires.data.T)
+    sys.stdout.write(renderer.update())
+
+    python render.py --seed 3 --tiles 4 4 --interval 0.05
+"""
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from agent import FireRescueAgent
+from util import tile_layout
+
+# Wall codes: 0 no wall, 1 wall, 2 open door, 3 closed door, 4 destroyed door
+DOOR_CODES = {'open': 1, 'closed': 2, 'destroyed': 3}
+TOP_SEGMENTS = np.frombuffer(b'   ---' b' O  D  X ', dtype=np.uint8).reshape(5, 3)
+LEFT_CHARS = np.frombuffer(b' |ODX', dtype=np.uint8)
+# Cell codes: 0 empty, 1 fire, 2 smoke, 3 victim, 4 false alarm, 5 agent
+CELL_SEGMENTS = np.frombuffer(b'   ' b' F  S  V  B  A ', dtype=np.uint8).reshape(6, 3)
+PLUS, PIPE, SPACE, NEWLINE = b'+| \n'
+
+
+class BoardRenderer:
+    def __init__(self, model):
+        self.model = model
+        self.frame = None           # Last frame, rows of bytes ending in a newline
+        self.shown = None           # Frame on the terminal, for update()
+        self.doors = None
+        self.doors_version = None
+
+    def door_arrays(self, height, width):
+        # Doors only change with the topology, like the walls
+        version = (self.model.zobrist.topology, height, width)
+        if version != self.doors_version:
+            self.doors = self.door_codes(height, width)
+            self.doors_version = version
+        return self.doors
+
+    def door_codes(self, height, width):
+        # Door on the top wall and on the left wall of every cell, by [y, x]
+        top = np.zeros((height, width), dtype=np.int8)
+        left = np.zeros((height, width), dtype=np.int8)
+        for door_key, state in self.model.doors.items():
+            (x1, y1), (x2, y2) = sorted(door_key)
+            code = DOOR_CODES.get(state, 0)
+            if x1 == x2 and y2 == y1 + 1 and 0 <= x1 < width and 0 < y2 < height:
+                top[y2, x1] = code
+            elif y1 == y2 and x2 == x1 + 1 and 0 < x2 < width and 0 <= y1 < height:
+                left[y1, x2] = code
+        return top, left
+
+    def cell_codes(self, fires_array):
+        height, width = fires_array.shape
+        points_of_interest = self.model.points_of_interest.data.T
+        agents = np.zeros((height, width), dtype=bool)
+        for (x, y), contents in self.model.grid.cells.items():
+            if any(isinstance(agent, FireRescueAgent) for agent in contents):
+                agents[y, x] = True
+        # Later assignments win: fire, then smoke, victims, false alarms and agents
+        codes = np.zeros((height, width), dtype=np.int8)
+        codes[agents] = 5
+        codes[points_of_interest == 'f'] = 4
+        codes[points_of_interest == 'v'] = 3
+        codes[fires_array == 0.5] = 2
+        codes[fires_array == 1] = 1
+        return codes
+
+    def build(self, walls_array, fires_array):
+        """The frame as a (2 * height + 1, 4 * width + 2) array of bytes."""
+        height, width = walls_array.shape
+        walls = np.asarray(walls_array).astype(np.int64)
+        top_doors, left_doors = self.door_arrays(height, width)
+        frame = np.empty((2 * height + 1, 4 * width + 2), dtype=np.uint8)
+
+        # Wall rows: '+' and the top wall of every cell, the last one shows the bottom walls without doors
+        wall_rows = np.empty((height + 1, width, 4), dtype=np.uint8)
+        wall_rows[:, :, 0] = PLUS
+        wall_rows[:height, :, 1:] = TOP_SEGMENTS[((walls & 8) != 0) * (1 + top_doors)]
+        wall_rows[height, :, 1:] = TOP_SEGMENTS[(walls[height - 1] & 2) >> 1]
+        frame[0::2, :-2] = wall_rows.reshape(height + 1, 4 * width)
+        frame[0::2, -2] = PLUS
+
+        # Cell rows: the left wall and the contents of every cell, then the right wall of the last one
+        cell_rows = np.empty((height, width, 4), dtype=np.uint8)
+        cell_rows[:, :, 0] = LEFT_CHARS[((walls & 4) != 0) * (1 + left_doors)]
+        cell_rows[:, :, 1:] = CELL_SEGMENTS[self.cell_codes(np.asarray(fires_array))]
+        frame[1::2, :-2] = cell_rows.reshape(height, 4 * width)
+        frame[1::2, -2] = np.where(walls[:, width - 1] & 1, PIPE, SPACE)
+
+        frame[:, -1] = NEWLINE
+        return frame
+
+    def render(self, walls_array, fires_array):
+        """The map as one string, the same text print_map prints."""
+        self.frame = self.build(walls_array, fires_array)
+        return self.frame.tobytes()[:-1].decode('ascii')
+
+    def update(self, walls_array=None, fires_array=None):
+        """ANSI escapes that turn the frame on the terminal into the current one.
+
+        The first frame (or one of another size) clears the screen, later ones
+        only move the cursor to the rows that changed and rewrite them.
+        """
+        if walls_array is not None:
+            self.render(walls_array, fires_array)
+        elif self.frame is None:
+            self.render(self.model.walls.T, self.model.fires.data.T)
+        frame, shown = self.frame, self.shown
+        self.shown = frame
+        if shown is None or shown.shape != frame.shape:
+            return '\x1b[H\x1b[2J' + frame.tobytes().decode('ascii')
+        rows = np.flatnonzero((frame != shown).any(axis=1))
+        parts = [f'\x1b[{row + 1};1H' + frame[row, :-1].tobytes().decode('ascii') for row in rows]
+        # Leave the cursor below the map
+        parts.append(f'\x1b[{len(frame) + 1};1H')
+        return ''.join(parts)
+
+
+def watch_game(seed=None, max_turns=10000, interval=0.1, every=1, output=None, **model_kwargs):
+    """Plays a game and redraws the changed rows of the map every `every` turns."""
+    # The game renders its map with this module
+    from game import FireRescueGame
+
+    output = output if output is not None else sys.stdout
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        model = FireRescueGame(seed=seed, **model_kwargs)
+    renderer = BoardRenderer(model)
+    turns = 0
+    while not model.simulationFinished and turns < max_turns:
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            model.step_one_agent()
+        turns += 1
+        if turns % every == 0 or model.simulationFinished:
+            output.write(renderer.update(model.walls.T, model.fires.data.T))
+            output.write(f"turn {turns}  damage {model.damage_points}  lost {model.people_lost}  "
+                         f"rescued {model.people_rescued}\x1b[K\n")
+            output.flush()
+            time.sleep(interval)
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch a game in the terminal.")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--map', default="House1.txt")
+    parser.add_argument('--tiles', type=int, nargs=2, metavar=('X', 'Y'),
+                        help="Repeat the map X by Y times")
+    parser.add_argument('--agents', type=int, default=6)
+    parser.add_argument('--rescuers', type=int, default=1)
+    parser.add_argument('--interval', type=float, default=0.1, help="Seconds between frames")
+    parser.add_argument('--every', type=int, default=1, help="Turns per frame")
+    parser.add_argument('--max-turns', type=int, default=10000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        map_file = args.map
+        if args.tiles:
+            map_file = os.path.join(directory, 'map.txt')
+            with open(map_file, 'w') as file:
+                file.write(tile_layout(args.map, *args.tiles))
+        watch_game(seed=args.seed, max_turns=args.max_turns, interval=args.interval, every=args.every,
+                   map_file=map_file, agents=args.agents, rescuers=args.rescuers)
+
+
+if __name__ == '__main__':
+    main()
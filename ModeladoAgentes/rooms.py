@@ -0,0 +1,230 @@
+"""Rooms and doors of the house, for hierarchical path search.
+
+Cells joined without a wall form a room, and doors (in any state) are the
+portals between rooms. RoomGraph labels every cell with its room and keeps,
+per room, the cost between its portal cells. A long path is then found on the
+small graph of portals first and refined inside every room it crosses.
+
+The portal costs inside a room are exact cheapest costs, so the cost found is
+the cost A* finds. Only the cells of one room are searched for them, and the
+table of a room is kept until that room changes. The model updates the graph:
+a destroyed wall merges the rooms on both sides, and a door changing state
+only changes the cost of crossing it.
+
+    rooms = RoomGraph()
+    path, cost, nodes_expanded = rooms.search(board, start, goal)
+    rooms.room_of(board, pos)
+"""
+import heapq
+
+from pathfinding import INF, WALL_BITS, heuristic
+
+
+class RoomGraph:
+    def __init__(self):
+        self.labels = None        # Room of every cell, by cell index
+        self.cells = {}           # Room -> list of its cells
+        self.portals = {}         # Room -> {portal cell: [cells across a door]}
+        self.tables = {}          # Room -> {portal cell: (costs, came_from) inside the room}
+        self.rebuilds = 0
+        self.tables_computed = 0
+
+    def copy(self):
+        rooms = RoomGraph()
+        if self.labels is not None:
+            rooms.labels = list(self.labels)
+            rooms.cells = {room: list(cells) for room, cells in self.cells.items()}
+            rooms.portals = {room: {cell: list(others) for cell, others in portals.items()}
+                             for room, portals in self.portals.items()}
+            rooms.tables = dict(self.tables)
+        return rooms
+
+    def build(self, board):
+        width = board.walls.shape[0]
+        self.labels = [None] * (width * board.height)
+        self.cells = {}
+        for x in range(width):
+            for y in range(board.height):
+                if self.labels[board.index((x, y))] is not None:
+                    continue
+                room = len(self.cells)
+                self.labels[board.index((x, y))] = room
+                cells = [(x, y)]
+                for cell in cells:
+                    wall_value = int(board.walls[cell])
+                    for side, neighbor in board.directional_neighbors[cell]:
+                        # Walls, with or without a door, separate rooms
+                        if not wall_value & WALL_BITS[side] and self.labels[board.index(neighbor)] is None:
+                            self.labels[board.index(neighbor)] = room
+                            cells.append(neighbor)
+                self.cells[room] = cells
+        self.portals = {room: {} for room in self.cells}
+        for door_key in board.doors:
+            self.add_portal(board, *door_key)
+        for room in self.portals:
+            self.sort_portals(room)
+        self.tables = {}
+        self.rebuilds += 1
+
+    def add_portal(self, board, cell1, cell2):
+        room1 = self.labels[board.index(cell1)]
+        room2 = self.labels[board.index(cell2)]
+        if room1 == room2:
+            return
+        for room, cell, other in ((room1, cell1, cell2), (room2, cell2, cell1)):
+            others = self.portals[room].setdefault(cell, [])
+            if other not in others:
+                others.append(other)
+
+    def sort_portals(self, room):
+        # Searches go through the portals in this order, so it must not depend on how the graph was updated
+        self.portals[room] = {cell: sorted(others) for cell, others in sorted(self.portals[room].items())}
+
+    def room_of(self, board, pos):
+        if self.labels is None:
+            self.build(board)
+        return self.labels[board.index(pos)]
+
+    def wall_destroyed(self, board, cell1, cell2):
+        """The wall between two cells fell: their rooms become one."""
+        if self.labels is None:
+            return
+        room1 = self.labels[board.index(cell1)]
+        room2 = self.labels[board.index(cell2)]
+        if room1 == room2:
+            # A shortcut inside the room, only its portal costs change
+            self.tables.pop(room1, None)
+            return
+        # Merge the smaller room into the bigger one
+        if len(self.cells[room1]) < len(self.cells[room2]):
+            room1, room2 = room2, room1
+        for cell in self.cells.pop(room2):
+            self.labels[board.index(cell)] = room1
+            self.cells[room1].append(cell)
+        portals = self.portals[room1]
+        for cell, others in self.portals.pop(room2).items():
+            portals[cell] = others
+        # Doors between the two rooms are now inside the merged room
+        for cell in list(portals):
+            portals[cell] = [other for other in portals[cell] if self.labels[board.index(other)] != room1]
+            if not portals[cell]:
+                del portals[cell]
+        self.sort_portals(room1)
+        self.tables.pop(room1, None)
+        self.tables.pop(room2, None)
+
+    def door_changed(self, board, cell1, cell2):
+        """A door opened, closed or broke: only the cost of crossing it changes."""
+        if self.labels is None:
+            return
+        room = self.labels[board.index(cell1)]
+        if room == self.labels[board.index(cell2)]:
+            # A door inside a room (its wall fell) is part of the room's costs
+            self.tables.pop(room, None)
+
+    def room_search(self, board, room, source):
+        """Cheapest costs from source to the cells of its room, moving inside the room."""
+        labels = self.labels
+        costs = {source: 0}
+        came_from = {source: None}
+        open_set = [(0, source)]
+        while open_set:
+            cost, current = heapq.heappop(open_set)
+            if cost > costs[current]:
+                continue
+            for neighbor in board.neighbors(current):
+                if labels[board.index(neighbor)] != room:
+                    continue
+                new_cost = cost + board.movement_cost(current, neighbor)
+                if new_cost < costs.get(neighbor, INF):
+                    costs[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    heapq.heappush(open_set, (new_cost, neighbor))
+        return costs, came_from
+
+    def portal_table(self, board, room):
+        # Costs from every portal cell of the room, kept until the room changes
+        table = self.tables.get(room)
+        if table is None:
+            table = {cell: self.room_search(board, room, cell) for cell in self.portals[room]}
+            self.tables[room] = table
+            self.tables_computed += 1
+        return table
+
+    def search(self, board, start, goal):
+        """Cheapest path as (path, cost, nodes expanded), like pathfinding.search_path.
+
+        Moves cost the same both ways here (no hazards), so the costs from the
+        goal inside its room are also the costs to the goal.
+        """
+        if self.labels is None:
+            self.build(board)
+        # The path ends on the goal as a cell of the board (plain ints), as with A*
+        goal = (int(goal[0]), int(goal[1]))
+        start_room = self.room_of(board, start)
+        goal_room = self.room_of(board, goal)
+        start_costs, start_came_from = self.room_search(board, start_room, start)
+        goal_costs, goal_came_from = self.room_search(board, goal_room, goal)
+
+        # A* over the portal cells; entries lead from a cell to the next one by a room walk or a door
+        g_score = {start: 0}
+        came_from = {start: None}
+        open_set = [(heuristic(start, goal), start)]
+        closed = set()
+        nodes_expanded = 0
+        while open_set:
+            current = heapq.heappop(open_set)[1]
+            if current in closed:
+                continue
+            closed.add(current)
+            nodes_expanded += 1
+            if current == goal:
+                break
+            current_g = g_score[current]
+            room = self.labels[board.index(current)]
+            if current == start:
+                costs = start_costs
+            else:
+                costs = self.portal_table(board, room)[current][0]
+            steps = [(cell, costs[cell], 'room') for cell in self.portals[room] if cell != current and cell in costs]
+            steps.extend((other, board.movement_cost(current, other), 'door')
+                         for other in self.portals[room].get(current, ()))
+            if room == goal_room and current in goal_costs:
+                steps.append((goal, goal_costs[current], 'room'))
+            for cell, step_cost, kind in steps:
+                tentative_g_score = current_g + step_cost
+                if tentative_g_score < g_score.get(cell, INF):
+                    g_score[cell] = tentative_g_score
+                    came_from[cell] = (current, kind)
+                    heapq.heappush(open_set, (tentative_g_score + heuristic(cell, goal), cell))
+
+        if goal not in closed:
+            return (), INF, nodes_expanded
+
+        # Refine: walk every room segment cell by cell
+        hops = [goal]
+        while came_from[hops[-1]] is not None:
+            hops.append(came_from[hops[-1]][0])
+        hops.reverse()
+        path = [start]
+        for origin, target in zip(hops, hops[1:]):
+            if came_from[target][1] == 'door':
+                path.append(target)
+            elif target == goal:
+                # Costs from the goal: follow them from origin towards the goal
+                cell = goal_came_from[origin]
+                while cell is not None:
+                    path.append(cell)
+                    cell = goal_came_from[cell]
+            else:
+                if origin == start:
+                    walk_came_from = start_came_from
+                else:
+                    walk_came_from = self.portal_table(board, self.labels[board.index(origin)])[origin][1]
+                segment = []
+                cell = target
+                while cell != origin:
+                    segment.append(cell)
+                    cell = walk_came_from[cell]
+                path.extend(reversed(segment))
+        return tuple(path), g_score[goal], nodes_expanded
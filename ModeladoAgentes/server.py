@@ -1,13 +1,80 @@
 from http.server import BaseHTTPRequestHandler, HTTPServer
 import logging
+import hashlib
 import json
+import threading
+import uuid
+from urllib.parse import urlparse, parse_qs
 
-from model import FireRescueModel
 from util import serialize_doors
 
-model = FireRescueModel()
+# Created on the first request (or by run), importing the module does no simulation work
+model = None
+# Extra FireRescueGame arguments set from the command line
+model_options = {}
+# Identifies the game being served, part of the layout ETag
+session_id = None
+# (ETag, JSON bytes) of the board as the game started, serialized once per session
+layout = None
+# Held while a request plays a turn, so the console renderer never reads a half-played turn
+model_lock = threading.Lock()
+# Optional console.ConsoleRenderer that prints the changes and the map in the background
+renderer = None
 
-model.print_map(model.walls.T, model.fires.data.T)
+
+def get_model():
+    if model is None:
+        # The server only needs the rules, the lean core keeps Mesa and pandas out of startup
+        from game import FireRescueGame
+        set_model(FireRescueGame(**model_options))
+    return model
+
+
+def set_model(new_model):
+    """Serves new_model as a new session, before any of its turns is played."""
+    global model, session_id, layout
+    model = new_model
+    session_id = uuid.uuid4().hex[:12]
+    # Serialized before any turn is played, viewers follow the game with the deltas of every turn
+    body = json.dumps(layout_data(model)).encode('utf-8')
+    layout = (f'"{session_id}-{hashlib.sha1(body).hexdigest()[:16]}"', body)
+
+
+def layout_data(model):
+    # The whole board, sent on the first POST and on GET /layout
+    return {
+        "damage_points": model.damage_points,
+        "people_lost": model.people_lost,
+        "people_rescued": model.people_rescued,
+        "width": model.width,
+        "height": model.height,
+        "walls": model.walls.tolist(),
+        "fires": model.fires.data.tolist(),
+        "points_of_interest": model.points_of_interest.data.tolist(),
+        "doors": serialize_doors(model.doors),
+        "entry_points": model.entry_points,
+        "agent_positions": model.get_all_agent_positions()
+    }
+
+
+def layout_response():
+    """(ETag, JSON bytes) of the initial layout, the ETag names the session and the map."""
+    current = get_model()
+    if layout is None:
+        # The model was assigned without set_model, start its session now
+        set_model(current)
+    return layout
+
+
+def etag_matches(if_none_match, etag):
+    # A comma-separated list of ETags (weak ones with W/) or *
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == '*' or candidate == etag:
+            return True
+    return False
 
 class Server(BaseHTTPRequestHandler):
     
@@ -16,29 +83,81 @@ class Server(BaseHTTPRequestHandler):
         self.send_header('Content-Type', 'application/json')
         self.end_headers()
         
+    def _send_json(self, data):
+        self._set_response()
+        self.wfile.write(json.dumps(data).encode('utf-8'))
+
+    def _profile_report(self, query):
+        model = get_model()
+        if model.profiler is None:
+            return {"enabled": False}
+        report = model.profiler.report(include_samples='samples' in query)
+        report["enabled"] = True
+        return report
+
+    def _send_layout(self):
+        etag, body = layout_response()
+        # Viewers that already have this layout get an empty 304
+        if etag_matches(self.headers.get('If-None-Match', ''), etag):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == '/profile':
+            self._send_json(self._profile_report(parse_qs(url.query, keep_blank_values=True)))
+            return
+        elif url.path == '/layout':
+            self._send_layout()
+            return
+        elif url.path == '/map':
+            model = get_model()
+            with model_lock:
+                text = model.render_map(model.walls.T, model.fires.data.T)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.end_headers()
+            self.wfile.write(text.encode('utf-8'))
+            return
+
         self._set_response()
         self.wfile.write("GET request for {}".format(self.path).encode('utf-8'))
 
     def do_POST(self):
+        model = get_model()
+        url = urlparse(self.path)
+        if url.path == '/profile/enable':
+            model.enable_profiling()
+            self._send_json({"enabled": True})
+            return
+        elif url.path == '/profile/disable':
+            model.disable_profiling()
+            self._send_json({"enabled": False})
+            return
+        elif url.path == '/profile/reset':
+            if model.profiler is not None:
+                model.profiler.reset()
+            self._send_json({"enabled": model.profiler is not None})
+            return
 
         if model.firstStep == True:
-            data = {
-                "damage_points": model.damage_points,
-                "people_lost": model.people_lost,
-                "people_rescued": model.people_rescued,
-                "width": model.width,
-                "height": model.height,
-                "walls": model.walls.tolist(),
-                "fires": model.fires.data.tolist(),
-                "points_of_interest": model.points_of_interest.data.tolist(),
-                "doors": serialize_doors(model.doors),
-                "entry_points": model.entry_points, 
-                "agent_positions": model.get_all_agent_positions()
-            }
+            # Same bytes as GET /layout, serialized once however many viewers start
             model.firstStep = False
+            self._set_response()
+            self.wfile.write(layout_response()[1])
+            return
         else:
-            model.step_one_agent()
+            with model_lock:
+                model.step_one_agent()
             data = {
                 "damage_points": model.damage_points,
                 "people_lost": model.people_lost,
@@ -55,8 +174,11 @@ class Server(BaseHTTPRequestHandler):
                 "actions": model.changes["actions"],
                 "simulation_finished": model.simulationFinished
             }
-            print(model.changes)
-            model.print_map(model.walls.T, model.fires.data.T)
+            if renderer is not None:
+                renderer.submit(model)
+            else:
+                print(model.changes)
+                model.print_map(model.walls.T, model.fires.data.T)
 
         json_data = json.dumps(data)
 
@@ -66,6 +188,8 @@ class Server(BaseHTTPRequestHandler):
 
 def run(server_class=HTTPServer, handler_class=Server, port=8585):
     logging.basicConfig(level=logging.INFO)
+    model = get_model()
+    model.print_map(model.walls.T, model.fires.data.T)
     server_address = ('', port)
     httpd = server_class(server_address, handler_class)
     logging.info("Starting httpd...\n") # HTTPD is HTTP Daemon!
@@ -74,10 +198,32 @@ def run(server_class=HTTPServer, handler_class=Server, port=8585):
     except KeyboardInterrupt:   # CTRL+C stops the server
         pass
     httpd.server_close()
+    if renderer is not None:
+        renderer.close()
     logging.info("Stopping httpd...\n")
 
 if __name__ == '__main__':
     from sys import argv
+
+    # --planner[=SECONDS] lets the rescuer plan ahead within SECONDS per turn (planner.py)
+    for arg in list(argv):
+        if arg.startswith('--planner'):
+            argv.remove(arg)
+            from planner import PlannerPolicy
+            model_options['policy'] = PlannerPolicy(time_budget=float(arg.partition('=')[2] or 0.05))
+
+    # --render-interval[=SECONDS] prints the changes and the map from a background thread,
+    # at most one map every SECONDS; the map is also served on GET /map
+    for arg in list(argv):
+        if arg.startswith('--render-interval'):
+            argv.remove(arg)
+            from console import ConsoleRenderer
+            renderer = ConsoleRenderer(model_lock, interval=float(arg.partition('=')[2] or 0.5))
+
+    # --profile turns on the per-phase profiler, the report is served on GET /profile
+    if '--profile' in argv:
+        argv.remove('--profile')
+        get_model().enable_profiling()
     
     if len(argv) == 2:
         run(port=int(argv[1]))
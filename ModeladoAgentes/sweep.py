@@ -0,0 +1,207 @@
+"""Parallel parameter sweeps over GameConfig settings.
+
+Every combination of the grid values is played on the same seeds in worker
+processes. Each finished game is appended as one JSON line to the output file
+as soon as it arrives, so an interrupted sweep is resumed by running the same
+command again: games already in the file are skipped.
+
+    python sweep.py --grid agents=4,5,6 rescuers=1,2 --seeds 200 --output sweep.jsonl
+    python sweep.py --summary sweep.jsonl
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from config import DEFAULTS, GameConfig
+from game import play_game
+
+Z_95 = 1.96
+
+
+def wilson_interval(victories, games, z=Z_95):
+    # 95% interval of a win rate, also right near 0 and 1 where the normal approximation is not
+    if games == 0:
+        return 0.0, 1.0
+    rate = victories / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    half_width = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+
+def expand_grid(grid, base=None):
+    """Every combination of the grid values ({setting: [values]}) as a GameConfig."""
+    base = base or GameConfig()
+    names = list(grid)
+    return [base.replace(**dict(zip(names, values))) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def parse_grid(items):
+    # "agents=4,5,6" -> {'agents': [4, 5, 6]}, values are read as JSON when possible
+    grid = {}
+    for item in items:
+        name, _, values = item.partition('=')
+        if name not in DEFAULTS:
+            raise ValueError(f"Unknown game setting '{name}'.")
+        parsed = []
+        for value in values.split(','):
+            try:
+                parsed.append(json.loads(value))
+            except ValueError:
+                parsed.append(value)
+        grid[name] = parsed
+    return grid
+
+
+def play_games(config_values, seeds, max_turns):
+    # Worker: plays one configuration on a few seeds with the model output silenced
+    config = GameConfig(**config_values)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        return [play_game(seed=seed, max_turns=max_turns, config=config) for seed in seeds]
+
+
+def load_results(path):
+    """Results already in the file; a line cut off by an interruption is dropped from the file."""
+    if not os.path.exists(path):
+        return []
+
+    with open(path, 'rb+') as file:
+        data = file.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            file.truncate(end)
+
+    results = []
+    for line in data[:end].decode('utf-8').splitlines():
+        if line.strip():
+            results.append(json.loads(line))
+    return results
+
+
+def pending_tasks(configs, seeds, output, seeds_per_task=10):
+    """(config, seeds) tasks for the games that are not in the output file yet."""
+    seeds = list(seeds)
+    done = {(result['config_key'], result['seed']) for result in load_results(output)}
+
+    tasks = []
+    for config in configs:
+        missing = [seed for seed in seeds if (config.key(), seed) not in done]
+        for start in range(0, len(missing), seeds_per_task):
+            tasks.append((config, missing[start:start + seeds_per_task]))
+    return tasks
+
+
+def write_results(file, config, results):
+    # One JSON line per game, tagged with the configuration
+    for result in results:
+        result['config_key'] = config.key()
+        result['config'] = config.changes()
+        file.write(json.dumps(result) + '\n')
+    file.flush()
+
+
+def run_sweep(configs, seeds, output, processes=None, max_turns=10000, seeds_per_task=10, new_results=None):
+    """Plays every config on every seed, appending one line per game to output.
+
+    Returns the number of games played in this call (games found in output are
+    skipped). The results of those games are also appended to new_results if given.
+    """
+    tasks = pending_tasks(configs, seeds, output, seeds_per_task)
+
+    played = 0
+    with open(output, 'a') as file:
+        def write(config, results):
+            write_results(file, config, results)
+            if new_results is not None:
+                new_results.extend(results)
+            return len(results)
+
+        if processes == 1:
+            for config, task_seeds in tasks:
+                played += write(config, play_games(config.to_dict(), task_seeds, max_turns))
+            return played
+
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            # Only a few tasks in flight at a time, so huge grids do not queue everything up front
+            max_pending = (processes or os.cpu_count() or 1) * 2
+            pending = {}
+            tasks = iter(tasks)
+            while True:
+                for config, task_seeds in itertools.islice(tasks, max_pending - len(pending)):
+                    future = executor.submit(play_games, config.to_dict(), task_seeds, max_turns)
+                    pending[future] = config
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    played += write(pending.pop(future), future.result())
+
+    return played
+
+
+def summarize_sweep(results):
+    """Win rate (with a 95% interval), game length and rescued victims per configuration."""
+    by_config = {}
+    for result in results:
+        entry = by_config.setdefault(result['config_key'], {'config': result['config'], 'games': []})
+        entry['games'].append(result)
+
+    summary = []
+    for key, entry in by_config.items():
+        games = len(entry['games'])
+        victories = sum(1 for game in entry['games'] if game['victory'])
+        win_rate = victories / games
+        summary.append({
+            'config_key': key,
+            'config': entry['config'],
+            'games': games,
+            'win_rate': win_rate,
+            'ci95': list(wilson_interval(victories, games)),
+            'mean_turns': float(np.mean([game['turns'] for game in entry['games']])),
+            'mean_rescued': float(np.mean([game['people_rescued'] for game in entry['games']]))
+        })
+
+    summary.sort(key=lambda entry: entry['win_rate'], reverse=True)
+    return summary
+
+
+def print_summary(summary):
+    for entry in summary:
+        settings = ', '.join(f"{name}={value}" for name, value in entry['config'].items()) or 'classic rules'
+        print(f"{entry['win_rate']:.3f} [{entry['ci95'][0]:.3f}, {entry['ci95'][1]:.3f}] "
+              f"over {entry['games']} games, mean turns {entry['mean_turns']:.1f}: {settings}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep game settings over seeds in parallel, resumable.")
+    parser.add_argument('--grid', nargs='*', default=[], help="Settings to sweep, e.g. agents=4,5,6 max_ap=8,10")
+    parser.add_argument('--seeds', type=int, default=100, help="Seeds per configuration")
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--output', default="sweep.jsonl")
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--max-turns', type=int, default=10000)
+    parser.add_argument('--summary', help="Only summarize an existing results file")
+    args = parser.parse_args()
+
+    if args.summary:
+        print_summary(summarize_sweep(load_results(args.summary)))
+        return
+
+    configs = expand_grid(parse_grid(args.grid))
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    played = run_sweep(configs, seeds, args.output, processes=args.processes, max_turns=args.max_turns)
+    print(f"Played {played} games ({len(configs)} configurations x {len(seeds)} seeds), results in {args.output}")
+
+    # Summary of everything in the file for the swept configurations
+    keys = {config.key() for config in configs}
+    print_summary(summarize_sweep([result for result in load_results(args.output) if result['config_key'] in keys]))
+
+
+if __name__ == '__main__':
+    main()
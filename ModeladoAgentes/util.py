@@ -1,5 +1,8 @@
+import os
 import numpy as np
 
+MAPS_DIR = os.path.dirname(os.path.abspath(__file__))
+
 def leer_archivo(archivo):
     with open(archivo, 'r') as file:
         return file.read()
@@ -64,35 +67,54 @@ def _serialize_door_position(door_key):
 
         return [list(cell) for cell in sorted_positions]
 
+def is_wall_line(line):
+    parts = line.split()
+    return len(parts) > 0 and all(len(part) == 4 and set(part) <= {'0', '1'} for part in parts)
+
 def get_game_variables(archivo):
-    contenido = leer_archivo(archivo).strip().split("\n")
+    # Map names are looked up next to this file when they are not found from the working directory
+    if not os.path.exists(archivo):
+        archivo = os.path.join(MAPS_DIR, archivo)
+    return parse_game_variables(leer_archivo(archivo))
+
+def parse_game_variables(texto):
+    contenido = [line.strip() for line in texto.strip().split("\n") if line.strip()]
     index = 0
 
-    walls = np.zeros((10, 8))
-    for row in range(6):
-        line = contenido[index].strip()
-        for part in range(len(line.split())):
-            wall = binary_to_decimal(line.split()[part])
-            walls[part + 1, row + 1] = wall
+    # The wall rows define the size of the house, the outside ring is added around it
+    wall_rows = []
+    while index < len(contenido) and is_wall_line(contenido[index]):
+        wall_rows.append(contenido[index].split())
         index += 1
+
+    rows = len(wall_rows)
+    columns = len(wall_rows[0])
+    width = columns + 2
+    height = rows + 2
+
+    walls = np.zeros((width, height))
+    for row in range(rows):
+        for part in range(len(wall_rows[row])):
+            wall = binary_to_decimal(wall_rows[row][part])
+            walls[part + 1, row + 1] = wall
     
-    for x in range(10):
+    for x in range(width):
         walls[x, 0] = 2
     
-    for x in range(10):
-        walls[x, 7] = 8
+    for x in range(width):
+        walls[x, height - 1] = 8
     
-    for y in range(8):
+    for y in range(height):
         walls[0, y] = 1
 
-    for y in range(8):
-        walls[9, y] = 4
+    for y in range(height):
+        walls[width - 1, y] = 4
     
     # Casos de esquinas
     walls[0, 0] = 0
-    walls[9, 0] = 0
-    walls[0, 7] = 0
-    walls[9, 7] = 0
+    walls[width - 1, 0] = 0
+    walls[0, height - 1] = 0
+    walls[width - 1, height - 1] = 0
 
     damage = np.empty_like(walls, dtype=object)
     damage.fill((0, 0, 0, 0))
@@ -100,9 +122,8 @@ def get_game_variables(archivo):
     points_of_interest = []
     total_victims = 0
     total_false_alarms = 0
-    for _ in range(3):
-        line = contenido[index].strip()
-        parts = line.split()
+    while index < len(contenido) and len(contenido[index].split()) == 3:
+        parts = contenido[index].split()
         y = int(parts[0])
         x = int(parts[1])
         poi_type = parts[2]
@@ -115,20 +136,16 @@ def get_game_variables(archivo):
 
         index += 1
 
-    
-    fires = []
-    for _ in range(10):
-        line = contenido[index].strip()
-        parts = line.split()
-        y = int(parts[0])
-        x = int(parts[1])
-        fires.append({'x': x, 'y': y})
+    # Fires and entry points share the same "y x" format, the door lines split them
+    pairs_before_doors = []
+    while index < len(contenido) and len(contenido[index].split()) == 2:
+        parts = contenido[index].split()
+        pairs_before_doors.append((int(parts[0]), int(parts[1])))
         index += 1
 
     doors = {}
-    for _ in range(8):
-        line = contenido[index].strip()
-        parts = line.split()
+    while index < len(contenido) and len(contenido[index].split()) == 4:
+        parts = contenido[index].split()
         y1 = int(parts[0])
         x1 = int(parts[1])
         y2 = int(parts[2])
@@ -138,14 +155,82 @@ def get_game_variables(archivo):
         door_key = frozenset([cell1, cell2])
         doors[door_key] = 'closed'  
         index += 1
-    
-    entry_points = []
-    for _ in range(4):
-        line = contenido[index].strip()
-        parts = line.split()
-        y = int(parts[0])
-        x = int(parts[1])
-        entry_points.append((x, y))
+
+    entry_pairs = []
+    while index < len(contenido) and len(contenido[index].split()) == 2:
+        parts = contenido[index].split()
+        entry_pairs.append((int(parts[0]), int(parts[1])))
         index += 1
 
-    return walls, damage, points_of_interest, fires, doors, entry_points, total_victims, total_false_alarms
\ No newline at end of file
+    if not doors:
+        # Without doors the last four pairs are the entry points, like in the classic board
+        entry_pairs = pairs_before_doors[-4:]
+        pairs_before_doors = pairs_before_doors[:-4]
+
+    fires = [{'x': x, 'y': y} for (y, x) in pairs_before_doors]
+    entry_points = [(x, y) for (y, x) in entry_pairs]
+
+    return walls, damage, points_of_interest, fires, doors, entry_points, total_victims, total_false_alarms
+
+def tile_layout(archivo, tiles_x, tiles_y):
+    """Builds a bigger layout by repeating a map tiles_x by tiles_y times.
+
+    Entry points that end up between two copies of the house are turned into
+    closed doors to the neighbouring copy so the whole building stays connected.
+    Returns the layout as text in the same format as the map files.
+    """
+    contenido = [line.strip() for line in leer_archivo(archivo).strip().split("\n") if line.strip()]
+    walls, _, points_of_interest, fires, doors, entry_points, _, _ = parse_game_variables("\n".join(contenido))
+    columns = walls.shape[0] - 2
+    rows = walls.shape[1] - 2
+    wall_rows = [line.split() for line in contenido[:rows]]
+
+    lines = []
+    for _ in range(tiles_y):
+        for row in wall_rows:
+            lines.append(' '.join(row * tiles_x))
+
+    new_pois = []
+    new_fires = []
+    new_doors = []
+    new_entries = []
+    for tile_y in range(tiles_y):
+        for tile_x in range(tiles_x):
+            offset_x = tile_x * columns
+            offset_y = tile_y * rows
+
+            for poi in points_of_interest:
+                new_pois.append(f"{poi['y'] + offset_y} {poi['x'] + offset_x} {poi['type']}")
+
+            for fire in fires:
+                new_fires.append(f"{fire['y'] + offset_y} {fire['x'] + offset_x}")
+
+            for door_key in doors:
+                (x1, y1), (x2, y2) = sorted(door_key)
+                new_doors.append(f"{y1 + offset_y} {x1 + offset_x} {y2 + offset_y} {x2 + offset_x}")
+
+            for (x, y) in entry_points:
+                # Directions towards the sides of the house touched by this entry point
+                sides = []
+                if x == 1:
+                    sides.append((-1, 0, tile_x == 0))
+                if x == columns:
+                    sides.append((1, 0, tile_x == tiles_x - 1))
+                if y == 1:
+                    sides.append((0, -1, tile_y == 0))
+                if y == rows:
+                    sides.append((0, 1, tile_y == tiles_y - 1))
+
+                new_x = x + offset_x
+                new_y = y + offset_y
+                if not sides or any(is_outside for _, _, is_outside in sides):
+                    new_entries.append(f"{new_y} {new_x}")
+                else:
+                    dx, dy, _ = sides[0]
+                    new_doors.append(f"{new_y} {new_x} {new_y + dy} {new_x + dx}")
+
+    lines.extend(new_pois)
+    lines.extend(new_fires)
+    lines.extend(new_doors)
+    lines.extend(new_entries)
+    return "\n".join(lines)
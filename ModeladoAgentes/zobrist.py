@@ -0,0 +1,123 @@
+"""Incremental Zobrist hashing of the game state.
+
+Every (cell, fire state), (cell, point of interest), (cell, wall bits),
+(cell, side, damage), (door, state) and (agent, cell) pair gets a fixed random
+64-bit key, and the hash of a state is the XOR of the keys of what is on the
+board. A change XORs the old key out and the new one in, so the model keeps
+the hash up to date in constant time from the methods that change the board.
+
+The keys come from a fixed seed, so the same state has the same hash in every
+process and run: hashes can be compared across workers and stored with results.
+The parts of the board are also hashed separately, so a cached result can
+depend only on what it reads (paths only on walls and doors, for example).
+
+    model.zobrist.board      # walls, damage, doors, fires and points of interest
+    model.zobrist.topology   # walls and doors
+    model.state_hash         # the board plus the agent positions
+"""
+import random
+
+# Same keys in every process
+ZOBRIST_SEED = 0x5EED
+
+FIRE_INDEX = {0: 0, 0.5: 1, 1: 2}
+POI_INDEX = {'': 0, 'v': 1, 'f': 2}
+DOOR_STATES = ('closed', 'open', 'destroyed')
+DAMAGE_LEVELS = 4  # Damage above 3 on a side shares the key of 3
+
+
+class ZobristHasher:
+    def __init__(self, width, height, door_keys=()):
+        rng = random.Random(ZOBRIST_SEED)
+
+        def keys(count):
+            # 63 bits, so hashes also fit in int64 columns
+            return [rng.getrandbits(63) for _ in range(count)]
+
+        cells = [(x, y) for x in range(width) for y in range(height)]
+        self.fire_keys = {cell: keys(len(FIRE_INDEX)) for cell in cells}
+        self.poi_keys = {cell: keys(len(POI_INDEX)) for cell in cells}
+        self.wall_keys = {cell: keys(16) for cell in cells}
+        self.damage_keys = {cell: [keys(DAMAGE_LEVELS) for _ in range(4)] for cell in cells}
+        self.agent_cell_keys = {cell: keys(1)[0] for cell in cells}
+        # Doors are keyed in a canonical order so the keys do not depend on dict order
+        self.door_keys = {}
+        for door_key in sorted(door_keys, key=sorted):
+            self.door_keys[door_key] = dict(zip(DOOR_STATES, keys(len(DOOR_STATES))))
+        self.agent_keys = {}
+        self._rng = rng
+
+        # Hash of every part of the board
+        self.topology = 0
+        self.damage = 0
+        self.fires = 0
+        self.points_of_interest = 0
+        self.agents = 0
+
+    def reset(self, model):
+        """Hash of the whole state from scratch, used at the start and to check the incremental hash."""
+        topology = damage = fires = points_of_interest = 0
+        for cell in self.fire_keys:
+            fires ^= self.fire_keys[cell][FIRE_INDEX[float(model.fires.data[cell])]]
+            points_of_interest ^= self.poi_keys[cell][POI_INDEX[str(model.points_of_interest.data[cell])]]
+            topology ^= self.wall_keys[cell][int(model.walls[cell])]
+            for side, level in enumerate(model.damage[cell]):
+                damage ^= self.damage_keys[cell][side][min(level, DAMAGE_LEVELS - 1)]
+        for door_key, state in model.doors.items():
+            topology ^= self.door_keys[door_key][state]
+
+        agents = 0
+        for agent in model.agent_list:
+            if agent.pos is not None:
+                agents ^= self.agent_key(agent, agent.pos)
+
+        self.topology = topology
+        self.damage = damage
+        self.fires = fires
+        self.points_of_interest = points_of_interest
+        self.agents = agents
+        return self.state
+
+    @property
+    def board(self):
+        return self.topology ^ self.damage ^ self.fires ^ self.points_of_interest
+
+    @property
+    def state(self):
+        return self.board ^ self.agents
+
+    def agent_key(self, agent, pos):
+        # Agents get their keys when first seen, in creation order
+        agent_key = self.agent_keys.get(agent.unique_id)
+        if agent_key is None:
+            agent_key = self.agent_keys[agent.unique_id] = self._rng.getrandbits(63)
+        return agent_key ^ self.agent_cell_keys[pos]
+
+    def set_fire(self, pos, old_value, new_value):
+        keys = self.fire_keys[pos]
+        self.fires ^= keys[FIRE_INDEX[float(old_value)]] ^ keys[FIRE_INDEX[float(new_value)]]
+
+    def set_point_of_interest(self, pos, old_value, new_value):
+        keys = self.poi_keys[pos]
+        self.points_of_interest ^= keys[POI_INDEX[str(old_value)]] ^ keys[POI_INDEX[str(new_value)]]
+
+    def set_walls(self, pos, old_value, new_value):
+        keys = self.wall_keys[pos]
+        self.topology ^= keys[int(old_value)] ^ keys[int(new_value)]
+
+    def set_damage(self, pos, old_damage, new_damage):
+        keys = self.damage_keys[pos]
+        for side, (old_level, new_level) in enumerate(zip(old_damage, new_damage)):
+            if old_level != new_level:
+                side_keys = keys[side]
+                self.damage ^= side_keys[min(old_level, DAMAGE_LEVELS - 1)] ^ side_keys[min(new_level, DAMAGE_LEVELS - 1)]
+
+    def set_door(self, door_key, old_state, new_state):
+        keys = self.door_keys[door_key]
+        self.topology ^= keys[old_state] ^ keys[new_state]
+
+    def move_agent(self, agent, old_pos, new_pos):
+        if old_pos is not None:
+            self.agents ^= self.agent_key(agent, old_pos)
+        if new_pos is not None:
+            self.agents ^= self.agent_key(agent, new_pos)